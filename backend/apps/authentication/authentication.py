@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from apps.core.metricas import FALLOS_AUTENTICACION
+from .revocacion import esta_revocado
+
+
+def clave_usuario_activo(user_id):
+    return f'usuario_activo:{user_id}'
+
+
+def usuario_activo(user_id):
+    """
+    Retorna si el usuario existe y está activo, consultando la base de datos
+    como máximo una vez cada JWT_CACHE_ACTIVO_SEGUNDOS por usuario.
+    """
+    clave = clave_usuario_activo(user_id)
+    activo = cache.get(clave)
+    if activo is None:
+        activo = User.objects.filter(pk=user_id, is_active=True).exists()
+        cache.set(clave, activo, settings.JWT_CACHE_ACTIVO_SEGUNDOS)
+    return activo
+
+
+class JWTAuthenticationConMetricas(JWTAuthentication):
+    """JWTAuthentication que rechaza tokens revocados y cuenta los rechazos en /metrics"""
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed as error:
+            codigo = error.get_codes()
+            if isinstance(codigo, dict):
+                codigo = codigo.get('code', 'authentication_failed')
+            FALLOS_AUTENTICACION.labels(codigo=str(codigo)).inc()
+            raise
+
+    def get_validated_token(self, raw_token):
+        validated_token = super().get_validated_token(raw_token)
+        if esta_revocado(validated_token[api_settings.JTI_CLAIM]):
+            raise AuthenticationFailed('El token fue revocado', code='token_revoked')
+        return validated_token
+
+
+class JWTSinConsultaAuthentication(JWTAuthenticationConMetricas):
+    """
+    Autenticación JWT sin cargar el User: request.user es un TokenUser
+    construido desde los claims firmados (id, username).
+
+    Solo para vistas que usan request.user.pk; la desactivación o eliminación
+    del usuario se detecta a través de usuario_activo() (caché con TTL corto).
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('El token no contiene la identificación del usuario')
+
+        if not usuario_activo(user_id):
+            raise AuthenticationFailed('Usuario inactivo o inexistente', code='user_inactive')
+        return TokenUser(validated_token)
@@ -0,0 +1,107 @@
+"""
+Hashers de contraseñas con costo configurable por variables de entorno.
+
+PASSWORD_HASHER elige el perfil (pbkdf2, scrypt o argon2) con el que se
+hashean las contraseñas nuevas; los demás perfiles siguen verificando las
+existentes. Al iniciar sesión Django vuelve a hashear la contraseña si fue
+creada con otro perfil o con otro costo (must_update), así un cambio de
+perfil se aplica de forma gradual sin invalidar contraseñas.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher, ScryptPasswordHasher
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+
+def hashers_para_perfil(perfil):
+    """Valor de PASSWORD_HASHERS con el perfil como preferido"""
+    return [settings.PERFILES_HASHER[perfil]] + [
+        hasher for nombre, hasher in settings.PERFILES_HASHER.items() if nombre != perfil
+    ]
+
+
+class PBKDF2Hasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 con PASSWORD_PBKDF2_ITERACIONES iteraciones"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERACIONES
+
+
+class ScryptHasher(ScryptPasswordHasher):
+    """scrypt con N, r y p de PASSWORD_SCRYPT_N, PASSWORD_SCRYPT_R y PASSWORD_SCRYPT_P"""
+
+    @property
+    def work_factor(self):
+        return settings.PASSWORD_SCRYPT_N
+
+    @property
+    def block_size(self):
+        return settings.PASSWORD_SCRYPT_R
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_SCRYPT_P
+
+    @property
+    def maxmem(self):
+        # hashlib limita scrypt a 32 MiB por defecto; se amplía para costos mayores
+        return max(32 * 1024 * 1024, 2 * 128 * self.block_size * (self.work_factor + self.parallelism))
+
+
+class Argon2Hasher(Argon2PasswordHasher):
+    """Argon2id con PASSWORD_ARGON2_TIME_COST, PASSWORD_ARGON2_MEMORY_COST (KiB) y PASSWORD_ARGON2_PARALLELISM"""
+
+    @property
+    def time_cost(self):
+        return settings.PASSWORD_ARGON2_TIME_COST
+
+    @property
+    def memory_cost(self):
+        return settings.PASSWORD_ARGON2_MEMORY_COST
+
+    @property
+    def parallelism(self):
+        return settings.PASSWORD_ARGON2_PARALLELISM
+
+
+def hashing_fuera_del_hilo(vista):
+    """
+    Bajo ASGI (HASHING_FUERA_DEL_HILO) ejecuta la vista en el pool de hilos.
+
+    Django corre todas las vistas síncronas de un worker ASGI en un único
+    hilo compartido, por lo que un hash de contraseña bloquearía al resto de
+    peticiones. Los algoritmos de hash liberan el GIL, así varias vistas
+    envueltas hashean en paralelo. Con WSGI retorna la vista sin cambios.
+
+    Solo sirve si todos los MIDDLEWARE son asíncronos: con uno solo síncrono
+    Django corre la cadena entera en el hilo compartido, que queda esperando
+    al pool, por eso en ese caso se rechaza la configuración.
+    """
+    if not settings.HASHING_FUERA_DEL_HILO:
+        return vista
+    sincronos = [
+        ruta for ruta in settings.MIDDLEWARE if not getattr(import_string(ruta), 'async_capable', False)
+    ]
+    if sincronos:
+        raise ImproperlyConfigured(
+            f'HASHING_FUERA_DEL_HILO requiere middlewares asíncronos; son solo síncronos: {", ".join(sincronos)}'
+        )
+
+    def ejecutar(request, *args, **kwargs):
+        # Las señales de inicio y fin de petición no cierran las conexiones de este hilo
+        close_old_connections()
+        try:
+            return vista(request, *args, **kwargs)
+        finally:
+            close_old_connections()
+
+    @functools.wraps(vista)
+    async def vista_asincrona(request, *args, **kwargs):
+        return await sync_to_async(ejecutar, thread_sensitive=False)(request, *args, **kwargs)
+
+    return vista_asincrona
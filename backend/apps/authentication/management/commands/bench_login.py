@@ -0,0 +1,41 @@
+import math
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.benchmark import medir_login
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide los logins por segundo por núcleo de cada perfil de hash de contraseñas '
+        '(PASSWORD_HASHER) con el costo configurado, para dimensionar los workers. '
+        'Los usuarios de prueba se revierten al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--perfil', action='append', choices=list(settings.PERFILES_HASHER),
+                            help='Mide solo este perfil (repetible; por defecto todos)')
+        parser.add_argument('--repeticiones', type=int, default=20, help='Logins medidos por perfil')
+        parser.add_argument('--objetivo', type=float, help='Logins por segundo esperados en el pico, para estimar núcleos')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor a 0')
+
+        self.stdout.write(f'{"perfil":<8} {"hash ms":>8} {"p50 ms":>8} {"p95 ms":>8} {"logins/s/núcleo":>16}'
+                          + (f' {"núcleos":>8}' if options['objetivo'] else ''))
+        for perfil in options['perfil'] or settings.PERFILES_HASHER:
+            try:
+                metricas = medir_login(perfil, options['repeticiones'])
+            except ValueError as error:
+                self.stderr.write(f'{perfil:<8} omitido: {error}')
+                continue
+            except AssertionError as error:
+                raise CommandError(str(error))
+
+            linea = (f'{perfil:<8} {metricas["hash_ms"]:>8.2f} {metricas["p50_ms"]:>8.2f} '
+                     f'{metricas["p95_ms"]:>8.2f} {metricas["logins_por_segundo"]:>16.1f}')
+            if options['objetivo']:
+                linea += f' {math.ceil(options["objetivo"] / metricas["logins_por_segundo"]):>8}'
+            self.stdout.write(linea + (' (actual)' if perfil == settings.PASSWORD_HASHER else ''))
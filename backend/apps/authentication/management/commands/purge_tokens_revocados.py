@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.authentication.models import TokenRevocado
+
+
+class Command(BaseCommand):
+    help = 'Borra las revocaciones de tokens JWT que ya expiraron'
+
+    def handle(self, *args, **options):
+        borrados = TokenRevocado.objects.purgar(timezone.now())
+        self.stdout.write(self.style.SUCCESS(f'✅ {borrados} token(s) revocado(s) purgado(s)'))
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:32
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=255, unique=True)),
+                ('expira', models.DateTimeField(help_text='Expiración del token; después de esta fecha se puede purgar')),
+                ('fecha', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Token revocado',
+                'verbose_name_plural': 'Tokens revocados',
+                'indexes': [models.Index(fields=['expira'], name='token_revocado_expira_idx')],
+            },
+        ),
+    ]
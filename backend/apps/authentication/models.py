@@ -1,3 +1,40 @@
+from django.contrib.auth.models import User
 from django.db import models
 
-# No necesitamos modelos adicionales, usamos el User de Django
+
+class TokenRevocadoQuerySet(models.QuerySet):
+    """QuerySet con utilidades para TokenRevocado"""
+
+    def vigentes(self, momento):
+        """Revocaciones de tokens que aún no expiran"""
+        return self.filter(expira__gt=momento)
+
+    def purgar(self, momento):
+        """Borra las revocaciones de tokens ya expirados y retorna cuántas eran"""
+        return self.filter(expira__lte=momento).delete()[0]
+
+
+class TokenRevocado(models.Model):
+    """
+    jti de un token JWT revocado (logout o refresh rotado).
+
+    Es la copia durable de la lista en memoria de revocacion.py; la
+    verificación de cada token no consulta esta tabla.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    usuario = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    expira = models.DateTimeField(help_text='Expiración del token; después de esta fecha se puede purgar')
+    fecha = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = TokenRevocadoQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Token revocado'
+        verbose_name_plural = 'Tokens revocados'
+        indexes = [
+            models.Index(fields=['expira'], name='token_revocado_expira_idx'),
+        ]
+
+    def __str__(self):
+        return self.jti
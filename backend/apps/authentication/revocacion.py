@@ -0,0 +1,104 @@
+"""
+Revocación de tokens JWT por jti (logout y rotación de refresh tokens).
+
+Los jti revocados viven en un diccionario en memoria por proceso con su
+expiración, de modo que verificar un token no consulta la base de datos.
+TokenRevocado es la copia durable: cada proceso la lee al iniciar y luego
+solo trae las revocaciones nuevas, como máximo una vez cada
+REVOCACION_SINCRONIZACION_SEGUNDOS, para ver lo revocado en otros workers.
+El diccionario solo conserva tokens no expirados.
+"""
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenRevocado
+
+
+# Las revocaciones confirmadas poco antes de la última lectura se vuelven a
+# leer por si su transacción terminó después
+MARGEN_SINCRONIZACION = timedelta(seconds=60)
+
+_revocados = {}
+_lock = threading.Lock()
+_estado = {'ultima': None, 'desde': None}
+
+
+def _fila(jti, token):
+    return TokenRevocado(
+        jti=jti, usuario_id=token.get(api_settings.USER_ID_CLAIM),
+        expira=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc),
+    )
+
+
+def _recordar(jti, token):
+    with _lock:
+        _revocados[jti] = token['exp']
+
+
+def revocar(*tokens):
+    """Revoca los tokens (RefreshToken/AccessToken) en memoria y en la base de datos con un solo INSERT"""
+    revocados = {token[api_settings.JTI_CLAIM]: token for token in tokens}
+    TokenRevocado.objects.bulk_create(
+        [_fila(jti, token) for jti, token in revocados.items()], ignore_conflicts=True
+    )
+    for jti, token in revocados.items():
+        _recordar(jti, token)
+
+
+def revocar_rotado(token):
+    """
+    Revoca el refresh token que se rota y retorna False si ya estaba revocado.
+
+    El jti es único: de dos rotaciones del mismo token, en este u otro worker,
+    solo una logra el INSERT, aunque la lista en memoria aún no lo tenga.
+    """
+    jti = token[api_settings.JTI_CLAIM]
+    fila = _fila(jti, token)
+    try:
+        if transaction.get_connection().in_atomic_block:
+            # Savepoint para que el INSERT fallido no invalide la transacción en curso
+            with transaction.atomic():
+                fila.save(force_insert=True)
+        else:
+            fila.save(force_insert=True)
+        revocado = True
+    except IntegrityError:
+        revocado = False
+    _recordar(jti, token)
+    return revocado
+
+
+def esta_revocado(jti):
+    sincronizar()
+    return jti in _revocados
+
+
+def sincronizar(forzar=False):
+    """Trae de la base de datos las revocaciones nuevas si pasó el intervalo configurado"""
+    ahora = time.monotonic()
+    ultima = _estado['ultima']
+    if not forzar and ultima is not None and ahora - ultima < settings.REVOCACION_SINCRONIZACION_SEGUNDOS:
+        return
+
+    with _lock:
+        if not forzar and _estado['ultima'] != ultima:
+            return  # Otro hilo sincronizó mientras se esperaba el lock
+        momento = timezone.now()
+        filas = TokenRevocado.objects.vigentes(momento)
+        if _estado['desde'] is not None:
+            filas = filas.filter(fecha__gte=_estado['desde'] - MARGEN_SINCRONIZACION)
+        for jti, expira in filas.values_list('jti', 'expira'):
+            _revocados[jti] = expira.timestamp()
+
+        limite = time.time()
+        for jti in [jti for jti, expira in _revocados.items() if expira <= limite]:
+            del _revocados[jti]
+
+        _estado['ultima'] = ahora
+        _estado['desde'] = momento
@@ -1,7 +1,17 @@
+from datetime import timedelta
+
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth.password_validation import validate_password
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.validators import UniqueValidator
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import usuario_activo
+from .revocacion import esta_revocado, revocar_rotado
 
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -76,3 +86,58 @@ class ChangePasswordSerializer(serializers.Serializer):
                 "new_password": "Las contraseñas no coinciden"
             })
         return attrs
+
+
+class TokenRefreshConRevocacionSerializer(TokenRefreshSerializer):
+    """
+    Refresh que rechaza tokens revocados y, con BLACKLIST_AFTER_ROTATION,
+    revoca el token rotado. No consulta la base de datos para verificar:
+    usa la lista en memoria de revocaciones y el is_active en caché.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if esta_revocado(refresh[api_settings.JTI_CLAIM]):
+            raise AuthenticationFailed('El token fue revocado', code='token_revoked')
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id and not usuario_activo(user_id):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revocar_rotado(refresh):
+                # Otra petición ya rotó este token (repetición o refresh concurrente)
+                raise AuthenticationFailed('El token fue revocado', code='token_revoked')
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+
+def registrar_ultimo_login(usuario):
+    """
+    Actualiza last_login solo si tiene más de ULTIMO_LOGIN_INTERVALO_SEGUNDOS.
+
+    En el caso común el login no escribe en auth_user. El UPDATE repite la
+    condición, así entre logins concurrentes solo uno escribe, y no emite
+    post_save (last_login no afecta al is_active en caché).
+    """
+    ahora = timezone.now()
+    limite = ahora - timedelta(seconds=settings.ULTIMO_LOGIN_INTERVALO_SEGUNDOS)
+    if usuario.last_login is not None and usuario.last_login > limite:
+        return
+    User.objects.filter(Q(last_login__isnull=True) | Q(last_login__lte=limite), pk=usuario.pk).update(last_login=ahora)
+    usuario.last_login = ahora
+
+
+class TokenObtainConUltimoLoginSerializer(TokenObtainPairSerializer):
+    """Login que registra last_login con registrar_ultimo_login (SIMPLE_JWT['UPDATE_LAST_LOGIN'] desactivado)"""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        registrar_ultimo_login(self.user)
+        return data
@@ -0,0 +1,14 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+
+from .authentication import clave_usuario_activo
+
+
+def invalidar_usuario_activo(sender, instance, **kwargs):
+    """Descarta el is_active en caché para que la autenticación sin consulta lo relea"""
+    cache.delete(clave_usuario_activo(instance.pk))
+
+
+post_save.connect(invalidar_usuario_activo, sender=User, dispatch_uid='invalidar_usuario_activo_save')
+post_delete.connect(invalidar_usuario_activo, sender=User, dispatch_uid='invalidar_usuario_activo_delete')
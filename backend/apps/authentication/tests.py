@@ -0,0 +1,283 @@
+import asyncio
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.hashers import identify_hasher
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.vehicles.models import Vehiculo
+from . import revocacion
+from .hashers import hashers_para_perfil, hashing_fuera_del_hilo
+from .models import TokenRevocado
+
+hashing_iniciado = threading.Event()
+hashing_liberado = threading.Event()
+
+
+def vista_hashing(request):
+    # Simula un hash costoso que ocupa su hilo hasta que la prueba lo libera
+    hashing_iniciado.set()
+    hashing_liberado.wait(5)
+    return HttpResponse('hashing')
+
+
+def vista_rapida(request):
+    return HttpResponse('rapida')
+
+
+with override_settings(HASHING_FUERA_DEL_HILO=True):
+    urlpatterns = [
+        path('hashing/', hashing_fuera_del_hilo(vista_hashing)),
+        path('rapida/', vista_rapida),
+    ]
+
+
+class JWTSinConsultaTests(APITestCase):
+    """Pruebas de la autenticación JWT que no carga el usuario"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00')
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.usuario)}')
+
+    def test_omite_la_consulta_del_usuario(self):
+        self.assertEqual(self.client.get('/api/vehicles/').status_code, 200)
+        # Con is_active en caché: validador de GET condicional + count + página
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/vehicles/')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_escritura_con_token_user(self):
+        response = self.client.post('/api/vehicles/', {
+            'marca': 'Toyota', 'modelo': 'Hilux', 'año': 2020, 'placa': 'UIO-5678', 'capacidad_tanque': '21.10',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Vehiculo.objects.get(placa='UIO-5678').usuario, self.usuario)
+
+    def test_usuario_desactivado_o_eliminado(self):
+        self.assertEqual(self.client.get('/api/vehicles/').status_code, 200)
+        self.usuario.is_active = False
+        self.usuario.save()
+        response = self.client.get('/api/vehicles/')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'user_inactive')
+
+        self.usuario.delete()
+        self.assertEqual(self.client.get('/api/fuel-logs/').status_code, 401)
+
+    def test_vistas_sin_opt_in_cargan_el_usuario(self):
+        response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['username'], 'flota')
+
+
+class RevocacionTokensTests(APITestCase):
+    """Pruebas de logout y rotación de refresh tokens con revocación por jti"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'flota', 'password': 'clave-segura-123'})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def refrescar(self, refresh):
+        return self.client.post('/api/auth/refresh/', {'refresh': refresh})
+
+    def test_logout_revoca_refresh_y_access(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {tokens["access"]}')
+        self.assertEqual(self.client.post('/api/auth/logout/', {'refresh': tokens['refresh']}).status_code, 200)
+
+        self.assertEqual(self.client.get('/api/auth/me/').status_code, 401)
+        self.assertEqual(self.client.get('/api/vehicles/').status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.refrescar(tokens['refresh']).status_code, 401)
+        self.assertEqual(TokenRevocado.objects.count(), 2)
+
+    def test_rotacion_revoca_el_refresh_anterior(self):
+        tokens = self.login()
+        response = self.refrescar(tokens['refresh'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data['refresh'], tokens['refresh'])
+
+        self.assertEqual(self.refrescar(tokens['refresh']).status_code, 401)
+        self.assertEqual(self.refrescar(response.data['refresh']).status_code, 200)
+
+    def test_repetir_refresh_rotado_en_otro_worker(self):
+        tokens = self.login()
+        self.assertEqual(self.refrescar(tokens['refresh']).status_code, 200)
+        # Otro worker: su lista en memoria aún no tiene el token rotado
+        revocacion._revocados.clear()
+
+        response = self.refrescar(tokens['refresh'])
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'token_revoked')
+        self.assertEqual(TokenRevocado.objects.count(), 1)
+
+    def test_refresh_sin_leer_usuario_ni_revocaciones(self):
+        tokens = self.login()
+        self.refrescar(tokens['refresh'])
+        refresh = str(RefreshToken.for_user(self.usuario))
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.refrescar(refresh).status_code, 200)
+        # Solo la escritura durable del token rotado
+        self.assertTrue(consultas.captured_queries)
+        for consulta in consultas.captured_queries:
+            self.assertNotIn('auth_user', consulta['sql'])
+            self.assertFalse(consulta['sql'].startswith('SELECT') and 'expira' in consulta['sql'])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refrescar(refresh).status_code, 401)
+
+    @override_settings(REVOCACION_SINCRONIZACION_SEGUNDOS=0)
+    def test_revocacion_de_otro_worker(self):
+        refresh = RefreshToken.for_user(self.usuario)
+        # Fila escrita por otro proceso: este solo la conoce al sincronizar
+        TokenRevocado.objects.create(
+            jti=refresh['jti'], usuario=self.usuario, expira=timezone.now() + timedelta(days=1)
+        )
+        self.assertEqual(self.refrescar(str(refresh)).status_code, 401)
+
+    def test_purgar_expirados(self):
+        TokenRevocado.objects.create(jti='vencido', expira=timezone.now() - timedelta(minutes=1))
+        TokenRevocado.objects.create(jti='vigente', expira=timezone.now() + timedelta(minutes=1))
+        call_command('purge_tokens_revocados', stdout=StringIO())
+        self.assertEqual(list(TokenRevocado.objects.values_list('jti', flat=True)), ['vigente'])
+
+
+# Costos bajos para que las pruebas no dependan del CPU
+@override_settings(PASSWORD_PBKDF2_ITERACIONES=1000, PASSWORD_SCRYPT_N=2 ** 8)
+class PerfilesHasherTests(APITestCase):
+    """Pruebas de los perfiles de hash de contraseñas"""
+
+    def setUp(self):
+        with override_settings(PASSWORD_HASHERS=hashers_para_perfil('pbkdf2')):
+            self.usuario = User.objects.create_user('flota', password='clave-segura-123')
+
+    def login(self):
+        return self.client.post('/api/auth/login/', {'username': 'flota', 'password': 'clave-segura-123'})
+
+    def algoritmo(self):
+        self.usuario.refresh_from_db()
+        return identify_hasher(self.usuario.password)
+
+    @override_settings(PASSWORD_HASHERS=hashers_para_perfil('scrypt'))
+    def test_login_rehashea_con_el_perfil_actual(self):
+        self.assertEqual(self.algoritmo().algorithm, 'pbkdf2_sha256')
+        self.assertEqual(self.login().status_code, 200)
+        self.assertEqual(self.algoritmo().algorithm, 'scrypt')
+        self.assertEqual(self.login().status_code, 200)
+
+    def test_login_rehashea_al_cambiar_el_costo(self):
+        with override_settings(PASSWORD_PBKDF2_ITERACIONES=2000):
+            self.assertEqual(self.login().status_code, 200)
+            self.assertFalse(self.algoritmo().must_update(self.usuario.password))
+        self.assertTrue(self.usuario.password.startswith('pbkdf2_sha256$2000$'))
+
+    def test_hashing_fuera_del_hilo_solo_con_asgi(self):
+        def vista(request):
+            return HttpResponse('ok')
+
+        self.assertIs(hashing_fuera_del_hilo(vista), vista)
+        with override_settings(HASHING_FUERA_DEL_HILO=True):
+            envuelta = hashing_fuera_del_hilo(vista)
+        self.assertTrue(asyncio.iscoroutinefunction(envuelta))
+        self.assertEqual(async_to_sync(envuelta)(RequestFactory().get('/')).content, b'ok')
+
+    @override_settings(HASHING_FUERA_DEL_HILO=True)
+    def test_hashing_fuera_del_hilo_rechaza_middlewares_sincronos(self):
+        with override_settings(MIDDLEWARE=[*settings.MIDDLEWARE, 'whitenoise.middleware.WhiteNoiseMiddleware']):
+            with self.assertRaises(ImproperlyConfigured):
+                hashing_fuera_del_hilo(vista_rapida)
+
+    def test_bench_login(self):
+        salida = StringIO()
+        call_command('bench_login', perfil=['pbkdf2', 'scrypt'], repeticiones=2, objetivo=10, stdout=salida)
+        lineas = salida.getvalue().splitlines()
+        self.assertEqual([linea.split()[0] for linea in lineas[1:]], ['pbkdf2', 'scrypt'])
+        self.assertFalse(User.objects.filter(username__startswith='benchmark_login').exists())
+
+
+@override_settings(ROOT_URLCONF='apps.authentication.tests', METRICAS_ACTIVAS=True, INSTRUMENTACION_ACTIVA=True)
+class HashingFueraDelHiloAsgiTests(SimpleTestCase):
+    """Pruebas del hashing en el pool a través de la cadena ASGI completa de middlewares"""
+
+    def setUp(self):
+        hashing_iniciado.clear()
+        hashing_liberado.clear()
+
+    async def test_hashing_no_bloquea_las_vistas_sincronas(self):
+        with self.assertLogs('apps.core.instrumentacion', 'INFO'):
+            hashing = asyncio.ensure_future(self.async_client.get('/hashing/'))
+            try:
+                while not hashing_iniciado.is_set():
+                    await asyncio.sleep(0.01)
+                # Con un middleware síncrono en la cadena esta petición espera al hashing
+                response = await asyncio.wait_for(self.async_client.get('/rapida/'), timeout=2)
+                self.assertEqual(response.content, b'rapida')
+                self.assertFalse(hashing.done())
+            finally:
+                hashing_liberado.set()
+            self.assertEqual((await hashing).content, b'hashing')
+
+
+@override_settings(PASSWORD_PBKDF2_ITERACIONES=1000, ULTIMO_LOGIN_INTERVALO_SEGUNDOS=900)
+class UltimoLoginTests(APITestCase):
+    """Pruebas del registro coalescido de last_login"""
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('flota', password='clave-segura-123')
+
+    def login(self):
+        response = self.client.post('/api/auth/login/', {'username': 'flota', 'password': 'clave-segura-123'})
+        self.assertEqual(response.status_code, 200)
+        self.usuario.refresh_from_db()
+        return self.usuario.last_login
+
+    def test_primer_login_registra_y_los_siguientes_no_escriben(self):
+        primero = self.login()
+        self.assertIsNotNone(primero)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.login(), primero)
+        # Solo la lectura del usuario en el login y el refresh_from_db de la prueba
+        self.assertEqual(len(consultas), 2)
+        self.assertFalse(any(consulta['sql'].startswith('UPDATE') for consulta in consultas))
+
+    def test_registra_si_el_ultimo_es_antiguo(self):
+        anterior = timezone.now() - timedelta(hours=1)
+        User.objects.filter(pk=self.usuario.pk).update(last_login=anterior)
+        self.assertGreater(self.login(), anterior)
+
+    @override_settings(ULTIMO_LOGIN_INTERVALO_SEGUNDOS=0)
+    def test_intervalo_cero_registra_cada_login(self):
+        primero = self.login()
+        self.assertGreater(self.login(), primero)
@@ -1,13 +1,14 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .hashers import hashing_fuera_del_hilo
 from .views import RegisterView, UserDetailView, ChangePasswordView, LogoutView
 
 urlpatterns = [
     # Registro de usuario
-    path('register/', RegisterView.as_view(), name='auth-register'),
+    path('register/', hashing_fuera_del_hilo(RegisterView.as_view()), name='auth-register'),
 
     # Login (obtener tokens JWT)
-    path('login/', TokenObtainPairView.as_view(), name='auth-login'),
+    path('login/', hashing_fuera_del_hilo(TokenObtainPairView.as_view()), name='auth-login'),
 
     # Refrescar access token
     path('refresh/', TokenRefreshView.as_view(), name='auth-refresh'),
@@ -16,7 +17,7 @@ urlpatterns = [
     path('me/', UserDetailView.as_view(), name='auth-me'),
 
     # Cambiar contraseña
-    path('change-password/', ChangePasswordView.as_view(), name='auth-change-password'),
+    path('change-password/', hashing_fuera_del_hilo(ChangePasswordView.as_view()), name='auth-change-password'),
 
     # Logout
     path('logout/', LogoutView.as_view(), name='auth-logout'),
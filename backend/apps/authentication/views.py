@@ -2,8 +2,10 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
+from .revocacion import revocar
 from .serializers import RegisterSerializer, UserSerializer, ChangePasswordSerializer
 
 
@@ -151,14 +153,15 @@ class LogoutView(APIView):
                 )
 
             token = RefreshToken(refresh_token)
-            # Nota: Para blacklist necesitarías configurar BLACKLIST_AFTER_ROTATION
-            # Por ahora solo retornamos mensaje de éxito
+
+            # Revoca el refresh token y el access token de la petición
+            revocar(token, *([request.auth] if request.auth is not None else []))
 
             return Response({
                 "message": "Sesión cerrada exitosamente"
             }, status=status.HTTP_200_OK)
 
-        except Exception as e:
+        except TokenError:
             return Response(
                 {"error": "Token inválido"},
                 status=status.HTTP_400_BAD_REQUEST
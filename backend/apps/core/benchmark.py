@@ -0,0 +1,274 @@
+"""
+Benchmark repetible de los endpoints de la API.
+
+Cada escenario se ejecuta con el cliente de pruebas de Django contra la base
+configurada (SQLite o MySQL local) y registra latencia p50/p95, la cantidad
+máxima de consultas y el pico de memoria de una petición. Los resultados se
+comparan con un presupuesto versionado (benchmark_presupuesto.json) para
+detectar regresiones como consultas N+1 antes de desplegar.
+"""
+import json
+import math
+import time
+import tracemalloc
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.authentication.hashers import hashers_para_perfil
+from apps.fuel_logs.models import CargaCombustible
+from apps.maintenance.models import AlertaMantenimiento, Mantenimiento
+from .sincronizacion import codificar_token
+
+
+PRESUPUESTO_POR_DEFECTO = settings.BASE_DIR / 'benchmark_presupuesto.json'
+
+# Holgura aplicada a latencia y memoria al regenerar el presupuesto
+HOLGURA_PRESUPUESTO = 1.5
+
+
+def _refresh(contexto, iteracion):
+    return {'refresh': str(RefreshToken.for_user(contexto['usuario']))}
+
+
+def _logout(contexto, iteracion):
+    # El logout revoca el access token de la petición: cada iteración usa una sesión nueva
+    refresh = RefreshToken.for_user(contexto['usuario'])
+    contexto['autorizacion'] = f'Bearer {refresh.access_token}'
+    return {'refresh': str(refresh)}
+
+
+def _kilometraje(contexto):
+    contexto['kilometraje'] += 10
+    return contexto['kilometraje']
+
+
+def _carga(contexto):
+    return {
+        'vehiculo': contexto['vehiculo'], 'fecha': timezone.now().isoformat(),
+        'kilometraje': _kilometraje(contexto), 'galones': contexto['galones'], 'precio_galon': '2.50',
+        'tipo_combustible': 'EXTRA', 'tanque_lleno': True,
+    }
+
+
+def _cambio_password(contexto, iteracion):
+    anterior, nueva = contexto['password'], f'Benchmark-{iteracion}-kmtracker'
+    contexto['password'] = nueva
+    return {'old_password': anterior, 'new_password': nueva, 'new_password2': nueva}
+
+
+# (nombre, método, ruta, datos); la ruta se formatea con el contexto y los
+# datos pueden ser una función (contexto, iteración) evaluada fuera del tiempo medido.
+# Se omiten admin y la documentación (schema, swagger, redoc).
+ESCENARIOS = [
+    ('auth_login', 'post', '/api/auth/login/',
+     lambda contexto, i: {'username': contexto['usuario'].username, 'password': contexto['password']}),
+    ('auth_refresh', 'post', '/api/auth/refresh/', _refresh),
+    ('auth_me', 'get', '/api/auth/me/', None),
+    ('auth_register', 'post', '/api/auth/register/', lambda contexto, i: {
+        'username': f'benchmark_registro_{i}', 'email': f'benchmark_registro_{i}@kmtracker.ec',
+        'password': 'Benchmark-registro-123', 'password2': 'Benchmark-registro-123',
+        'first_name': 'Bench', 'last_name': 'Mark',
+    }),
+    ('auth_change_password', 'post', '/api/auth/change-password/', _cambio_password),
+    ('auth_logout', 'post', '/api/auth/logout/', _logout),
+    ('vehiculos_lista', 'get', '/api/vehicles/', None),
+    ('vehiculos_detalle', 'get', '/api/vehicles/{vehiculo}/', None),
+    ('vehiculos_resumen', 'get', '/api/vehicles/resumen/', None),
+    ('vehiculos_publicos', 'get', '/api/vehicles/publicos/', None),
+    ('vehiculos_actualizar_kilometraje', 'post', '/api/vehicles/{vehiculo}/actualizar_kilometraje/',
+     lambda contexto, i: {'kilometraje': _kilometraje(contexto)}),
+    ('cargas_lista', 'get', '/api/fuel-logs/', None),
+    ('cargas_lista_vehiculo', 'get', '/api/fuel-logs/?vehiculo={vehiculo}', None),
+    ('cargas_lista_cursor', 'get', '/api/fuel-logs/?cursor=', None),
+    ('cargas_detalle', 'get', '/api/fuel-logs/{carga}/', None),
+    ('cargas_estadisticas', 'get', '/api/fuel-logs/estadisticas/?vehiculo={vehiculo}', None),
+    ('cargas_crear', 'post', '/api/fuel-logs/', lambda contexto, i: _carga(contexto)),
+    ('cargas_bulk', 'post', '/api/fuel-logs/bulk/', lambda contexto, i: [_carga(contexto) for _ in range(20)]),
+    ('cargas_exportar', 'get', '/api/fuel-logs/exportar/?vehiculo={vehiculo}', None),
+    ('mantenimientos_lista', 'get', '/api/maintenance/mantenimientos/', None),
+    ('mantenimientos_detalle', 'get', '/api/maintenance/mantenimientos/{mantenimiento}/', None),
+    ('mantenimientos_estadisticas', 'get', '/api/maintenance/mantenimientos/estadisticas/?vehiculo={vehiculo}', None),
+    ('mantenimientos_exportar', 'get', '/api/maintenance/mantenimientos/exportar/', None),
+    ('alertas_lista', 'get', '/api/maintenance/alertas/', None),
+    ('alertas_detalle', 'get', '/api/maintenance/alertas/{alerta}/', None),
+    ('alertas_vencidas', 'get', '/api/maintenance/alertas/vencidas/', None),
+    ('sincronizacion', 'get', '/api/sync/?since={desde}', None),
+]
+
+
+def preparar_contexto(usuario, password):
+    """Ids y valores usados para formatear rutas y datos de los escenarios"""
+    carga = CargaCombustible.objects.filter(vehiculo__usuario=usuario).order_by('-fecha').first()
+    if carga is None:
+        raise ValueError(f'El usuario {usuario.username} no tiene cargas de combustible')
+    vehiculo = carga.vehiculo
+    return {
+        'usuario': usuario,
+        'password': password,
+        'vehiculo': vehiculo.pk,
+        'kilometraje': vehiculo.kilometraje_actual,
+        'galones': str((vehiculo.capacidad_tanque / 2).quantize(Decimal('0.01'))),
+        'carga': carga.pk,
+        'mantenimiento': Mantenimiento.objects.filter(vehiculo__usuario=usuario).values_list('pk', flat=True).first(),
+        'alerta': AlertaMantenimiento.objects.filter(vehiculo__usuario=usuario).values_list('pk', flat=True).first(),
+        'desde': codificar_token(timezone.now()),
+    }
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[max(0, math.ceil(p / 100 * len(ordenados)) - 1)]
+
+
+def _ip_cliente(iteracion):
+    # Una IP por iteración: las peticiones simulan clientes distintos y no las frena el límite por IP
+    return f'10.{iteracion // 65536 % 256}.{iteracion // 256 % 256}.{iteracion % 256}'
+
+
+def _peticion(cliente, metodo, ruta, datos, autorizacion=None, iteracion=0):
+    extra = {'REMOTE_ADDR': _ip_cliente(iteracion)}
+    if autorizacion:
+        extra['HTTP_AUTHORIZATION'] = autorizacion
+    if metodo == 'post':
+        response = cliente.post(ruta, datos, content_type='application/json', secure=not settings.DEBUG, **extra)
+    else:
+        response = cliente.get(ruta, secure=not settings.DEBUG, **extra)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def medir_escenario(cliente, escenario, contexto, repeticiones, medir_memoria=True):
+    """Ejecuta el escenario repeticiones veces y retorna sus métricas"""
+    nombre, metodo, ruta, datos = escenario
+    ruta = ruta.format(**contexto)
+    latencias, consultas = [], 0
+
+    # La primera ejecución calienta cachés y no se mide
+    for iteracion in range(repeticiones + 1 + medir_memoria):
+        carga_util = datos(contexto, iteracion) if callable(datos) else datos
+        autorizacion = contexto.pop('autorizacion', None)
+        if medir_memoria and iteracion == repeticiones + 1:
+            tracemalloc.start()
+            response = _peticion(cliente, metodo, ruta, carga_util, autorizacion, iteracion)
+            memoria_kb = tracemalloc.get_traced_memory()[1] // 1024
+            tracemalloc.stop()
+        else:
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                response = _peticion(cliente, metodo, ruta, carga_util, autorizacion, iteracion)
+                duracion = (time.perf_counter() - inicio) * 1000
+            if iteracion:
+                latencias.append(duracion)
+                consultas = max(consultas, len(capturadas))
+        if response.status_code >= 400:
+            raise AssertionError(f'{nombre}: {ruta} respondió {response.status_code} {response.content[:300]!r}')
+
+    resultado = {
+        'p50_ms': round(percentil(latencias, 50), 2),
+        'p95_ms': round(percentil(latencias, 95), 2),
+        'consultas': consultas,
+    }
+    if medir_memoria:
+        resultado['memoria_kb'] = memoria_kb
+    return resultado
+
+
+def ejecutar_benchmark(usuario, password, repeticiones=30, medir_memoria=True, escenarios=None):
+    """
+    Ejecuta los escenarios autenticado como usuario y retorna {nombre: métricas}.
+
+    Todo corre en una transacción que se revierte al final, así el dataset no
+    cambia entre ejecuciones (los escenarios de escritura crean registros).
+    """
+    contexto = preparar_contexto(usuario, password)
+    cliente = Client(
+        HTTP_HOST=settings.ALLOWED_HOSTS[0],
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(usuario)}',
+    )
+    resultados = {}
+    with transaction.atomic():
+        for escenario in ESCENARIOS:
+            if escenarios and escenario[0] not in escenarios:
+                continue
+            resultados[escenario[0]] = medir_escenario(cliente, escenario, contexto, repeticiones, medir_memoria)
+        transaction.set_rollback(True)
+    return resultados
+
+
+def leer_presupuesto(ruta=PRESUPUESTO_POR_DEFECTO):
+    with open(ruta, encoding='utf-8') as archivo:
+        return json.load(archivo)
+
+
+def generar_presupuesto(resultados):
+    """Presupuesto a partir de una medición: consultas exactas, latencia y memoria con holgura"""
+    presupuesto = {}
+    for nombre, metricas in resultados.items():
+        presupuesto[nombre] = {'consultas': metricas['consultas']}
+        presupuesto[nombre]['p95_ms'] = math.ceil(metricas['p95_ms'] * HOLGURA_PRESUPUESTO) + 5
+        if 'memoria_kb' in metricas:
+            presupuesto[nombre]['memoria_kb'] = math.ceil(metricas['memoria_kb'] * HOLGURA_PRESUPUESTO) + 64
+    return presupuesto
+
+
+def comparar_con_presupuesto(resultados, presupuesto, metricas=('consultas', 'p95_ms', 'memoria_kb')):
+    """Retorna una lista de textos con cada métrica que excede su presupuesto"""
+    excesos = []
+    for nombre, medido in resultados.items():
+        limites = presupuesto.get(nombre)
+        if limites is None:
+            excesos.append(f'{nombre}: sin presupuesto')
+            continue
+        for metrica in metricas:
+            if metrica in medido and metrica in limites and medido[metrica] > limites[metrica]:
+                excesos.append(f'{nombre}: {metrica} {medido[metrica]} > {limites[metrica]}')
+    return excesos
+
+
+def medir_login(perfil, repeticiones=20):
+    """
+    Mide el perfil de hash de contraseñas: verificación aislada y login completo.
+
+    Las peticiones se hacen una tras otra en un solo hilo, por lo que
+    logins_por_segundo es la capacidad de un núcleo. Lanza ValueError si falta
+    la librería del algoritmo (argon2-cffi).
+    """
+    password = 'Benchmark-login-123'
+    with override_settings(PASSWORD_HASHERS=hashers_para_perfil(perfil)):
+        codificada = make_password(password)
+        verificaciones = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            check_password(password, codificada)
+            verificaciones.append((time.perf_counter() - inicio) * 1000)
+
+        cliente = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0])
+        latencias = []
+        with transaction.atomic():
+            usuario = User.objects.create_user(f'benchmark_login_{perfil}', password=password)
+            # La primera ejecución calienta cachés y no se mide
+            for iteracion in range(repeticiones + 1):
+                inicio = time.perf_counter()
+                response = _peticion(cliente, 'post', '/api/auth/login/', {'username': usuario.username, 'password': password})
+                duracion = (time.perf_counter() - inicio) * 1000
+                if response.status_code != 200:
+                    raise AssertionError(f'login ({perfil}) respondió {response.status_code} {response.content[:300]!r}')
+                if iteracion:
+                    latencias.append(duracion)
+            transaction.set_rollback(True)
+
+    return {
+        'hash_ms': round(percentil(verificaciones, 50), 2),
+        'p50_ms': round(percentil(latencias, 50), 2),
+        'p95_ms': round(percentil(latencias, 95), 2),
+        'logins_por_segundo': round(1000 * len(latencias) / sum(latencias), 1),
+    }
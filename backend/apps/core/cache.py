@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+from apps.vehicles.models import Vehiculo
+from .metricas import registrar_cache
+
+
+def cache_estadisticas():
+    """Retorna el backend de caché configurado para estadísticas"""
+    return caches[settings.ESTADISTICAS_CACHE]
+
+
+def version_vehiculo(vehiculo_id, usuario):
+    """
+    Retorna la versión del vehículo si pertenece al usuario, o None.
+
+    La versión vive en la base de datos, por lo que todos los workers ven la
+    misma aunque cada uno use su propia caché local.
+    """
+    try:
+        vehiculo_id = int(vehiculo_id)
+    except (TypeError, ValueError):
+        return None
+    return Vehiculo.objects.filter(
+        pk=vehiculo_id, usuario_id=usuario.pk
+    ).values_list('version', flat=True).first()
+
+
+def estadisticas_en_cache(prefijo, request, vehiculo_id, calcular):
+    """
+    Retorna las estadísticas de un vehículo desde la caché o las calcula.
+
+    La clave incluye usuario, vehículo, versión y parámetros de la petición,
+    de modo que cualquier escritura que incremente la versión invalida las
+    entradas anteriores sin tener que borrarlas.
+    """
+    version = version_vehiculo(vehiculo_id, request.user)
+    if version is None:
+        return calcular()
+
+    parametros = urlencode(sorted(request.query_params.items()))
+    clave = f'{prefijo}:{request.user.pk}:{vehiculo_id}:{version}:{parametros}'
+
+    cache = cache_estadisticas()
+    datos = cache.get(clave)
+    registrar_cache(settings.ESTADISTICAS_CACHE, hit=datos is not None)
+    if datos is None:
+        datos = calcular()
+        cache.set(clave, datos)
+    return datos
+
+
+CLAVE_VEHICULOS_PUBLICOS = 'vehiculos_publicos'
+
+# Cantidad de vehículos del endpoint público
+LIMITE_VEHICULOS_PUBLICOS = 10
+
+
+def datos_vehiculos_publicos():
+    """
+    Retorna los datos del endpoint público desde la caché o los calcula.
+
+    Se guardan como máximo VEHICULOS_PUBLICOS_CACHE_SEGUNDOS: las escrituras
+    de Vehiculo borran la entrada del worker que escribe al confirmar (signals)
+    y el resto de workers la renueva al vencer.
+    """
+    datos = cache.get(CLAVE_VEHICULOS_PUBLICOS)
+    registrar_cache('default', hit=datos is not None)
+    if datos is None:
+        tipos = dict(Vehiculo.TIPO_VEHICULO)
+        datos = [
+            {**vehiculo, 'tipo': tipos.get(vehiculo['tipo'], vehiculo['tipo'])}
+            for vehiculo in Vehiculo.objects.values(
+                'id', 'marca', 'modelo', 'año', 'tipo', 'placa'
+            )[:LIMITE_VEHICULOS_PUBLICOS]
+        ]
+        cache.set(CLAVE_VEHICULOS_PUBLICOS, datos, settings.VEHICULOS_PUBLICOS_CACHE_SEGUNDOS)
+    return datos
+
+
+def invalidar_vehiculos_publicos(**kwargs):
+    # Al confirmar: una lectura concurrente antes del commit cachearía datos viejos
+    transaction.on_commit(lambda: cache.delete(CLAVE_VEHICULOS_PUBLICOS))
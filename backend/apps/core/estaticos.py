@@ -0,0 +1,38 @@
+"""
+WhiteNoise compatible con la cadena asíncrona de middlewares.
+
+WhiteNoise 6.6 solo declara soporte síncrono: bajo ASGI un único middleware
+síncrono obliga a Django a correr toda la cadena en el hilo compartido de
+las vistas síncronas, y las vistas de hashing_fuera_del_hilo vuelven a
+bloquear al resto de peticiones. Esta subclase sirve los estáticos igual
+que WhiteNoise y delega el resto sin salir del event loop.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class WhiteNoiseAsincronoMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoiseMiddleware con soporte síncrono y asíncrono"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # Buscar el archivo no hace E/S salvo con autorefresh (solo en DEBUG)
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
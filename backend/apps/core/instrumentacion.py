@@ -0,0 +1,212 @@
+"""
+Instrumentación opcional por petición: tiempo total, tiempo y cantidad de
+consultas SQL, consultas duplicadas y tiempo de serialización (en las
+vistas con apps.core.mixins.MedirSerializacionMixin).
+
+Las métricas se envían en el encabezado Server-Timing y como una línea JSON
+en el logger 'apps.core.instrumentacion'. Las peticiones que superan
+INSTRUMENTACION_LENTA_MS se registran (muestreadas) en
+'apps.core.instrumentacion.lentas' junto con su SQL. Con
+INSTRUMENTACION_ACTIVA=False el middleware se descarta al iniciar.
+
+En las respuestas en streaming (exportaciones) las consultas ocurren al
+consumir el contenido: la medición sigue activa hasta cerrarlo, el log se
+escribe entonces y no se envía Server-Timing porque los encabezados ya salieron.
+"""
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import FileResponse
+
+
+logger = logging.getLogger(__name__)
+logger_lentas = logging.getLogger(f'{__name__}.lentas')
+
+# Sentencias SQL distintas incluidas en el log de peticiones lentas
+MAXIMO_SQL_REPORTADO = 20
+
+_medicion = ContextVar('medicion', default=None)
+
+
+class Medicion:
+    """Métricas acumuladas durante una petición"""
+
+    def __init__(self):
+        self.consultas = []
+        self.serializacion = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        # execute_wrapper de las conexiones
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.consultas.append((sql, str(params), time.perf_counter() - inicio))
+
+    @property
+    def tiempo_db(self):
+        return sum(duracion for _, _, duracion in self.consultas)
+
+    @property
+    def duplicadas(self):
+        """Consultas repetidas con el mismo SQL y parámetros"""
+        return len(self.consultas) - len({(sql, params) for sql, params, _ in self.consultas})
+
+    def sql_mas_costoso(self):
+        tiempos, veces = Counter(), Counter()
+        for sql, _, duracion in self.consultas:
+            tiempos[sql] += duracion
+            veces[sql] += 1
+        return [
+            {'sql': sql, 'veces': veces[sql], 'ms': round(tiempo * 1000, 2)}
+            for sql, tiempo in tiempos.most_common(MAXIMO_SQL_REPORTADO)
+        ]
+
+
+def medir_al_consumir(response, contexto, al_cerrar):
+    """
+    Si la respuesta genera su contenido al consumirlo (StreamingHttpResponse,
+    no archivos), lo envuelve para que contexto() siga activo mientras se
+    itera y al_cerrar() se llame al terminar o cerrar. Retorna True si la
+    envolvió; False si la medición puede cerrarse ya.
+    """
+    if not response.streaming or isinstance(response, FileResponse):
+        return False
+
+    contenido = response.streaming_content
+    if response.is_async:
+        async def envoltura():
+            try:
+                with contexto():
+                    async for parte in contenido:
+                        yield parte
+            finally:
+                al_cerrar()
+    else:
+        def envoltura():
+            try:
+                with contexto():
+                    yield from contenido
+            finally:
+                al_cerrar()
+
+    response.streaming_content = envoltura()
+    return True
+
+
+class SerializerMedido:
+    """Delega en el serializer y suma a la medición el tiempo de .data"""
+
+    def __init__(self, serializer, medicion):
+        self._serializer = serializer
+        self._medicion = medicion
+
+    def __getattr__(self, nombre):
+        return getattr(self._serializer, nombre)
+
+    @property
+    def data(self):
+        inicio = time.perf_counter()
+        try:
+            return self._serializer.data
+        finally:
+            self._medicion.serializacion += time.perf_counter() - inicio
+
+
+def medir_serializacion(serializer):
+    """Retorna el serializer medido si la petición está instrumentada"""
+    medicion = _medicion.get()
+    if medicion is None:
+        return serializer
+    return SerializerMedido(serializer, medicion)
+
+
+class InstrumentacionMiddleware:
+    """Mide cada petición y publica Server-Timing, log estructurado y log de lentas"""
+
+    # Bajo ASGI no fuerza a Django a correr la cadena en el hilo compartido
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.INSTRUMENTACION_ACTIVA:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with self.medir_consultas(medicion):
+                response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.publicar(request, response, medicion, inicio)
+
+    async def __acall__(self, request):
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        inicio = time.perf_counter()
+        try:
+            with self.medir_consultas(medicion):
+                response = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.publicar(request, response, medicion, inicio)
+
+    @staticmethod
+    def medir_consultas(medicion):
+        stack = ExitStack()
+        for conexion in connections.all():
+            stack.enter_context(conexion.execute_wrapper(medicion))
+        return stack
+
+    def publicar(self, request, response, medicion, inicio):
+        if medir_al_consumir(
+            response, lambda: self.medir_consultas(medicion), lambda: self.registrar(request, response, medicion, inicio)
+        ):
+            return response
+
+        total = self.registrar(request, response, medicion, inicio)
+        response['Server-Timing'] = ', '.join([
+            f'total;dur={total * 1000:.1f}',
+            f'db;dur={medicion.tiempo_db * 1000:.1f};desc="{len(medicion.consultas)} consultas/'
+            f'{medicion.duplicadas} duplicadas"',
+            f'serializer;dur={medicion.serializacion * 1000:.1f}',
+        ])
+        return response
+
+    @staticmethod
+    def registrar(request, response, medicion, inicio):
+        """Escribe el log de la petición (y el de lentas) y retorna su duración total"""
+        total = time.perf_counter() - inicio
+        registro = {
+            'metodo': request.method,
+            'ruta': request.path,
+            'estado': response.status_code,
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(medicion.tiempo_db * 1000, 2),
+            'consultas': len(medicion.consultas),
+            'duplicadas': medicion.duplicadas,
+            'serializer_ms': round(medicion.serializacion * 1000, 2),
+        }
+        logger.info(json.dumps(registro))
+
+        if total * 1000 >= settings.INSTRUMENTACION_LENTA_MS and random.random() < settings.INSTRUMENTACION_MUESTREO_LENTAS:
+            logger_lentas.warning(json.dumps({**registro, 'sql': medicion.sql_mas_costoso()}))
+
+        return total
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.core.models import Eliminacion
+from apps.core.sincronizacion import retencion_eliminaciones
+
+
+class Command(BaseCommand):
+    help = 'Borra los registros de eliminación más antiguos que SYNC_RETENCION_DIAS'
+
+    def handle(self, *args, **options):
+        borrados = Eliminacion.objects.purgar(timezone.now() - retencion_eliminaciones())
+        self.stdout.write(self.style.SUCCESS(f'✅ {borrados} registro(s) de eliminación purgado(s)'))
@@ -0,0 +1,163 @@
+"""
+Métricas en formato Prometheus expuestas en /metrics.
+
+Con gunicorn cada worker es un proceso distinto: si PROMETHEUS_MULTIPROC_DIR
+está definida, prometheus_client guarda los valores en archivos de ese
+directorio y la vista los agrega entre todos los workers (ver
+gunicorn.conf.py y startup.sh). Sin la variable se usa el registro del
+proceso, suficiente para desarrollo.
+"""
+import hmac
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import Http404, HttpResponse
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+from .instrumentacion import medir_al_consumir
+
+
+PETICIONES = Counter(
+    'kmtracker_http_requests_total', 'Peticiones HTTP por vista/acción, método y estado',
+    ['vista', 'metodo', 'estado'],
+)
+LATENCIA = Histogram(
+    'kmtracker_http_request_duration_seconds', 'Duración de las peticiones HTTP por vista/acción',
+    ['vista', 'metodo'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CONSULTAS_POR_PETICION = Histogram(
+    'kmtracker_db_queries_per_request', 'Consultas SQL ejecutadas por petición',
+    ['vista'],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+DURACION_CONSULTA = Histogram(
+    'kmtracker_db_query_duration_seconds', 'Duración de cada consulta SQL',
+    ['base'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+FALLOS_AUTENTICACION = Counter(
+    'kmtracker_jwt_auth_failures_total', 'Tokens JWT rechazados por código de error',
+    ['codigo'],
+)
+CACHE = Counter(
+    'kmtracker_cache_requests_total', 'Lecturas de caché por resultado (hit/miss)',
+    ['cache', 'resultado'],
+)
+WORKER_ACTIVO = Gauge(
+    'kmtracker_worker_up', 'Workers vivos (suma entre procesos)',
+    multiprocess_mode='livesum',
+)
+WORKER_INICIO = Gauge(
+    'kmtracker_worker_start_time_seconds', 'Inicio de cada worker (etiqueta pid en multiproceso)',
+    multiprocess_mode='liveall',
+)
+
+# Etiqueta de las rutas que no resuelven a una vista (evita una serie por URL)
+VISTA_DESCONOCIDA = 'desconocida'
+
+
+def registrar_cache(cache, hit):
+    CACHE.labels(cache=cache, resultado='hit' if hit else 'miss').inc()
+
+
+def exportar_metricas(directorio=None):
+    """Texto de exposición de Prometheus, agregado entre procesos si hay directorio multiproceso"""
+    directorio = directorio or os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not directorio:
+        return generate_latest(REGISTRY)
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=directorio)
+    return generate_latest(registry)
+
+
+def vista_metricas(request):
+    """GET /metrics; exige 'Authorization: Bearer <METRICAS_TOKEN>' y sin token solo responde con DEBUG"""
+    if not settings.METRICAS_ACTIVAS:
+        raise Http404()
+    if not settings.METRICAS_TOKEN:
+        # Tráfico por vista, fallos de autenticación y PIDs no se publican sin token en producción
+        if not settings.DEBUG:
+            raise Http404()
+    elif not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {settings.METRICAS_TOKEN}'):
+        return HttpResponse(status=401)
+    return HttpResponse(exportar_metricas(), content_type=CONTENT_TYPE_LATEST)
+
+
+class _ContadorConsultas:
+    """execute_wrapper que cuenta las consultas y observa su duración"""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.total = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.total += 1
+            DURACION_CONSULTA.labels(base=self.alias).observe(time.perf_counter() - inicio)
+
+
+class MetricasMiddleware:
+    """Registra peticiones, latencia y consultas por vista/acción (nombre de la ruta)"""
+
+    # Bajo ASGI no fuerza a Django a correr la cadena en el hilo compartido
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICAS_ACTIVAS:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        WORKER_ACTIVO.set(1)
+        WORKER_INICIO.set_to_current_time()
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        contadores = [_ContadorConsultas(conexion.alias) for conexion in connections.all()]
+        inicio = time.perf_counter()
+        with self.contar_consultas(contadores):
+            response = self.get_response(request)
+        return self.registrar(request, response, contadores, inicio)
+
+    async def __acall__(self, request):
+        contadores = [_ContadorConsultas(conexion.alias) for conexion in connections.all()]
+        inicio = time.perf_counter()
+        with self.contar_consultas(contadores):
+            response = await self.get_response(request)
+        return self.registrar(request, response, contadores, inicio)
+
+    @staticmethod
+    def contar_consultas(contadores):
+        stack = ExitStack()
+        for conexion, contador in zip(connections.all(), contadores):
+            stack.enter_context(conexion.execute_wrapper(contador))
+        return stack
+
+    def registrar(self, request, response, contadores, inicio):
+        # En streaming (exportaciones) las consultas ocurren al consumir el contenido
+        if not medir_al_consumir(
+            response, lambda: self.contar_consultas(contadores), lambda: self.observar(request, response, contadores, inicio)
+        ):
+            self.observar(request, response, contadores, inicio)
+        return response
+
+    @staticmethod
+    def observar(request, response, contadores, inicio):
+        duracion = time.perf_counter() - inicio
+        coincidencia = request.resolver_match
+        vista = coincidencia.view_name if coincidencia and coincidencia.view_name else VISTA_DESCONOCIDA
+        PETICIONES.labels(vista=vista, metodo=request.method, estado=response.status_code).inc()
+        LATENCIA.labels(vista=vista, metodo=request.method).observe(duracion)
+        CONSULTAS_POR_PETICION.labels(vista=vista).observe(sum(contador.total for contador in contadores))
@@ -0,0 +1,211 @@
+import csv
+import hashlib
+from datetime import datetime, time
+
+from django.db.models import Count, Max, Subquery, Sum
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from apps.vehicles.models import Vehiculo
+from .instrumentacion import medir_serializacion
+from .models import Eliminacion
+from .transferencia import FORMATOS, abrir_texto, detectar_formato, exportar_filas, importar_en_lotes, leer_filas
+
+
+class OptimizarRelacionesMixin:
+    """
+    Aplica select_related/only() según las relaciones que declara el serializer.
+
+    El serializer define un atributo `relaciones` con la forma
+    {'relacion': ('campo', ...)}; el viewset hace JOIN con cada relación y,
+    en peticiones de lectura, limita las columnas de la tabla relacionada a
+    los campos declarados.
+    """
+
+    def filter_queryset(self, queryset):
+        return self.optimizar_relaciones(super().filter_queryset(queryset))
+
+    def optimizar_relaciones(self, queryset):
+        """Aplica las relaciones declaradas por el serializer al queryset"""
+        relaciones = getattr(self.get_serializer_class(), 'relaciones', None)
+        if not relaciones:
+            return queryset
+
+        queryset = queryset.select_related(*relaciones)
+
+        if self.request.method in SAFE_METHODS:
+            campos = [campo.name for campo in queryset.model._meta.concrete_fields]
+            for relacion, campos_relacion in relaciones.items():
+                campos += [f'{relacion}__{campo}' for campo in campos_relacion]
+            queryset = queryset.only(*campos)
+
+        return queryset
+
+
+class MedirSerializacionMixin:
+    """
+    Mide el tiempo de serializer.data para InstrumentacionMiddleware.
+
+    Sin instrumentación activa get_serializer() retorna el serializer sin
+    envolver.
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        return medir_serializacion(super().get_serializer(*args, **kwargs))
+
+
+class TransferenciaMixin:
+    """
+    Agrega las acciones importar/exportar en CSV o NDJSON.
+
+    El serializer define `columnas_transferencia` con las columnas del archivo;
+    la importación usa su list_serializer_class para insertar por lotes.
+    """
+
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """Importa un archivo CSV/NDJSON enviado en el campo "archivo" """
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            return Response(
+                {'error': 'Se requiere un archivo en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            formato = detectar_formato(archivo.name, request.data.get('formato'))
+        except ValueError as error:
+            return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            resultado = importar_en_lotes(
+                leer_filas(abrir_texto(archivo), formato),
+                self.get_serializer_class(),
+                usuario=request.user
+            )
+        except (UnicodeDecodeError, csv.Error) as error:
+            return Response(
+                {'error': f'No se pudo leer el archivo: {error}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if resultado['total_errores'] and not resultado['creadas']:
+            return Response(resultado, status=status.HTTP_400_BAD_REQUEST)
+        return Response(resultado, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """Exporta en streaming los registros del usuario (parámetro formato=csv|ndjson)"""
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            return Response(
+                {'error': 'El formato debe ser "csv" o "ndjson"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        response = StreamingHttpResponse(
+            exportar_filas(self.get_queryset(), self.get_serializer_class().columnas_transferencia, formato),
+            content_type=FORMATOS[formato]
+        )
+        response['Content-Disposition'] = f'attachment; filename="{self.basename}.{formato}"'
+        return response
+
+
+class NoModificado(Exception):
+    """Interrumpe la vista con la respuesta 304 ya construida"""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class GetCondicionalMixin:
+    """
+    Responde 304 a If-None-Match/If-Modified-Since antes de consultar o
+    serializar nada.
+
+    El validador sale de una sola consulta indexada sobre los vehículos del
+    usuario (o del vehículo del parámetro 'vehiculo'): cantidad, suma de
+    versiones y última fecha_actualizacion, junto con la última eliminación
+    registrada. Toda escritura de cargas, mantenimientos o alertas incrementa
+    la versión del vehículo, por lo que cualquier cambio altera el ETag.
+    """
+
+    # Las vistas cuyo contenido depende de la fecha actual (ej. alertas
+    # vencidas) cambian de validador cada día
+    validador_diario = False
+
+    def vehiculo_validador(self):
+        """Id del vehículo al que se limita el validador, o None para todos"""
+        try:
+            return int(self.request.query_params.get('vehiculo'))
+        except (TypeError, ValueError):
+            return None
+
+    def validadores_condicionales(self, request):
+        """Retorna (etag, last_modified) de la petición"""
+        usuario = request.user
+        vehiculos = Vehiculo.objects.filter(usuario_id=usuario.pk)
+        vehiculo_id = self.vehiculo_validador()
+        if vehiculo_id is not None:
+            vehiculos = vehiculos.filter(pk=vehiculo_id)
+
+        ultima_eliminacion = Eliminacion.objects.filter(usuario_id=usuario.pk).order_by('-fecha').values('fecha')[:1]
+        estado = vehiculos.aggregate(
+            total=Count('id'),
+            version=Sum('version'),
+            modificado=Max('fecha_actualizacion'),
+            eliminado=Max(Subquery(ultima_eliminacion)),
+        )
+
+        fechas = [fecha for fecha in (estado['modificado'], estado['eliminado']) if fecha]
+        dia = None
+        if self.validador_diario:
+            dia = timezone.localdate()
+            fechas.append(timezone.make_aware(datetime.combine(dia, time.min)))
+
+        valor = ':'.join(str(parte) for parte in (
+            usuario.pk, estado['total'], estado['version'], estado['modificado'],
+            estado['eliminado'], dia, request.accepted_media_type,
+        ))
+        etag = '"%s"' % hashlib.md5(valor.encode()).hexdigest()
+        return etag, int(max(fechas).timestamp()) if fechas else None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validadores = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+
+        self.validadores = self.validadores_condicionales(request)
+        etag, last_modified = self.validadores
+        response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is not None:
+            raise NoModificado(self.agregar_validadores(response))
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NoModificado):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'validadores', None) and response.status_code == 200:
+            self.agregar_validadores(response)
+        return response
+
+    def agregar_validadores(self, response):
+        etag, last_modified = self.validadores
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # El cliente debe revalidar siempre; la respuesta depende del usuario
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['Authorization'])
+        return response
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.db import models
+
+
+class EliminacionQuerySet(models.QuerySet):
+    """QuerySet con utilidades para Eliminacion"""
+
+    def purgar(self, antes_de):
+        """Borra los registros anteriores a la fecha indicada y retorna cuántos eran"""
+        return self.filter(fecha__lt=antes_de).delete()[0]
+
+
+class Eliminacion(models.Model):
+    """Registro de un borrado (tombstone) para la sincronización incremental"""
+
+    MODELOS = [
+        ('vehiculos', 'Vehículos'),
+        ('cargas', 'Cargas de combustible'),
+        ('mantenimientos', 'Mantenimientos'),
+        ('alertas', 'Alertas de mantenimiento'),
+    ]
+
+    # Sin restricción de clave foránea: al borrar un usuario se registran
+    # los borrados en cascada de sus vehículos antes de borrar el usuario
+    usuario = models.ForeignKey(
+        User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='+'
+    )
+    modelo = models.CharField(max_length=20, choices=MODELOS)
+    objeto_id = models.BigIntegerField()
+    fecha = models.DateTimeField(auto_now_add=True)
+
+    objects = EliminacionQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Eliminación'
+        verbose_name_plural = 'Eliminaciones'
+        indexes = [
+            models.Index(fields=['usuario', 'fecha'], name='eliminacion_usuario_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_modelo_display()} #{self.objeto_id}"
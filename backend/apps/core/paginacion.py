@@ -0,0 +1,96 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por cursor sobre (campo, id) en orden descendente.
+
+    Cada página filtra con WHERE (campo, id) < (último campo, último id) en
+    lugar de OFFSET y no ejecuta COUNT(*), por lo que su costo no crece al
+    avanzar. Solo entrega el enlace 'next' (scroll infinito). Un parámetro
+    ordering distinto de -campo se rechaza con 400 en vez de ignorarse.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    campo = 'fecha'
+    mensaje_cursor_invalido = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        campo = getattr(view, 'campo_cursor', self.campo)
+
+        ordering = request.query_params.get(api_settings.ORDERING_PARAM, '').replace(' ', '')
+        if ordering and ordering not in (f'-{campo}', f'-{campo},-id'):
+            raise ParseError(f'Con cursor el orden es -{campo}; omitir "{api_settings.ORDERING_PARAM}" o usar page')
+
+        queryset = queryset.order_by(f'-{campo}', '-id')
+        posicion = self.decodificar_cursor(request.query_params.get(self.cursor_query_param), queryset.model, campo)
+        if posicion is not None:
+            valor, pk = posicion
+            queryset = queryset.filter(Q(**{f'{campo}__lt': valor}) | Q(**{campo: valor, 'id__lt': pk}))
+
+        # Una fila extra indica si existe página siguiente
+        filas = list(queryset[:self.page_size + 1])
+        self.siguiente = None
+        if len(filas) > self.page_size:
+            filas = filas[:self.page_size]
+            self.siguiente = self.codificar_cursor(getattr(filas[-1], campo), filas[-1].pk)
+        return filas
+
+    def codificar_cursor(self, valor, pk):
+        datos = json.dumps({'v': valor.isoformat(), 'id': pk}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(datos.encode()).decode()
+
+    def decodificar_cursor(self, cursor, model, campo):
+        """Retorna (valor, id) del cursor, o None para la primera página"""
+        if not cursor:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return model._meta.get_field(campo).to_python(datos['v']), int(datos['id'])
+        except (binascii.Error, ValueError, TypeError, KeyError, ValidationError):
+            raise NotFound(self.mensaje_cursor_invalido)
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, self.siguiente)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': None,
+            'results': data,
+        })
+
+
+class PaginacionConCursorOpcional(PageNumberPagination):
+    """
+    Paginación por número de página; si la petición incluye el parámetro
+    'cursor' (vacío para la primera página) usa PaginacionKeyset.
+
+    Los clientes existentes siguen recibiendo count/next/previous como antes.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if PaginacionKeyset.cursor_query_param in request.query_params:
+            self.keyset = PaginacionKeyset()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
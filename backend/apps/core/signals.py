@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete
+
+from apps.vehicles.eliminacion import vehiculos_en_eliminacion
+from apps.vehicles.models import Vehiculo
+from .models import Eliminacion
+from .sincronizacion import MODELOS_SINCRONIZADOS
+
+
+NOMBRES_POR_MODELO = {modelo: nombre for nombre, (modelo, _) in MODELOS_SINCRONIZADOS.items()}
+
+
+def registrar_eliminacion(sender, instance, **kwargs):
+    """Guarda el tombstone del registro borrado para la sincronización incremental"""
+    modelo = NOMBRES_POR_MODELO[sender]
+    if sender is Vehiculo:
+        # Junto con los tombstones acumulados de sus filas borradas en cascada
+        usuario_id, pendientes = vehiculos_en_eliminacion().pop(instance.pk, (instance.usuario_id, []))
+        Eliminacion.objects.bulk_create(
+            pendientes + [Eliminacion(usuario_id=usuario_id, modelo=modelo, objeto_id=instance.pk)]
+        )
+        return
+
+    eliminacion = vehiculos_en_eliminacion().get(instance.vehiculo_id)
+    if eliminacion is not None:
+        usuario_id, pendientes = eliminacion
+        pendientes.append(Eliminacion(usuario_id=usuario_id, modelo=modelo, objeto_id=instance.pk))
+        return
+
+    if sender._meta.get_field('vehiculo').is_cached(instance):
+        usuario_id = instance.vehiculo.usuario_id
+    else:
+        usuario_id = Vehiculo.objects.filter(
+            pk=instance.vehiculo_id
+        ).values_list('usuario_id', flat=True).first()
+
+    if usuario_id is not None:
+        Eliminacion.objects.create(usuario_id=usuario_id, modelo=modelo, objeto_id=instance.pk)
+
+
+for modelo in NOMBRES_POR_MODELO:
+    post_delete.connect(registrar_eliminacion, sender=modelo, dispatch_uid=f'eliminacion_{modelo._meta.label_lower}')
@@ -0,0 +1,117 @@
+"""
+Sincronización incremental para la app móvil.
+
+El token es el instante (en microsegundos desde epoch) en que se generó la
+respuesta anterior. Se devuelven las filas con fecha_actualizacion posterior
+al token menos un margen, para no perder escrituras de transacciones que
+seguían abiertas; el cliente aplica los cambios de forma idempotente.
+
+Los campos derivados cambian sin escribir la fila que los muestra: el
+rendimiento de una carga depende de la anterior (las señales marcan la carga
+siguiente) y esta_vencida de una alerta depende del kilometraje del vehículo
+y de la fecha actual (ver condicion_cambios).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.fuel_logs.models import CargaCombustible, asignar_rendimiento
+from apps.fuel_logs.serializers import CargaCombustibleSerializer
+from apps.maintenance.models import AlertaMantenimiento, Mantenimiento
+from apps.maintenance.serializers import AlertaMantenimientoSerializer, MantenimientoSerializer
+from apps.vehicles.models import Vehiculo
+from apps.vehicles.serializers import VehiculoSerializer
+from .models import Eliminacion
+
+
+# Modelos sincronizados: nombre en la respuesta -> (modelo, serializer)
+MODELOS_SINCRONIZADOS = {
+    'vehiculos': (Vehiculo, VehiculoSerializer),
+    'cargas': (CargaCombustible, CargaCombustibleSerializer),
+    'mantenimientos': (Mantenimiento, MantenimientoSerializer),
+    'alertas': (AlertaMantenimiento, AlertaMantenimientoSerializer),
+}
+
+# Margen hacia atrás aplicado al token
+MARGEN_SINCRONIZACION = timedelta(seconds=60)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def codificar_token(momento):
+    return str((momento - EPOCH) // timedelta(microseconds=1))
+
+
+def decodificar_token(token):
+    """Retorna el datetime del token; ValueError si es inválido"""
+    try:
+        return EPOCH + timedelta(microseconds=int(token))
+    except OverflowError:
+        raise ValueError('Token fuera de rango')
+
+
+def retencion_eliminaciones():
+    return timedelta(days=settings.SYNC_RETENCION_DIAS)
+
+
+def registros_del_usuario(nombre, usuario):
+    """QuerySet de los registros del usuario para un modelo sincronizado"""
+    modelo, _ = MODELOS_SINCRONIZADOS[nombre]
+    if modelo is Vehiculo:
+        return Vehiculo.objects.filter(usuario=usuario)
+    if modelo is AlertaMantenimiento:
+        return AlertaMantenimiento.objects.con_estado().filter(vehiculo__usuario=usuario)
+    return modelo.objects.filter(vehiculo__usuario=usuario)
+
+
+def condicion_cambios(nombre, limite, ahora):
+    """
+    Filtro de las filas a reenviar desde limite. Además de las modificadas,
+    incluye las alertas de vehículos modificados (el kilometraje y cada
+    escritura de sus registros actualizan fecha_actualizacion del vehículo)
+    y las que pudieron vencer por fecha desde el día de limite.
+    """
+    condicion = Q(fecha_actualizacion__gte=limite)
+    if nombre == 'alertas':
+        condicion |= Q(vehiculo__fecha_actualizacion__gte=limite) | Q(
+            fecha_objetivo__gte=timezone.localdate(limite), fecha_objetivo__lt=timezone.localdate(ahora)
+        )
+    return condicion
+
+
+def cambios_desde(usuario, desde=None, context=None):
+    """
+    Retorna los registros creados o modificados y los ids borrados desde el
+    instante indicado. Sin instante, o si es anterior a la retención de
+    eliminaciones, retorna todos los registros con completo=True para que el
+    cliente reemplace sus datos locales.
+    """
+    ahora = timezone.now()
+    completo = desde is None or desde < ahora - retencion_eliminaciones()
+    limite = None if completo else desde - MARGEN_SINCRONIZACION
+
+    datos = {'token': codificar_token(ahora), 'completo': completo}
+
+    for nombre, (_, serializer_class) in MODELOS_SINCRONIZADOS.items():
+        queryset = registros_del_usuario(nombre, usuario).select_related(
+            *getattr(serializer_class, 'relaciones', ())
+        ).order_by('id')
+        if limite is not None:
+            queryset = queryset.filter(condicion_cambios(nombre, limite, ahora))
+
+        registros = list(queryset)
+        if nombre == 'cargas':
+            asignar_rendimiento(registros)
+        datos[nombre] = serializer_class(registros, many=True, context=context).data
+
+    datos['eliminados'] = {nombre: [] for nombre in MODELOS_SINCRONIZADOS}
+    if limite is not None:
+        eliminaciones = Eliminacion.objects.filter(
+            usuario=usuario, fecha__gte=limite
+        ).order_by('id').values_list('modelo', 'objeto_id')
+        for nombre, objeto_id in eliminaciones:
+            datos['eliminados'][nombre].append(objeto_id)
+
+    return datos
@@ -0,0 +1,815 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APITestCase
+
+from apps.core.benchmark import ESCENARIOS, comparar_con_presupuesto, ejecutar_benchmark, leer_presupuesto
+from apps.core.cache import cache_estadisticas
+from apps.core.instrumentacion import Medicion, medir_serializacion
+from apps.core.metricas import exportar_metricas
+from apps.core.models import Eliminacion
+from apps.core.sincronizacion import codificar_token
+from apps.core.transferencia import exportar_filas, importar_en_lotes, leer_filas
+from apps.fuel_logs.models import CargaCombustible
+from apps.maintenance.models import AlertaMantenimiento, Mantenimiento
+from apps.maintenance.serializers import MantenimientoSerializer
+from apps.vehicles.models import Vehiculo
+
+
+def endpoints_de_listado():
+    """Retorna las URLs de todas las rutas '<basename>-list' registradas"""
+    return sorted(
+        reverse(nombre) for nombre in get_resolver().reverse_dict
+        if isinstance(nombre, str) and nombre.endswith('-list')
+    )
+
+
+class ConsultasPorPaginaTests(APITestCase):
+    """Falla si el número de consultas de un listado crece con el tamaño de página"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+        self.creados = 0
+
+    def poblar(self, cantidad):
+        """Crea `cantidad` vehículos, cada uno con una carga, un mantenimiento y una alerta"""
+        ahora = timezone.now()
+        for _ in range(cantidad):
+            self.creados += 1
+            vehiculo = Vehiculo.objects.create(
+                usuario=self.usuario, marca='KIA', modelo='Sportage', año=2021,
+                placa=f'PBA-{self.creados:04d}', capacidad_tanque=Decimal('15.00'),
+                kilometraje_actual=5000
+            )
+            CargaCombustible.objects.create(
+                vehiculo=vehiculo, fecha=ahora - timedelta(days=self.creados),
+                kilometraje=5000, galones=Decimal('10.00'), precio_galon=Decimal('2.50'),
+                costo_total=Decimal('25.00'), tipo_combustible='EXTRA', tanque_lleno=True
+            )
+            Mantenimiento.objects.create(
+                vehiculo=vehiculo, fecha=ahora - timedelta(days=self.creados),
+                tipo='PREVENTIVO', categoria='MOTOR', descripcion='Cambio de aceite',
+                kilometraje=5000, costo=Decimal('40.00')
+            )
+            AlertaMantenimiento.objects.create(
+                vehiculo=vehiculo, titulo='Revisión', descripcion='Revisión general',
+                kilometraje_objetivo=6000
+            )
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        return len(contexto.captured_queries)
+
+    def test_listados_con_consultas_constantes(self):
+        urls = endpoints_de_listado()
+        self.assertTrue(urls)
+
+        self.poblar(1)
+        una_fila = {url: self.contar_consultas(url) for url in urls}
+        self.poblar(9)
+        pagina_completa = {url: self.contar_consultas(url) for url in urls}
+
+        self.assertEqual(pagina_completa, una_fila)
+
+
+class CacheEstadisticasTests(APITestCase):
+    """Pruebas de la caché de estadísticas versionada por vehículo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='KIA', modelo='Rio', año=2022,
+            placa='PBA-0001', capacidad_tanque=Decimal('12.00'), kilometraje_actual=1000
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+        cache_estadisticas().clear()
+
+    def estadisticas_combustible(self):
+        return self.client.get('/api/fuel-logs/estadisticas/', {'vehiculo': self.vehiculo.id})
+
+    def estadisticas_mantenimiento(self):
+        return self.client.get(
+            '/api/maintenance/mantenimientos/estadisticas/', {'vehiculo': self.vehiculo.id}
+        )
+
+    def crear_carga(self, kilometraje):
+        return self.client.post('/api/fuel-logs/', {
+            'vehiculo': self.vehiculo.id, 'fecha': timezone.now().isoformat(),
+            'kilometraje': kilometraje, 'galones': '10.00', 'precio_galon': '2.50',
+            'tipo_combustible': 'EXTRA', 'tanque_lleno': True,
+        })
+
+    def test_respuesta_cacheada_solo_consulta_la_version(self):
+        self.estadisticas_combustible()
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.estadisticas_combustible()
+        self.assertEqual(response.status_code, 200)
+        # Validador de GET condicional + versión del vehículo
+        self.assertEqual(len(contexto.captured_queries), 2)
+
+    def test_crear_y_editar_carga_invalida(self):
+        self.assertEqual(self.estadisticas_combustible().data['total_cargas'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.crear_carga(1200).status_code, 201)
+        self.assertEqual(self.estadisticas_combustible().data['total_cargas'], 1)
+
+        carga = CargaCombustible.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(f'/api/fuel-logs/{carga.id}/', {'galones': '8.00'})
+        self.assertEqual(self.estadisticas_combustible().data['total_galones'], 8.0)
+
+    def test_guardar_y_borrar_mantenimiento_invalida(self):
+        mantenimiento = Mantenimiento.objects.create(
+            vehiculo=self.vehiculo, fecha=timezone.now(), tipo='PREVENTIVO',
+            categoria='MOTOR', descripcion='Aceite', kilometraje=1000, costo=Decimal('40.00')
+        )
+        self.assertEqual(self.estadisticas_mantenimiento().data['total_costo'], 40.0)
+
+        mantenimiento.costo = Decimal('55.00')
+        with self.captureOnCommitCallbacks(execute=True):
+            mantenimiento.save()
+        self.assertEqual(self.estadisticas_mantenimiento().data['total_costo'], 55.0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            mantenimiento.delete()
+        self.assertEqual(self.estadisticas_mantenimiento().data['total_mantenimientos'], 0)
+
+    def test_escritura_incrementa_la_version_una_vez_al_confirmar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Mantenimiento.objects.create(
+                vehiculo=self.vehiculo, fecha=timezone.now(), tipo='PREVENTIVO',
+                categoria='MOTOR', descripcion='Aceite', kilometraje=1000, costo=Decimal('40.00')
+            )
+            self.assertEqual(Vehiculo.objects.get(pk=self.vehiculo.pk).version, self.vehiculo.version)
+        self.assertEqual(Vehiculo.objects.get(pk=self.vehiculo.pk).version, self.vehiculo.version + 1)
+
+    def test_actualizar_kilometraje_incrementa_version(self):
+        version = Vehiculo.objects.get(pk=self.vehiculo.pk).version
+        self.client.post(f'/api/vehicles/{self.vehiculo.id}/actualizar_kilometraje/', {'kilometraje': 1500})
+        self.assertGreater(Vehiculo.objects.get(pk=self.vehiculo.pk).version, version)
+
+    def test_guardar_vehiculo_no_sobrescribe_version(self):
+        # La edición por la API parte de un vehículo leído antes del incremento
+        Vehiculo.objects.filter(pk=self.vehiculo.pk).incrementar_version()
+        response = self.client.patch(f'/api/vehicles/{self.vehiculo.pk}/', {'color': 'Azul'})
+        self.assertEqual(response.status_code, 200)
+        vehiculo = Vehiculo.objects.get(pk=self.vehiculo.pk)
+        self.assertEqual((vehiculo.color, vehiculo.version), ('Azul', self.vehiculo.version + 1))
+
+    def test_no_comparte_cache_entre_usuarios(self):
+        self.estadisticas_combustible()
+        self.crear_carga(1200)
+        self.client.force_authenticate(User.objects.create_user('otro'))
+        self.assertEqual(self.estadisticas_combustible().data['total_cargas'], 0)
+
+
+class TransferenciaTests(APITestCase):
+    """Pruebas de la importación y exportación en streaming"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00'), kilometraje_actual=50000
+        )
+        cls.ajeno = Vehiculo.objects.create(
+            usuario=User.objects.create_user('otro'), marca='Kia', modelo='Rio', año=2021,
+            placa='UIO-5678', capacidad_tanque=Decimal('11.00')
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def filas_csv(self, cantidad, placa='GYE-1234'):
+        lineas = ['placa,fecha,tipo,categoria,descripcion,kilometraje,costo,taller\n']
+        for i in range(cantidad):
+            lineas.append(f'{placa},2024-01-{i % 28 + 1:02d}T10:00:00Z,PREVENTIVO,MOTOR,Cambio {i},{1000 + i},25.50,\n')
+        return lineas
+
+    def test_exportar_csv_en_streaming(self):
+        for i, vehiculo in enumerate((self.vehiculo, self.vehiculo, self.ajeno)):
+            Mantenimiento.objects.create(
+                vehiculo=vehiculo, fecha=timezone.now() - timedelta(days=i), tipo='PREVENTIVO',
+                categoria='MOTOR', descripcion=f'Servicio {i}', kilometraje=1000 * i, costo=Decimal('10.00')
+            )
+        response = self.client.get('/api/maintenance/mantenimientos/exportar/', {'formato': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        lineas = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lineas[0].split(',')[:3], ['vehiculo', 'placa', 'fecha'])
+        self.assertEqual(len(lineas), 3)
+        self.assertTrue(lineas[1].startswith(f'{self.vehiculo.id},GYE-1234,'))
+
+    def test_exportar_por_bloques_keyset(self):
+        fecha = timezone.now()
+        for i, vehiculo in enumerate((self.ajeno, self.vehiculo, self.vehiculo, self.ajeno, self.vehiculo)):
+            # Fechas repetidas: el desempate dentro del bloque es por id
+            Mantenimiento.objects.create(
+                vehiculo=vehiculo, fecha=fecha - timedelta(days=i % 2), tipo='PREVENTIVO',
+                categoria='MOTOR', descripcion=f'Servicio {i}', kilometraje=1000, costo=Decimal('10.00')
+            )
+        esperadas = list(
+            Mantenimiento.objects.order_by('vehiculo_id', 'fecha', 'id').values_list('descripcion', flat=True)
+        )
+        # Un SELECT con LIMIT por bloque de 2 filas
+        with self.assertNumQueries(3):
+            contenido = ''.join(exportar_filas(Mantenimiento.objects.all(), ['descripcion'], 'ndjson', chunk_size=2))
+        self.assertEqual([json.loads(linea)['descripcion'] for linea in contenido.splitlines()], esperadas)
+
+    def test_exportar_e_importar_ndjson(self):
+        CargaCombustible.objects.create(
+            vehiculo=self.vehiculo, fecha=timezone.now(), kilometraje=1000, galones=Decimal('10.00'),
+            precio_galon=Decimal('2.50'), costo_total=Decimal('25.00'), tipo_combustible='EXTRA', tanque_lleno=True
+        )
+        response = self.client.get('/api/fuel-logs/exportar/', {'formato': 'ndjson'})
+        contenido = b''.join(response.streaming_content)
+        self.assertEqual(json.loads(contenido)['tanque_lleno'], True)
+
+        response = self.client.post('/api/fuel-logs/importar/', {
+            'archivo': SimpleUploadedFile('cargas.ndjson', contenido + b'{no es json\n'),
+        }, format='multipart')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 1)
+        self.assertEqual(response.data['errores'][0]['fila'], 2)
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.resumen.total_cargas, 2)
+        self.assertEqual(self.vehiculo.kilometraje_actual, 50000)
+
+    def test_importar_csv_reporta_filas_invalidas(self):
+        lineas = self.filas_csv(3) + self.filas_csv(1, placa='UIO-5678')[1:]
+        lineas[2] = lineas[2].replace('25.50', '-1')
+        response = self.client.post('/api/maintenance/mantenimientos/importar/', {
+            'archivo': SimpleUploadedFile('historial.csv', ''.join(lineas).encode()),
+        }, format='multipart')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 2)
+        self.assertEqual([error['fila'] for error in response.data['errores']], [2, 4])
+        self.assertIn('costo', response.data['errores'][0]['errores'])
+        self.assertIn('vehiculo', response.data['errores'][1]['errores'])
+        self.assertFalse(Mantenimiento.objects.filter(vehiculo=self.ajeno).exists())
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.resumen.total_mantenimientos, 2)
+
+    def test_consultas_por_lote_constantes(self):
+        def consultas(cantidad):
+            with CaptureQueriesContext(connection) as contexto:
+                resultado = importar_en_lotes(leer_filas(self.filas_csv(cantidad), 'csv'), MantenimientoSerializer, batch_size=100)
+            self.assertEqual(resultado['creadas'], cantidad)
+            return len(contexto.captured_queries)
+
+        self.assertEqual(consultas(5), consultas(60))
+
+    def test_comando_reanuda_desde_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            archivo = os.path.join(directorio, 'historial.csv')
+            checkpoint = os.path.join(directorio, 'avance.json')
+            with open(archivo, 'w') as salida:
+                salida.writelines(self.filas_csv(5))
+            with open(checkpoint, 'w') as salida:
+                json.dump({'archivo': archivo, 'modelo': 'mantenimientos', 'filas': 3}, salida)
+
+            call_command(
+                'import_historial', archivo, modelo='mantenimientos', batch_size=1,
+                checkpoint=checkpoint, stdout=StringIO()
+            )
+
+            self.assertFalse(os.path.exists(checkpoint))
+        self.assertEqual(
+            list(Mantenimiento.objects.order_by('kilometraje').values_list('descripcion', flat=True)),
+            ['Cambio 3', 'Cambio 4']
+        )
+
+    def test_comando_exporta_a_archivo(self):
+        Mantenimiento.objects.create(
+            vehiculo=self.vehiculo, fecha=timezone.now(), tipo='PREVENTIVO', categoria='MOTOR',
+            descripcion='Servicio', kilometraje=1000, costo=Decimal('10.00')
+        )
+        salida = StringIO()
+        call_command('export_historial', modelo='mantenimientos', formato='ndjson', usuario='flota', stdout=salida)
+        self.assertEqual(json.loads(salida.getvalue())['descripcion'], 'Servicio')
+
+
+class PaginacionKeysetTests(APITestCase):
+    """Pruebas de la paginación opcional por cursor"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00')
+        )
+        base = timezone.now()
+        for i in range(25):
+            # Pares de registros con la misma fecha para ejercitar el desempate por id
+            fecha = base - timedelta(days=i // 2)
+            CargaCombustible.objects.create(
+                vehiculo=cls.vehiculo, fecha=fecha, kilometraje=10000 - i * 100 + i % 2 * 200,
+                galones=Decimal('10.00'), precio_galon=Decimal('2.50'),
+                costo_total=Decimal('25.00'), tipo_combustible='EXTRA', tanque_lleno=True
+            )
+            Mantenimiento.objects.create(
+                vehiculo=cls.vehiculo, fecha=fecha, tipo='PREVENTIVO', categoria='MOTOR',
+                descripcion='Servicio', kilometraje=1000, costo=Decimal('10.00')
+            )
+            AlertaMantenimiento.objects.create(
+                vehiculo=cls.vehiculo, titulo=f'Alerta {i}', descripcion='Revisar', kilometraje_objetivo=20000
+            )
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def recorrer(self, url):
+        """Sigue los enlaces 'next' desde la primera página por cursor"""
+        paginas = []
+        response = self.client.get(url, {'cursor': ''})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            paginas.append(response.data['results'])
+            if not response.data['next']:
+                return paginas
+            response = self.client.get(response.data['next'])
+
+    def test_recorre_todos_los_registros_en_orden(self):
+        endpoints = (
+            ('/api/fuel-logs/', CargaCombustible.objects.order_by('-fecha', '-id')),
+            ('/api/maintenance/mantenimientos/', Mantenimiento.objects.order_by('-fecha', '-id')),
+            ('/api/maintenance/alertas/', AlertaMantenimiento.objects.order_by('-fecha_creacion', '-id')),
+        )
+        for url, esperados in endpoints:
+            with self.subTest(url=url):
+                paginas = self.recorrer(url)
+                self.assertEqual([len(pagina) for pagina in paginas], [10, 10, 5])
+                ids = [fila['id'] for pagina in paginas for fila in pagina]
+                self.assertEqual(ids, list(esperados.values_list('id', flat=True)))
+
+    def test_rendimiento_igual_que_calculo_por_fila(self):
+        filas = [fila for pagina in self.recorrer('/api/fuel-logs/') for fila in pagina]
+        esperados = {carga.id: carga.rendimiento for carga in CargaCombustible.objects.all()}
+        self.assertEqual([fila['rendimiento'] for fila in filas], [esperados[fila['id']] for fila in filas])
+        self.assertIn(10.0, esperados.values())
+
+    def test_consultas_constantes_en_paginas_profundas(self):
+        primera = self.client.get('/api/fuel-logs/', {'cursor': ''})
+        with CaptureQueriesContext(connection) as inicial:
+            self.client.get('/api/fuel-logs/', {'cursor': ''})
+        with CaptureQueriesContext(connection) as profunda:
+            self.client.get(primera.data['next'])
+        self.assertEqual(len(inicial.captured_queries), len(profunda.captured_queries))
+        self.assertFalse(any(
+            'COUNT' in consulta['sql'] and 'fuel_logs_cargacombustible' in consulta['sql']
+            for consulta in profunda.captured_queries
+        ))
+
+    def test_sin_cursor_mantiene_paginacion_por_numero(self):
+        response = self.client.get('/api/fuel-logs/')
+        self.assertEqual(response.data['count'], 25)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/fuel-logs/', {'cursor': 'no-es-un-cursor'}).status_code, 404)
+
+    def test_cursor_rechaza_otro_orden(self):
+        url = '/api/maintenance/mantenimientos/'
+        self.assertEqual(self.client.get(url, {'cursor': '', 'ordering': 'costo'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': '', 'ordering': '-fecha'}).status_code, 200)
+        self.assertEqual(self.client.get(url, {'ordering': 'costo'}).status_code, 200)
+
+
+class SincronizacionTests(APITestCase):
+    """Pruebas de la sincronización incremental /api/sync/"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00')
+        )
+        cls.carga = CargaCombustible.objects.create(
+            vehiculo=cls.vehiculo, fecha=timezone.now(), kilometraje=1000, galones=Decimal('10.00'),
+            precio_galon=Decimal('2.50'), costo_total=Decimal('25.00'), tipo_combustible='EXTRA'
+        )
+        cls.mantenimiento = Mantenimiento.objects.create(
+            vehiculo=cls.vehiculo, fecha=timezone.now(), tipo='PREVENTIVO', categoria='MOTOR',
+            descripcion='Servicio', kilometraje=1000, costo=Decimal('10.00')
+        )
+        cls.alerta = AlertaMantenimiento.objects.create(
+            vehiculo=cls.vehiculo, titulo='Aceite', descripcion='Cambio', kilometraje_objetivo=5000
+        )
+        Vehiculo.objects.create(
+            usuario=User.objects.create_user('otro'), marca='Kia', modelo='Rio', año=2021,
+            placa='UIO-5678', capacidad_tanque=Decimal('11.00')
+        )
+
+        # Todo lo anterior quedó sincronizado hace dos horas
+        hace_dos_horas = timezone.now() - timedelta(hours=2)
+        for modelo in (Vehiculo, CargaCombustible, Mantenimiento, AlertaMantenimiento):
+            modelo.objects.update(fecha_actualizacion=hace_dos_horas)
+        cls.token = codificar_token(timezone.now() - timedelta(hours=1))
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def sincronizar(self, since=None):
+        response = self.client.get('/api/sync/', {'since': since} if since else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, datos, nombre):
+        return [fila['id'] for fila in datos[nombre]]
+
+    def test_sin_token_retorna_todo(self):
+        datos = self.sincronizar()
+        self.assertTrue(datos['completo'])
+        self.assertEqual(self.ids(datos, 'vehiculos'), [self.vehiculo.id])
+        self.assertEqual(self.ids(datos, 'cargas'), [self.carga.id])
+        self.assertEqual(self.ids(datos, 'mantenimientos'), [self.mantenimiento.id])
+        self.assertEqual(self.ids(datos, 'alertas'), [self.alerta.id])
+        self.assertIn('esta_vencida', datos['alertas'][0])
+        self.assertIn('rendimiento', datos['cargas'][0])
+
+    def test_con_token_retorna_solo_cambios(self):
+        self.assertEqual(
+            {nombre: self.sincronizar(self.token)[nombre] for nombre in ('vehiculos', 'cargas', 'mantenimientos', 'alertas')},
+            {'vehiculos': [], 'cargas': [], 'mantenimientos': [], 'alertas': []}
+        )
+
+        self.client.patch(f'/api/maintenance/mantenimientos/{self.mantenimiento.id}/', {'costo': '15.00'})
+        respuesta = self.client.post('/api/maintenance/alertas/', {
+            'vehiculo': self.vehiculo.id, 'titulo': 'Frenos', 'descripcion': 'Revisar', 'kilometraje_objetivo': 9000
+        })
+
+        datos = self.sincronizar(self.token)
+        self.assertFalse(datos['completo'])
+        self.assertEqual(self.ids(datos, 'mantenimientos'), [self.mantenimiento.id])
+        self.assertEqual(self.ids(datos, 'alertas'), [respuesta.data['id']])
+        self.assertEqual(datos['cargas'], [])
+
+    def test_eliminaciones_generan_tombstones(self):
+        self.client.delete(f'/api/maintenance/alertas/{self.alerta.id}/')
+        self.assertEqual(self.sincronizar(self.token)['eliminados']['alertas'], [self.alerta.id])
+
+        self.client.delete(f'/api/vehicles/{self.vehiculo.id}/')
+        eliminados = self.sincronizar(self.token)['eliminados']
+        self.assertEqual(eliminados['vehiculos'], [self.vehiculo.id])
+        self.assertEqual(eliminados['cargas'], [self.carga.id])
+        self.assertEqual(eliminados['mantenimientos'], [self.mantenimiento.id])
+
+        self.client.force_authenticate(User.objects.get(username='otro'))
+        self.assertEqual(self.sincronizar(self.token)['eliminados']['vehiculos'], [])
+
+    def test_cambios_en_una_carga_reenvian_la_siguiente(self):
+        siguiente = CargaCombustible.objects.create(
+            vehiculo=self.vehiculo, fecha=self.carga.fecha + timedelta(days=1), kilometraje=1300,
+            galones=Decimal('10.00'), precio_galon=Decimal('2.50'), costo_total=Decimal('25.00'),
+            tipo_combustible='EXTRA', tanque_lleno=True
+        )
+        CargaCombustible.objects.update(tanque_lleno=True, fecha_actualizacion=timezone.now() - timedelta(hours=2))
+
+        self.client.patch(f'/api/fuel-logs/{self.carga.id}/', {'kilometraje': 900})
+        datos = self.sincronizar(self.token)
+        self.assertEqual(self.ids(datos, 'cargas'), [self.carga.id, siguiente.id])
+        self.assertEqual(datos['cargas'][1]['rendimiento'], 40.0)
+
+        CargaCombustible.objects.update(fecha_actualizacion=timezone.now() - timedelta(hours=2))
+        self.client.delete(f'/api/fuel-logs/{self.carga.id}/')
+        datos = self.sincronizar(self.token)
+        self.assertEqual(self.ids(datos, 'cargas'), [siguiente.id])
+        self.assertIsNone(datos['cargas'][0]['rendimiento'])
+
+    def test_alertas_vencidas_por_kilometraje_o_fecha(self):
+        por_fecha = AlertaMantenimiento.objects.create(
+            vehiculo=self.vehiculo, titulo='SOAT', descripcion='Renovar',
+            fecha_objetivo=timezone.localdate() - timedelta(days=1)
+        )
+        hace_tres_dias = timezone.now() - timedelta(days=3)
+        for modelo in (Vehiculo, AlertaMantenimiento):
+            modelo.objects.update(fecha_actualizacion=hace_tres_dias)
+        token = codificar_token(timezone.now() - timedelta(days=2))
+
+        # La fecha objetivo pasó desde el último token sin escribir la alerta
+        datos = self.sincronizar(token)
+        self.assertEqual(self.ids(datos, 'alertas'), [por_fecha.id])
+        self.assertTrue(datos['alertas'][0]['esta_vencida'])
+
+        Vehiculo.objects.filter(pk=self.vehiculo.pk).avanzar_kilometraje(6000)
+        datos = self.sincronizar(token)
+        self.assertEqual(self.ids(datos, 'alertas'), [self.alerta.id, por_fecha.id])
+        self.assertTrue(datos['alertas'][0]['esta_vencida'])
+
+    def test_token_anterior_a_la_retencion_retorna_todo(self):
+        token = codificar_token(timezone.now() - timedelta(days=365))
+        datos = self.sincronizar(token)
+        self.assertTrue(datos['completo'])
+        self.assertEqual(self.ids(datos, 'cargas'), [self.carga.id])
+
+    def test_consultas_constantes(self):
+        with CaptureQueriesContext(connection) as pocas:
+            self.sincronizar()
+        for i in range(5):
+            CargaCombustible.objects.create(
+                vehiculo=self.vehiculo, fecha=timezone.now(), kilometraje=2000 + i, galones=Decimal('5.00'),
+                precio_galon=Decimal('2.50'), costo_total=Decimal('12.50'), tipo_combustible='EXTRA'
+            )
+        with CaptureQueriesContext(connection) as muchas:
+            self.sincronizar()
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+
+    def test_token_invalido(self):
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'ayer'}).status_code, 400)
+
+
+class GetCondicionalTests(APITestCase):
+    """Pruebas de ETag / Last-Modified y respuestas 304"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00')
+        )
+        cls.otro = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Picanto', año=2020,
+            placa='UIO-5678', capacidad_tanque=Decimal('9.00')
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+        cache_estadisticas().clear()
+
+    def endpoints(self):
+        return endpoints_de_listado() + [
+            f'/api/vehicles/{self.vehiculo.id}/',
+            '/api/vehicles/resumen/',
+            '/api/maintenance/alertas/vencidas/',
+            f'/api/fuel-logs/estadisticas/?vehiculo={self.vehiculo.id}',
+            f'/api/maintenance/mantenimientos/estadisticas/?vehiculo={self.vehiculo.id}',
+        ]
+
+    def crear_carga(self, vehiculo=None):
+        return CargaCombustible.objects.create(
+            vehiculo=vehiculo or self.vehiculo, fecha=timezone.now(), kilometraje=1000, galones=Decimal('5.00'),
+            precio_galon=Decimal('2.50'), costo_total=Decimal('12.50'), tipo_combustible='EXTRA'
+        )
+
+    def test_if_none_match_responde_304_con_una_consulta(self):
+        for url in self.endpoints():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('ETag', response)
+                self.assertIn('private', response['Cache-Control'])
+
+                with CaptureQueriesContext(connection) as contexto:
+                    condicional = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(condicional.status_code, 304)
+                self.assertEqual(condicional['ETag'], response['ETag'])
+                self.assertEqual(condicional.content, b'')
+                self.assertEqual(len(contexto.captured_queries), 1)
+
+    def test_escrituras_cambian_el_etag(self):
+        url = '/api/fuel-logs/'
+        etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            carga = self.crear_carga()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            carga.delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        etag = self.client.get('/api/maintenance/alertas/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            AlertaMantenimiento.objects.create(vehiculo=self.vehiculo, titulo='Aceite', descripcion='Cambio', kilometraje_objetivo=5000)
+        self.assertEqual(self.client.get('/api/maintenance/alertas/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_validador_por_vehiculo(self):
+        url = f'/api/fuel-logs/estadisticas/?vehiculo={self.vehiculo.id}'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_carga(self.otro)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_carga()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_if_modified_since(self):
+        response = self.client.get('/api/vehicles/')
+        ultima = response['Last-Modified']
+        self.assertEqual(self.client.get('/api/vehicles/', HTTP_IF_MODIFIED_SINCE=ultima).status_code, 304)
+
+        # Un borrado no cambia las fechas de los vehículos restantes
+        Vehiculo.objects.update(fecha_actualizacion=timezone.now() - timedelta(hours=1))
+        ultima = self.client.get('/api/vehicles/')['Last-Modified']
+        self.otro.delete()
+        Eliminacion.objects.update(fecha=timezone.now() + timedelta(seconds=5))
+        self.assertEqual(self.client.get('/api/vehicles/', HTTP_IF_MODIFIED_SINCE=ultima).status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkPresupuestoTests(TestCase):
+    """Los endpoints no superan las consultas del presupuesto versionado (detecta N+1)"""
+
+    def test_consultas_dentro_del_presupuesto(self):
+        call_command(
+            'generate_fleet', usuarios=1, vehiculos_por_usuario=2, anios=1, prefijo='bench',
+            hasta='2025-12-31', stdout=StringIO()
+        )
+        usuario = User.objects.get(username='bench_0000000')
+        cargas = CargaCombustible.objects.count()
+
+        resultados = ejecutar_benchmark(usuario, 'demo123', repeticiones=2, medir_memoria=False)
+
+        self.assertEqual(set(resultados), {escenario[0] for escenario in ESCENARIOS})
+        self.assertEqual(comparar_con_presupuesto(resultados, leer_presupuesto(), metricas=['consultas']), [])
+        # Las escrituras de los escenarios se revierten
+        self.assertEqual(CargaCombustible.objects.count(), cargas)
+
+
+@override_settings(INSTRUMENTACION_ACTIVA=True, INSTRUMENTACION_LENTA_MS=0, INSTRUMENTACION_MUESTREO_LENTAS=1.0)
+class InstrumentacionTests(APITestCase):
+    """Pruebas del middleware de instrumentación por petición"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00')
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def test_server_timing_y_logs(self):
+        with self.assertLogs('apps.core.instrumentacion', 'INFO') as logs:
+            response = self.client.get('/api/vehicles/')
+
+        self.assertEqual(response.status_code, 200)
+        metricas = {parte.split(';')[0] for parte in response['Server-Timing'].split(', ')}
+        self.assertEqual(metricas, {'total', 'db', 'serializer'})
+
+        registro, lenta = (json.loads(linea.split(':', 2)[2]) for linea in logs.output)
+        self.assertEqual(registro['ruta'], '/api/vehicles/')
+        self.assertGreater(registro['consultas'], 0)
+        self.assertGreater(registro['serializer_ms'], 0)
+        self.assertEqual(lenta['consultas'], registro['consultas'])
+        self.assertTrue(lenta['sql'][0]['sql'].upper().startswith('SELECT'))
+
+    def test_cuenta_duplicadas(self):
+        medicion = Medicion()
+        with connection.execute_wrapper(medicion):
+            for pk in (1, 1, 2):
+                list(Vehiculo.objects.filter(pk=pk))
+        self.assertEqual(len(medicion.consultas), 3)
+        self.assertEqual(medicion.duplicadas, 1)
+        self.assertEqual(medicion.sql_mas_costoso()[0]['veces'], 3)
+
+    def test_streaming_se_mide_al_consumir(self):
+        with self.assertLogs('apps.core.instrumentacion', 'INFO') as logs:
+            response = self.client.get('/api/fuel-logs/exportar/', {'formato': 'ndjson'})
+            self.assertNotIn('Server-Timing', response)
+            # La exportación consulta al consumir el contenido: el log se escribe al terminar
+            self.assertEqual(logs.output, [])
+            b''.join(response.streaming_content)
+
+        registro, lenta = (json.loads(linea.split(':', 2)[2]) for linea in logs.output)
+        self.assertEqual(registro['ruta'], '/api/fuel-logs/exportar/')
+        self.assertTrue(any('fuel_logs_cargacombustible' in consulta['sql'] for consulta in lenta['sql']))
+
+    def test_serializer_fuera_de_una_peticion_no_se_envuelve(self):
+        serializer = MantenimientoSerializer()
+        self.assertIs(medir_serializacion(serializer), serializer)
+
+    @override_settings(INSTRUMENTACION_ACTIVA=False)
+    def test_desactivada(self):
+        response = self.client.get('/api/vehicles/')
+        self.assertNotIn('Server-Timing', response)
+
+
+def valor_metrica(texto, nombre, **etiquetas):
+    """Valor de una muestra del texto de exposición de Prometheus (0 si no existe)"""
+    for familia in text_string_to_metric_families(texto):
+        for muestra in familia.samples:
+            if muestra.name == nombre and all(muestra.labels.get(k) == v for k, v in etiquetas.items()):
+                return muestra.value
+    return 0
+
+
+@override_settings(METRICAS_ACTIVAS=True, METRICAS_TOKEN='secreto')
+class MetricasTests(APITestCase):
+    """Pruebas del endpoint /metrics"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = Vehiculo.objects.create(
+            usuario=cls.usuario, marca='Kia', modelo='Rio', año=2021,
+            placa='GYE-1234', capacidad_tanque=Decimal('11.00')
+        )
+
+    def scrape(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        return response.content.decode()
+
+    def test_peticiones_autenticacion_y_cache(self):
+        cache_estadisticas().clear()
+        antes = self.scrape()
+
+        self.client.force_authenticate(self.usuario)
+        self.client.get('/api/vehicles/')
+        for _ in range(2):
+            self.client.get(f'/api/fuel-logs/estadisticas/?vehiculo={self.vehiculo.id}')
+        self.client.force_authenticate(None)
+        self.client.get('/api/vehicles/', HTTP_AUTHORIZATION='Bearer no-es-un-jwt')
+
+        despues = self.scrape()
+        def delta(nombre, **etiquetas):
+            return valor_metrica(despues, nombre, **etiquetas) - valor_metrica(antes, nombre, **etiquetas)
+
+        self.assertEqual(delta('kmtracker_http_requests_total', vista='vehiculo-list', metodo='GET', estado='200'), 1)
+        self.assertEqual(delta('kmtracker_http_requests_total', vista='vehiculo-list', metodo='GET', estado='401'), 1)
+        self.assertEqual(delta('kmtracker_http_request_duration_seconds_count', vista='vehiculo-list', metodo='GET'), 2)
+        self.assertGreater(delta('kmtracker_db_queries_per_request_sum', vista='vehiculo-list'), 0)
+        self.assertEqual(delta('kmtracker_jwt_auth_failures_total', codigo='token_not_valid'), 1)
+        self.assertEqual(delta('kmtracker_cache_requests_total', resultado='miss'), 1)
+        self.assertEqual(delta('kmtracker_cache_requests_total', resultado='hit'), 1)
+        self.assertEqual(valor_metrica(despues, 'kmtracker_worker_up'), 1)
+
+    def test_streaming_cuenta_las_consultas_al_consumir(self):
+        self.client.force_authenticate(self.usuario)
+        response = self.client.get('/api/fuel-logs/exportar/', {'formato': 'csv'})
+        vista = response.wsgi_request.resolver_match.view_name
+        antes = self.scrape()
+        b''.join(response.streaming_content)
+        despues = self.scrape()
+
+        def delta(nombre):
+            return valor_metrica(despues, nombre, vista=vista) - valor_metrica(antes, nombre, vista=vista)
+
+        # La petición se registra al terminar el contenido, con el SELECT de la exportación
+        self.assertEqual(delta('kmtracker_db_queries_per_request_count'), 1)
+        self.assertGreater(delta('kmtracker_db_queries_per_request_sum'), 0)
+
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 200)
+
+    @override_settings(METRICAS_TOKEN='')
+    def test_sin_token_solo_con_debug(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+        with override_settings(DEBUG=True):
+            self.assertEqual(self.client.get('/metrics').status_code, 200)
+
+    @override_settings(METRICAS_ACTIVAS=False)
+    def test_desactivadas_por_configuracion(self):
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secreto').status_code, 404)
+
+    def test_agrega_entre_procesos(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            entorno = {**os.environ, 'PROMETHEUS_MULTIPROC_DIR': directorio}
+            codigo = (
+                "from apps.core.metricas import PETICIONES; "
+                "PETICIONES.labels(vista='vehiculo-list', metodo='GET', estado='200').inc(3)"
+            )
+            for _ in range(2):
+                subprocess.run(
+                    [sys.executable, 'manage.py', 'shell', '-c', codigo],
+                    cwd=settings.BASE_DIR, env=entorno, check=True, capture_output=True,
+                )
+            texto = exportar_metricas(directorio).decode()
+        self.assertEqual(valor_metrica(texto, 'kmtracker_http_requests_total', vista='vehiculo-list', estado='200'), 6)
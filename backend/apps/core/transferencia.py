@@ -0,0 +1,252 @@
+"""
+Importación y exportación en streaming de historiales en CSV o NDJSON.
+
+Las filas se leen de forma incremental, se validan por lotes con el serializer
+del modelo (con los vehículos del lote precargados en una sola consulta) y se
+insertan con bulk_create en una transacción por lote. La exportación pagina
+por keyset sobre (vehiculo_id, fecha, id), una consulta con LIMIT por bloque,
+para mantener la memoria constante: el cursor por defecto de PyMySQL carga el
+resultado completo en memoria, por lo que iterator() no bastaría en MySQL.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+
+from apps.vehicles.models import Vehiculo
+
+
+FORMATOS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+EXTENSIONES = {
+    '.csv': 'csv',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+# Columnas exportadas a partir de una relación
+LOOKUPS_COLUMNA = {'placa': 'vehiculo__placa'}
+
+# Errores de fila que se devuelven en el resultado (el total se cuenta igual)
+MAXIMO_ERRORES_REPORTADOS = 100
+
+
+def serializers_transferibles():
+    """Serializers que se pueden importar/exportar, por nombre"""
+    from apps.fuel_logs.serializers import CargaCombustibleSerializer
+    from apps.maintenance.serializers import MantenimientoSerializer
+
+    return {
+        'cargas': CargaCombustibleSerializer,
+        'mantenimientos': MantenimientoSerializer,
+    }
+
+
+def detectar_formato(nombre, formato=None):
+    """Retorna 'csv' o 'ndjson' según el formato indicado o la extensión del archivo"""
+    if not formato:
+        extension = '.' + nombre.rsplit('.', 1)[-1].lower() if '.' in nombre else ''
+        formato = EXTENSIONES.get(extension)
+    if formato not in FORMATOS:
+        raise ValueError('El formato debe ser "csv" o "ndjson"')
+    return formato
+
+
+def abrir_texto(archivo):
+    """Envuelve un archivo binario (ej. un UploadedFile) para leerlo como texto"""
+    return io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+
+
+def leer_filas(lineas, formato):
+    """
+    Genera un diccionario por registro a partir de líneas de texto.
+
+    En CSV se omiten las celdas vacías para que los campos opcionales tomen
+    su valor por defecto. Las líneas NDJSON inválidas generan None.
+    """
+    if formato == 'csv':
+        for fila in csv.DictReader(lineas):
+            yield {
+                columna: valor for columna, valor in fila.items()
+                if columna is not None and valor not in ('', None)
+            }
+        return
+
+    for linea in lineas:
+        if not linea.strip():
+            continue
+        try:
+            fila = json.loads(linea)
+        except ValueError:
+            fila = None
+        yield fila if isinstance(fila, dict) else None
+
+
+def importar_en_lotes(filas, serializer_class, usuario=None, batch_size=500, omitir=0, al_confirmar=None):
+    """
+    Valida e inserta las filas por lotes de batch_size, cada uno en su propia
+    transacción. Las filas inválidas se reportan por número y no detienen la
+    importación.
+
+    omitir permite reanudar saltando las filas ya procesadas; al_confirmar se
+    llama con el total de filas procesadas después de confirmar cada lote.
+    """
+    resultado = {'procesadas': omitir, 'creadas': 0, 'total_errores': 0, 'errores': []}
+
+    lote = []
+    for numero, fila in enumerate(filas, start=1):
+        if numero <= omitir:
+            continue
+        lote.append((numero, fila))
+        if len(lote) >= batch_size:
+            _importar_lote(lote, serializer_class, usuario, resultado)
+            if al_confirmar:
+                al_confirmar(resultado['procesadas'])
+            lote = []
+
+    if lote:
+        _importar_lote(lote, serializer_class, usuario, resultado)
+        if al_confirmar:
+            al_confirmar(resultado['procesadas'])
+
+    return resultado
+
+
+def _registrar_error(resultado, numero, errores):
+    resultado['total_errores'] += 1
+    if len(resultado['errores']) < MAXIMO_ERRORES_REPORTADOS:
+        resultado['errores'].append({'fila': numero, 'errores': errores})
+
+
+def _importar_lote(lote, serializer_class, usuario, resultado):
+    validas = []
+    for numero, fila in lote:
+        if fila is None:
+            _registrar_error(resultado, numero, {'non_field_errors': ['Fila con formato inválido']})
+        else:
+            validas.append((numero, fila))
+
+    contexto = {'vehiculos': _vehiculos_del_lote([fila for _, fila in validas], usuario), 'importacion': True}
+
+    serializer = serializer_class(data=[fila for _, fila in validas], many=True, context=contexto)
+    if not serializer.is_valid():
+        errores = serializer.errors
+        for (numero, _), errores_fila in zip(validas, errores):
+            if errores_fila:
+                _registrar_error(resultado, numero, errores_fila)
+        validas = [fila for fila, errores_fila in zip(validas, errores) if not errores_fila]
+        serializer = serializer_class(data=[fila for _, fila in validas], many=True, context=contexto)
+        serializer.is_valid(raise_exception=True)
+
+    if validas:
+        with transaction.atomic():
+            resultado['creadas'] += len(serializer.save())
+
+    resultado['procesadas'] = lote[-1][0]
+
+
+def _vehiculos_del_lote(filas, usuario):
+    """
+    Precarga en una consulta los vehículos referenciados por id o por placa
+    y completa 'vehiculo' en las filas que solo traen la placa.
+    """
+    ids, placas = set(), set()
+    for fila in filas:
+        try:
+            ids.add(int(fila['vehiculo']))
+        except (KeyError, TypeError, ValueError):
+            if fila.get('placa'):
+                placas.add(str(fila['placa']))
+
+    if not ids and not placas:
+        return {}
+
+    queryset = Vehiculo.objects.filter(Q(pk__in=ids) | Q(placa__in=placas))
+    if usuario is not None:
+        queryset = queryset.filter(usuario_id=usuario.pk)
+    vehiculos = {vehiculo.pk: vehiculo for vehiculo in queryset}
+
+    por_placa = {vehiculo.placa: vehiculo.pk for vehiculo in vehiculos.values()}
+    for fila in filas:
+        if 'vehiculo' not in fila and str(fila.get('placa')) in por_placa:
+            fila['vehiculo'] = por_placa[str(fila['placa'])]
+
+    return vehiculos
+
+
+class _Eco:
+    """Pseudo-archivo que retorna lo escrito, para usar csv.writer en streaming"""
+
+    def write(self, valor):
+        return valor
+
+
+def _formatear(valor, formato):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if formato == 'csv':
+        if valor is None:
+            return ''
+        if isinstance(valor, bool):
+            return 'true' if valor else 'false'
+    return valor
+
+
+def _bloques_keyset(queryset, lookups, chunk_size):
+    """
+    Genera las filas de values_list(*lookups) ordenadas por (vehiculo_id, fecha, id),
+    leyendo bloques de chunk_size filas a partir de la última clave vista.
+    """
+    queryset = queryset.order_by('vehiculo_id', 'fecha', 'id').values_list(*lookups, 'vehiculo_id', 'fecha', 'id')
+    ultima = None
+    while True:
+        bloque = queryset
+        if ultima is not None:
+            vehiculo_id, fecha, pk = ultima
+            bloque = bloque.filter(
+                Q(vehiculo_id__gt=vehiculo_id)
+                | Q(vehiculo_id=vehiculo_id, fecha__gt=fecha)
+                | Q(vehiculo_id=vehiculo_id, fecha=fecha, id__gt=pk)
+            )
+        filas = list(bloque[:chunk_size])
+        for fila in filas:
+            yield fila[:-3]
+        if len(filas) < chunk_size:
+            return
+        ultima = filas[-1][-3:]
+
+
+def exportar_filas(queryset, columnas, formato, chunk_size=2000):
+    """
+    Genera el contenido CSV o NDJSON de las columnas indicadas, leyendo el
+    queryset por bloques de chunk_size filas (paginación keyset).
+    """
+    lookups = [LOOKUPS_COLUMNA.get(columna, columna) for columna in columnas]
+    filas = _bloques_keyset(queryset, lookups, chunk_size)
+
+    if formato == 'csv':
+        escritor = csv.writer(_Eco())
+        yield escritor.writerow(columnas)
+
+    bloque = []
+    for fila in filas:
+        valores = [_formatear(valor, formato) for valor in fila]
+        if formato == 'csv':
+            bloque.append(escritor.writerow(valores))
+        else:
+            bloque.append(json.dumps(dict(zip(columnas, valores)), ensure_ascii=False) + '\n')
+        if len(bloque) >= chunk_size:
+            yield ''.join(bloque)
+            bloque = []
+
+    if bloque:
+        yield ''.join(bloque)
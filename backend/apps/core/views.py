@@ -0,0 +1,29 @@
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .sincronizacion import cambios_desde, decodificar_token
+
+
+class SincronizacionView(APIView):
+    """
+    Retorna en una respuesta los vehículos, cargas, mantenimientos y alertas
+    que cambiaron desde el token 'since', y los ids eliminados.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        desde = None
+        token = request.query_params.get('since')
+        if token:
+            try:
+                desde = decodificar_token(token)
+            except ValueError:
+                return Response(
+                    {'error': 'El parámetro since no es un token válido'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        return Response(cambios_desde(request.user, desde, context={'request': request}))
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class FuelLogsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.fuel_logs'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel_logs', '0002_rename_litros_to_galones'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cargacombustible',
+            name='galones',
+            field=models.DecimalField(decimal_places=2, help_text='Galones cargados', max_digits=6),
+        ),
+        migrations.AlterField(
+            model_name='cargacombustible',
+            name='precio_galon',
+            field=models.DecimalField(decimal_places=2, help_text='Precio por galón', max_digits=6),
+        ),
+        migrations.AddIndex(
+            model_name='cargacombustible',
+            index=models.Index(fields=['vehiculo', 'fecha'], name='carga_vehiculo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cargacombustible',
+            index=models.Index(fields=['vehiculo', 'kilometraje'], name='carga_vehiculo_km_idx'),
+        ),
+    ]
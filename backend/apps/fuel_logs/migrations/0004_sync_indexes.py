@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fuel_logs', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cargacombustible',
+            index=models.Index(fields=['vehiculo', 'fecha_actualizacion'], name='carga_vehiculo_act_idx'),
+        ),
+    ]
@@ -1,7 +1,196 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
 from apps.vehicles.models import Vehiculo
 
 
+def calcular_rendimiento(kilometraje, tanque_lleno, kilometraje_anterior, galones_tramo):
+    """
+    Calcula el rendimiento (km/gal) de una carga con tanque lleno: kilómetros
+    desde el tanque lleno anterior entre los galones cargados desde entonces
+    (las cargas parciales intermedias y la propia). Las cargas parciales y
+    las anteriores al primer tanque lleno no tienen rendimiento.
+    """
+    if kilometraje_anterior is None or not tanque_lleno:
+        return None
+    km_recorridos = kilometraje - kilometraje_anterior
+    if km_recorridos > 0 and galones_tramo > 0:
+        return round(km_recorridos / float(galones_tramo), 2)
+    return None
+
+
+def recorrer_tramos(cargas):
+    """
+    Recorre filas (vehiculo_id, kilometraje, galones, tanque_lleno, ...)
+    ordenadas por vehículo y fecha y genera (fila, kilometraje_anterior,
+    galones_tramo): el kilometraje del tanque lleno anterior del vehículo
+    (None si no hay) y los galones cargados desde él hasta la fila, incluida.
+    """
+    vehiculo_actual = None
+    km_inicio = None
+    galones_tramo = 0
+
+    for fila in cargas:
+        vehiculo_id, kilometraje, galones, tanque_lleno = fila[:4]
+        if vehiculo_id != vehiculo_actual:
+            vehiculo_actual = vehiculo_id
+            km_inicio = None
+            galones_tramo = 0
+
+        galones_tramo += galones
+        yield fila, km_inicio, galones_tramo
+
+        if tanque_lleno:
+            km_inicio = kilometraje
+            galones_tramo = 0
+
+
+def asignar_rendimiento(cargas):
+    """
+    Asigna kilometraje_anterior y galones_tramo (ver calcular_rendimiento) a
+    una lista de cargas, por ejemplo una página del listado.
+
+    Lee solo el historial de los vehículos de la lista entre su último tanque
+    lleno anterior y la carga más reciente, por lo que el costo depende del
+    tamaño de la lista y no del historial completo. Con el historial real
+    también funciona en querysets filtrados (ej. búsqueda). Ejecuta dos
+    consultas sin importar el tamaño de la lista.
+    """
+    cargas = list(cargas)
+    if not cargas:
+        return cargas
+
+    vehiculo_ids = {carga.vehiculo_id for carga in cargas}
+    desde = min(carga.fecha for carga in cargas)
+    hasta = max(carga.fecha for carga in cargas)
+
+    # Último tanque lleno de cada vehículo antes del rango de la lista
+    ultimas_fechas = CargaCombustible.objects.filter(
+        vehiculo_id__in=vehiculo_ids,
+        fecha__lt=desde,
+        tanque_lleno=True
+    ).values('vehiculo_id').annotate(ultima=Max('fecha')).order_by()
+    condicion = Q(vehiculo_id__in=vehiculo_ids, fecha__gte=desde, fecha__lte=hasta)
+    for fila in ultimas_fechas:
+        condicion |= Q(vehiculo_id=fila['vehiculo_id'], fecha__gte=fila['ultima'], fecha__lt=desde)
+
+    historial = CargaCombustible.objects.filter(condicion).order_by(
+        'vehiculo_id', 'fecha', 'id'
+    ).values_list('vehiculo_id', 'kilometraje', 'galones', 'tanque_lleno', 'id')
+
+    tramos = {
+        fila[4]: (kilometraje_anterior, galones_tramo)
+        for fila, kilometraje_anterior, galones_tramo in recorrer_tramos(historial)
+    }
+
+    for carga in cargas:
+        carga.kilometraje_anterior, carga.galones_tramo = tramos.get(carga.id, (None, carga.galones))
+    return cargas
+
+
+def promedio_tanque_lleno(cargas):
+    """
+    Calcula el rendimiento promedio (km/gal) sobre filas (vehiculo_id,
+    kilometraje, galones, tanque_lleno) ordenadas por vehículo y fecha.
+
+    Es el promedio de los rendimientos por carga (calcular_rendimiento) que
+    muestra el listado: cada tramo va de un tanque lleno al siguiente e
+    incluye los galones de las cargas parciales intermedias.
+    """
+    rendimientos = []
+    for (_, kilometraje, _, tanque_lleno), kilometraje_anterior, galones_tramo in recorrer_tramos(cargas):
+        rendimiento = calcular_rendimiento(kilometraje, tanque_lleno, kilometraje_anterior, galones_tramo)
+        if rendimiento is not None:
+            rendimientos.append(rendimiento)
+    return round(sum(rendimientos) / len(rendimientos), 2) if rendimientos else None
+
+
+class CargaCombustibleQuerySet(models.QuerySet):
+    """QuerySet con utilidades de rendimiento para CargaCombustible"""
+
+    def rendimiento_promedio(self, chunk_size=2000):
+        """
+        Calcula el rendimiento promedio (km/gal) del queryset en una sola
+        pasada ordenada (ver promedio_tanque_lleno).
+        """
+        cargas = self.order_by('vehiculo_id', 'fecha', 'id').values_list(
+            'vehiculo_id', 'kilometraje', 'galones', 'tanque_lleno'
+        ).iterator(chunk_size=chunk_size)
+        return promedio_tanque_lleno(cargas)
+
+    def rendimiento_reciente(self, vehiculo_id, cantidad=20):
+        """Rendimiento promedio de las últimas `cantidad` cargas de un vehículo"""
+        cargas = self.filter(vehiculo_id=vehiculo_id).order_by('-fecha', '-id').values_list(
+            'vehiculo_id', 'kilometraje', 'galones', 'tanque_lleno'
+        )[:cantidad]
+        return promedio_tanque_lleno(reversed(list(cargas)))
+
+    def marcar_siguientes(self, posiciones):
+        """
+        Actualiza fecha_actualizacion del siguiente tanque lleno (por fecha,
+        id) a cada posición (vehiculo_id, fecha, id): su rendimiento depende
+        de las cargas de su tramo y la sincronización incremental solo envía
+        las filas con fecha_actualizacion reciente. Una consulta por posición
+        más un UPDATE si hay siguientes.
+        """
+        siguientes = set()
+        for vehiculo_id, fecha, pk in posiciones:
+            siguiente = self.filter(
+                Q(fecha__gt=fecha) | Q(fecha=fecha, id__gt=pk), vehiculo_id=vehiculo_id, tanque_lleno=True
+            ).exclude(pk=pk).order_by('fecha', 'id').values_list('pk', flat=True).first()
+            if siguiente is not None:
+                siguientes.add(siguiente)
+        if siguientes:
+            self.filter(pk__in=siguientes).update(fecha_actualizacion=timezone.now())
+
+    def marcar_posteriores(self, cargas):
+        """
+        Variante de marcar_siguientes para lotes: un único UPDATE de las cargas
+        posteriores a la más antigua del lote en cada vehículo.
+        """
+        inicios = {}
+        for carga in cargas:
+            inicios[carga.vehiculo_id] = min(inicios.get(carga.vehiculo_id, carga.fecha), carga.fecha)
+        if not inicios:
+            return
+        condicion = Q()
+        for vehiculo_id, fecha in inicios.items():
+            condicion |= Q(vehiculo_id=vehiculo_id, fecha__gt=fecha)
+        self.filter(condicion).update(fecha_actualizacion=timezone.now())
+
+    def estadisticas(self):
+        """
+        Retorna las estadísticas de consumo del queryset con una consulta de
+        agregación y, si hay cargas, una pasada para el rendimiento.
+        """
+        totales = self.order_by().aggregate(
+            total_cargas=Count('id'),
+            total_galones=Sum('galones'),
+            total_costo=Sum('costo_total'),
+            promedio_galones=Avg('galones'),
+            promedio_costo=Avg('costo_total'),
+        )
+
+        if not totales['total_cargas']:
+            return {
+                'total_cargas': 0,
+                'total_galones': 0,
+                'total_costo': 0,
+                'promedio_galones': 0,
+                'promedio_costo': 0,
+                'rendimiento_promedio': None
+            }
+
+        return {
+            'total_cargas': totales['total_cargas'],
+            'total_galones': float(totales['total_galones'] or 0),
+            'total_costo': float(totales['total_costo'] or 0),
+            'promedio_galones': float(totales['promedio_galones'] or 0),
+            'promedio_costo': float(totales['promedio_costo'] or 0),
+            'rendimiento_promedio': self.rendimiento_promedio()
+        }
+
+
 class CargaCombustible(models.Model):
     """Modelo para registrar cargas de combustible"""
 
@@ -32,24 +221,39 @@ class CargaCombustible(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
+    objects = CargaCombustibleQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Carga de Combustible'
         verbose_name_plural = 'Cargas de Combustible'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['vehiculo', 'fecha'], name='carga_vehiculo_fecha_idx'),
+            models.Index(fields=['vehiculo', 'kilometraje'], name='carga_vehiculo_km_idx'),
+            models.Index(fields=['vehiculo', 'fecha_actualizacion'], name='carga_vehiculo_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vehiculo} - {self.fecha.strftime('%Y-%m-%d')} - {self.galones} gal"
 
+    def save(self, *args, **kwargs):
+        """Guarda dentro de una transacción que incluye la actualización del resumen del vehículo"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
     @property
     def rendimiento(self):
-        """Calcula el rendimiento (km/gal) basado en la carga anterior"""
-        carga_anterior = CargaCombustible.objects.filter(
-            vehiculo=self.vehiculo,
-            fecha__lt=self.fecha
-        ).order_by('-fecha').first()
-
-        if carga_anterior and self.tanque_lleno and carga_anterior.tanque_lleno:
-            km_recorridos = self.kilometraje - carga_anterior.kilometraje
-            if km_recorridos > 0 and self.galones > 0:
-                return round(km_recorridos / float(self.galones), 2)
-        return None
+        """
+        Rendimiento (km/gal) desde el tanque lleno anterior (ver
+        calcular_rendimiento).
+
+        Usa los valores de asignar_rendimiento() si existen; en caso contrario
+        los calcula para esta carga.
+        """
+        if not self.tanque_lleno:
+            return None
+        if not hasattr(self, 'kilometraje_anterior'):
+            asignar_rendimiento([self])
+        return calcular_rendimiento(
+            self.kilometraje, self.tanque_lleno, self.kilometraje_anterior, self.galones_tramo
+        )
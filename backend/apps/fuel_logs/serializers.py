@@ -1,15 +1,53 @@
 from rest_framework import serializers
-from django.db import models
+from django.db import models, transaction
 from .models import CargaCombustible
 from apps.vehicles.models import Vehiculo
+from apps.vehicles.resumen import contribucion_carga, recalcular_combustible, registrar_lote
+from apps.vehicles.serializers import VehiculoDelUsuarioField
+
+
+class CargaCombustibleListSerializer(serializers.ListSerializer):
+    """Crea cargas en lote con bulk_create y sincroniza cada vehículo una sola vez"""
+
+    def create(self, validated_data):
+        cargas = [CargaCombustible(**datos) for datos in validated_data]
+
+        with transaction.atomic():
+            CargaCombustible.objects.bulk_create(cargas, batch_size=500)
+
+            # Kilometraje máximo del lote por vehículo
+            kilometrajes = {}
+            for carga in cargas:
+                kilometrajes[carga.vehiculo_id] = max(kilometrajes.get(carga.vehiculo_id, 0), carga.kilometraje)
+
+            for vehiculo_id, kilometraje in kilometrajes.items():
+                Vehiculo.objects.filter(pk=vehiculo_id).avanzar_kilometraje(kilometraje)
+
+            # Cargas históricas cambian el rendimiento de las que les siguen
+            CargaCombustible.objects.marcar_posteriores(cargas)
+
+            # bulk_create no envía señales: actualizar resumen y versión aquí
+            recalcular_combustible(registrar_lote(cargas, contribucion_carga))
+
+        return cargas
 
 
 class CargaCombustibleSerializer(serializers.ModelSerializer):
     """Serializer para el modelo CargaCombustible"""
 
+    vehiculo = VehiculoDelUsuarioField(queryset=Vehiculo.objects.all())
     vehiculo_info = serializers.SerializerMethodField(read_only=True)
     rendimiento = serializers.ReadOnlyField()
 
+    # Columnas de importación/exportación en CSV o NDJSON
+    columnas_transferencia = (
+        'vehiculo', 'placa', 'fecha', 'kilometraje', 'galones', 'precio_galon',
+        'tipo_combustible', 'estacion_servicio', 'tanque_lleno', 'notas'
+    )
+
+    # Relaciones que el viewset carga con select_related/only()
+    relaciones = {'vehiculo': ('id', 'marca', 'modelo', 'placa')}
+
     class Meta:
         model = CargaCombustible
         fields = [
@@ -19,6 +57,7 @@ class CargaCombustibleSerializer(serializers.ModelSerializer):
             'fecha_actualizacion'
         ]
         read_only_fields = ['costo_total', 'fecha_creacion', 'fecha_actualizacion']
+        list_serializer_class = CargaCombustibleListSerializer
 
     def get_vehiculo_info(self, obj):
         """Retorna información básica del vehículo"""
@@ -54,7 +93,8 @@ class CargaCombustibleSerializer(serializers.ModelSerializer):
         kilometraje = data.get('kilometraje')
         
         if vehiculo and kilometraje:
-            if kilometraje < vehiculo.kilometraje_actual:
+            # Un historial importado puede ser anterior al kilometraje actual
+            if kilometraje < vehiculo.kilometraje_actual and not self.context.get('importacion'):
                 raise serializers.ValidationError({
                     'kilometraje': f'El kilometraje ({kilometraje} km) no puede ser menor al actual del vehículo ({vehiculo.kilometraje_actual} km)'
                 })
@@ -100,8 +140,7 @@ class CargaCombustibleSerializer(serializers.ModelSerializer):
         return instance
 
     def _actualizar_kilometraje_vehiculo(self, vehiculo, nuevo_kilometraje):
-        """Método auxiliar para actualizar el kilometraje del vehículo"""
-        if nuevo_kilometraje > vehiculo.kilometraje_actual:
-            vehiculo.kilometraje_actual = nuevo_kilometraje
-            vehiculo.save(update_fields=['kilometraje_actual', 'fecha_actualizacion'])
+        """Método auxiliar para actualizar el kilometraje del vehículo con un UPDATE condicional"""
+        if Vehiculo.objects.filter(pk=vehiculo.pk).avanzar_kilometraje(nuevo_kilometraje):
+            vehiculo.kilometraje_actual = max(vehiculo.kilometraje_actual, nuevo_kilometraje)
 
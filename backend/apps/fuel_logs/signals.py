@@ -0,0 +1,59 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.vehicles.eliminacion import en_eliminacion
+from apps.vehicles.models import Vehiculo
+from apps.vehicles.resumen import contribucion_carga, recalcular_combustible, recordar_vehiculo, registrar_escritura
+from .models import CargaCombustible
+
+
+@receiver(post_init, sender=CargaCombustible)
+def recordar_vehiculo_original(sender, instance, **kwargs):
+    """Guarda el vehículo cargado para invalidar también el anterior si cambia"""
+    instance._vehiculo_id_original = instance.__dict__.get('vehiculo_id')
+    instance._posicion_original = (instance.__dict__.get('vehiculo_id'), instance.__dict__.get('fecha'))
+    recordar_vehiculo(instance)
+
+
+@receiver(post_save, sender=CargaCombustible)
+@receiver(post_delete, sender=CargaCombustible)
+def invalidar_estadisticas_vehiculo(sender, instance, **kwargs):
+    """Incrementa la versión del vehículo al confirmar la escritura o borrar una carga"""
+    if en_eliminacion(instance.vehiculo_id):
+        return
+    vehiculo_ids = {instance.vehiculo_id, getattr(instance, '_vehiculo_id_original', None)} - {None}
+    instance._vehiculo_id_original = instance.vehiculo_id
+
+    # Al confirmar: una lectura concurrente antes del commit cachearía datos viejos con la versión nueva
+    transaction.on_commit(Vehiculo.objects.filter(pk__in=vehiculo_ids).incrementar_version)
+
+
+@receiver(post_save, sender=CargaCombustible)
+@receiver(post_delete, sender=CargaCombustible)
+def actualizar_resumen_carga(sender, instance, **kwargs):
+    """Actualiza el resumen del vehículo dentro de la transacción de la escritura"""
+    if en_eliminacion(instance.vehiculo_id):
+        return
+    vehiculo_ids = registrar_escritura(
+        instance, contribucion_carga, creado=kwargs.get('created', False), eliminado=kwargs['signal'] is post_delete
+    )
+    recalcular_combustible(vehiculo_ids)
+
+
+@receiver(post_save, sender=CargaCombustible)
+@receiver(post_delete, sender=CargaCombustible)
+def marcar_carga_siguiente(sender, instance, **kwargs):
+    """Marca como modificada la carga siguiente, cuyo rendimiento depende de esta"""
+    if en_eliminacion(instance.vehiculo_id):
+        return
+    posiciones = set()
+    if kwargs['signal'] is post_save:
+        posiciones.add((instance.vehiculo_id, instance.fecha, instance.pk))
+    # Al moverse (o borrarse) cambia también la siguiente de la posición original
+    vehiculo_id, fecha = getattr(instance, '_posicion_original', (None, None))
+    if vehiculo_id is not None and fecha is not None:
+        posiciones.add((vehiculo_id, fecha, instance.pk))
+    instance._posicion_original = (instance.vehiculo_id, instance.fecha)
+
+    CargaCombustible.objects.marcar_siguientes(posiciones)
@@ -1,3 +1,268 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.core.cache import cache_estadisticas
+from apps.vehicles.models import Vehiculo
+from .models import CargaCombustible, asignar_rendimiento
+
+
+def crear_vehiculo(usuario, placa='GYE-1234'):
+    return Vehiculo.objects.create(
+        usuario=usuario, marca='Chevrolet', modelo='Sail', año=2020,
+        placa=placa, capacidad_tanque=Decimal('12.00')
+    )
+
+
+def crear_carga(vehiculo, dias, kilometraje, galones='10.00', tanque_lleno=True, **extra):
+    galones = Decimal(galones)
+    return CargaCombustible.objects.create(
+        vehiculo=vehiculo,
+        fecha=timezone.now() - timedelta(days=dias),
+        kilometraje=kilometraje,
+        galones=galones,
+        precio_galon=Decimal('2.50'),
+        costo_total=galones * Decimal('2.50'),
+        tipo_combustible=extra.pop('tipo_combustible', 'EXTRA'),
+        tanque_lleno=tanque_lleno,
+        **extra
+    )
+
+
+class RendimientoTests(TestCase):
+    """Pruebas del cálculo de rendimiento por carga y promedio"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('conductor', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario)
+        cls.otro = crear_vehiculo(cls.usuario, placa='UIO-5678')
+        crear_carga(cls.vehiculo, 30, 1000)
+        crear_carga(cls.vehiculo, 20, 1400)
+        crear_carga(cls.vehiculo, 10, 1600, tanque_lleno=False)
+        crear_carga(cls.vehiculo, 5, 1900)
+        crear_carga(cls.otro, 25, 500)
+        crear_carga(cls.otro, 15, 800, galones='5.00')
+
+    # La carga de 1900 km consume también los galones de la parcial de 1600 km
+    ESPERADOS = {1000: None, 1400: 40.0, 1600: None, 1900: 25.0, 500: None, 800: 60.0}
+
+    def test_rendimiento_por_carga(self):
+        obtenidos = {carga.kilometraje: carga.rendimiento for carga in CargaCombustible.objects.all()}
+        self.assertEqual(obtenidos, self.ESPERADOS)
+
+    def test_asignar_rendimiento_con_consultas_constantes(self):
+        cargas = list(CargaCombustible.objects.all()[1:4])
+        with self.assertNumQueries(2):
+            asignar_rendimiento(cargas)
+        with self.assertNumQueries(0):
+            for carga in cargas:
+                self.assertEqual(carga.rendimiento, self.ESPERADOS[carga.kilometraje])
+
+    def test_promedio_coincide_con_rendimientos_por_carga(self):
+        self.assertEqual(CargaCombustible.objects.filter(vehiculo=self.vehiculo).rendimiento_promedio(), 32.5)
+        self.assertEqual(CargaCombustible.objects.rendimiento_promedio(), round((40.0 + 25.0 + 60.0) / 3, 2))
+
+    def test_marcar_siguientes_marca_el_siguiente_tanque_lleno(self):
+        antes = timezone.now() - timedelta(days=1)
+        CargaCombustible.objects.update(fecha_actualizacion=antes)
+        carga = CargaCombustible.objects.get(kilometraje=1400)
+        CargaCombustible.objects.marcar_siguientes([(carga.vehiculo_id, carga.fecha, carga.pk)])
+        marcadas = CargaCombustible.objects.filter(fecha_actualizacion__gt=antes).values_list('kilometraje', flat=True)
+        self.assertEqual(list(marcadas), [1900])
+
+    def test_carga_parcial_sin_consultas(self):
+        carga = CargaCombustible.objects.get(kilometraje=1600)
+        with self.assertNumQueries(0):
+            self.assertIsNone(carga.rendimiento)
+
+
+class CargaCombustibleListTests(APITestCase):
+    """Pruebas del listado de cargas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('conductor', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario)
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def crear_historial(self, cantidad):
+        for i in range(cantidad):
+            crear_carga(self.vehiculo, cantidad - i, 1000 + i * 300)
+
+    def contar_consultas_listado(self, params=None):
+        with CaptureQueriesContext(connection) as contexto:
+            response = self.client.get('/api/fuel-logs/', params or {})
+        self.assertEqual(response.status_code, 200)
+        return len(contexto.captured_queries), response
+
+    def test_consultas_constantes_por_pagina(self):
+        self.crear_historial(2)
+        consultas_pocas, _ = self.contar_consultas_listado()
+        self.crear_historial(8)
+        consultas_muchas, response = self.contar_consultas_listado()
+        self.assertEqual(consultas_pocas, consultas_muchas)
+        self.assertEqual(len(response.data['results']), 10)
+
+    def test_rendimiento_en_listado(self):
+        self.crear_historial(3)
+        response = self.client.get('/api/fuel-logs/')
+        rendimientos = [carga['rendimiento'] for carga in response.data['results']]
+        self.assertEqual(rendimientos, [30.0, 30.0, None])
+
+    def test_busqueda_usa_carga_anterior_real(self):
+        crear_carga(self.vehiculo, 3, 1000, tipo_combustible='SUPER')
+        crear_carga(self.vehiculo, 2, 1200, tipo_combustible='EXTRA')
+        crear_carga(self.vehiculo, 1, 1500, tipo_combustible='SUPER')
+        response = self.client.get('/api/fuel-logs/', {'search': 'SUPER'})
+        rendimientos = [carga['rendimiento'] for carga in response.data['results']]
+        self.assertEqual(rendimientos, [30.0, None])
+
+
+class EstadisticasTests(APITestCase):
+    """Pruebas del endpoint de estadísticas de combustible"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('conductor', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario)
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+        cache_estadisticas().clear()
+
+    def estadisticas(self):
+        return self.client.get('/api/fuel-logs/estadisticas/', {'vehiculo': self.vehiculo.id})
+
+    def test_vehiculo_sin_cargas(self):
+        response = self.estadisticas()
+        self.assertEqual(response.data['total_cargas'], 0)
+        self.assertIsNone(response.data['rendimiento_promedio'])
+
+    def test_tanque_lleno_a_tanque_lleno_con_cargas_parciales(self):
+        crear_carga(self.vehiculo, 40, 900, galones='4.00', tanque_lleno=False)
+        crear_carga(self.vehiculo, 30, 1000)
+        crear_carga(self.vehiculo, 25, 1200, galones='4.00', tanque_lleno=False)
+        crear_carga(self.vehiculo, 20, 1500, galones='6.00')
+        crear_carga(self.vehiculo, 10, 1900, galones='8.00')
+
+        response = self.estadisticas()
+
+        # Tramos: (1500 - 1000) / (4 + 6) = 50 y (1900 - 1500) / 8 = 50
+        self.assertEqual(response.data['rendimiento_promedio'], 50.0)
+        self.assertEqual(response.data['total_cargas'], 5)
+        self.assertEqual(response.data['total_galones'], 32.0)
+        self.assertEqual(response.data['total_costo'], 80.0)
+
+    def test_consultas_acotadas(self):
+        for i in range(20):
+            crear_carga(self.vehiculo, 40 - i, 1000 + i * 300, tanque_lleno=i % 3 != 1)
+        with CaptureQueriesContext(connection) as pocas:
+            self.estadisticas()
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20, 60):
+                crear_carga(self.vehiculo, 40 - i, 1000 + i * 300, tanque_lleno=i % 3 != 1)
+        with CaptureQueriesContext(connection) as muchas:
+            self.estadisticas()
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+        with self.assertNumQueries(2):
+            CargaCombustible.objects.filter(vehiculo=self.vehiculo).estadisticas()
+
+    def test_no_expone_vehiculos_ajenos(self):
+        ajeno = crear_vehiculo(User.objects.create_user('otro'), placa='CUE-9012')
+        crear_carga(ajeno, 10, 1000)
+        response = self.client.get('/api/fuel-logs/estadisticas/', {'vehiculo': ajeno.id})
+        self.assertEqual(response.data['total_cargas'], 0)
+
+
+class CargaMasivaTests(APITestCase):
+    """Pruebas del endpoint de creación de cargas en lote"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('conductor', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario)
+        cls.otro = crear_vehiculo(cls.usuario, placa='UIO-5678')
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def lote(self, cantidad, vehiculo=None, kilometraje_inicial=1000):
+        vehiculo = vehiculo or self.vehiculo
+        return [
+            {
+                'vehiculo': vehiculo.id,
+                'fecha': (timezone.now() - timedelta(days=cantidad - i)).isoformat(),
+                'kilometraje': kilometraje_inicial + i * 300,
+                'galones': '10.00',
+                'precio_galon': '2.50',
+                'tipo_combustible': 'EXTRA',
+                'tanque_lleno': True,
+            }
+            for i in range(cantidad)
+        ]
+
+    def crear_lote(self, cargas):
+        return self.client.post('/api/fuel-logs/bulk/', cargas, format='json')
+
+    def test_crea_y_actualiza_kilometraje_con_el_maximo(self):
+        response = self.crear_lote(self.lote(3) + self.lote(2, vehiculo=self.otro, kilometraje_inicial=500))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 5)
+        self.assertEqual(response.data['kilometraje_vehiculos'], {self.vehiculo.id: 1600, self.otro.id: 800})
+
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.kilometraje_actual, 1600)
+        self.assertGreater(self.vehiculo.version, 0)
+        resumen = self.vehiculo.resumen
+        self.assertEqual(resumen.total_cargas, 3)
+        self.assertEqual(resumen.total_costo_combustible, Decimal('75.00'))
+        self.assertEqual(resumen.ultimo_kilometraje, 1600)
+        self.assertEqual(resumen.rendimiento_reciente, 30.0)
+
+    def test_acepta_objeto_con_cargas(self):
+        response = self.crear_lote({'cargas': self.lote(2)})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(CargaCombustible.objects.count(), 2)
+
+    def test_consultas_independientes_del_tamano(self):
+        with CaptureQueriesContext(connection) as pocas:
+            self.crear_lote(self.lote(2))
+        with CaptureQueriesContext(connection) as muchas:
+            self.crear_lote(self.lote(40, kilometraje_inicial=5000))
+        self.assertEqual(len(pocas.captured_queries), len(muchas.captured_queries))
+        self.assertEqual(CargaCombustible.objects.count(), 42)
+
+    def test_errores_por_indice_sin_crear_nada(self):
+        cargas = self.lote(3)
+        cargas[1]['galones'] = '0'
+        cargas[2]['vehiculo'] = crear_vehiculo(User.objects.create_user('otro'), placa='CUE-9012').id
+        response = self.crear_lote(cargas)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['indice'] for error in response.data['errores']], [1, 2])
+        self.assertIn('galones', response.data['errores'][0]['errores'])
+        self.assertIn('vehiculo', response.data['errores'][1]['errores'])
+        self.assertFalse(CargaCombustible.objects.exists())
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.kilometraje_actual, 0)
+
+    def test_valida_contra_kilometraje_actual(self):
+        Vehiculo.objects.filter(pk=self.vehiculo.pk).update(kilometraje_actual=1200)
+        response = self.crear_lote(self.lote(2))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errores'][0]['indice'], 0)
 
-# Create your tests here.
+    def test_lote_vacio_o_excedido(self):
+        self.assertEqual(self.crear_lote([]).status_code, 400)
+        with mock.patch('apps.fuel_logs.views.CargaCombustibleViewSet.MAXIMO_CARGAS_LOTE', 2):
+            self.assertEqual(self.crear_lote(self.lote(3)).status_code, 400)
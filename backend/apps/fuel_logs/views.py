@@ -2,32 +2,104 @@ from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Avg, Count
-from .models import CargaCombustible
+from apps.authentication.authentication import JWTSinConsultaAuthentication
+from apps.core.cache import estadisticas_en_cache
+from apps.core.mixins import GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin, TransferenciaMixin
+from apps.core.paginacion import PaginacionConCursorOpcional
+from apps.vehicles.models import Vehiculo
+from .models import CargaCombustible, asignar_rendimiento
 from .serializers import CargaCombustibleSerializer
 
 
-class CargaCombustibleViewSet(viewsets.ModelViewSet):
+class CargaCombustibleViewSet(GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin, TransferenciaMixin, viewsets.ModelViewSet):
     """ViewSet para el modelo CargaCombustible"""
 
     queryset = CargaCombustible.objects.all()
     serializer_class = CargaCombustibleSerializer
+    authentication_classes = [JWTSinConsultaAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['tipo_combustible', 'estacion_servicio']
     ordering_fields = ['fecha', 'kilometraje', 'galones', 'costo_total']
     ordering = ['-fecha']
+    # ?cursor= activa la paginación keyset sobre (fecha, id)
+    pagination_class = PaginacionConCursorOpcional
+
+    # Cantidad máxima de cargas aceptadas por POST /bulk/
+    MAXIMO_CARGAS_LOTE = 1000
 
     def get_queryset(self):
         """Filtra las cargas por vehículos del usuario actual"""
         # Solo cargas de vehículos del usuario autenticado
-        queryset = CargaCombustible.objects.filter(vehiculo__usuario=self.request.user)
+        queryset = CargaCombustible.objects.filter(vehiculo__usuario_id=self.request.user.pk)
 
         vehiculo_id = self.request.query_params.get('vehiculo')
         if vehiculo_id:
             queryset = queryset.filter(vehiculo_id=vehiculo_id)
         return queryset
 
+    def paginate_queryset(self, queryset):
+        """Calcula el rendimiento solo para las cargas de la página"""
+        page = super().paginate_queryset(queryset)
+        if page:
+            asignar_rendimiento(page)
+        return page
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Crea cargas en lote en una sola transacción.
+
+        Acepta una lista de cargas (o {"cargas": [...]}) y valida todas
+        contra una única consulta de los vehículos involucrados. Si alguna
+        carga es inválida no se crea ninguna y se reportan los errores por
+        índice.
+        """
+        cargas = request.data if isinstance(request.data, list) else request.data.get('cargas')
+
+        if not isinstance(cargas, list) or not cargas:
+            return Response(
+                {'error': 'Se requiere una lista de cargas'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(cargas) > self.MAXIMO_CARGAS_LOTE:
+            return Response(
+                {'error': f'Se permiten máximo {self.MAXIMO_CARGAS_LOTE} cargas por lote'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        vehiculo_ids = set()
+        for carga in cargas:
+            try:
+                vehiculo_ids.add(int(carga.get('vehiculo')))
+            except (AttributeError, TypeError, ValueError):
+                pass
+        vehiculos = Vehiculo.objects.filter(usuario_id=request.user.pk).in_bulk(vehiculo_ids)
+
+        serializer = self.get_serializer(
+            data=cargas,
+            many=True,
+            context={**self.get_serializer_context(), 'vehiculos': vehiculos}
+        )
+        if not serializer.is_valid():
+            return Response({
+                'errores': [
+                    {'indice': indice, 'errores': errores}
+                    for indice, errores in enumerate(serializer.errors) if errores
+                ]
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        creadas = serializer.save()
+
+        return Response({
+            'creadas': len(creadas),
+            'kilometraje_vehiculos': dict(
+                Vehiculo.objects.filter(pk__in={carga.vehiculo_id for carga in creadas})
+                .values_list('id', 'kilometraje_actual')
+            )
+        }, status=status.HTTP_201_CREATED)
+
     @action(detail=False, methods=['get'])
     def estadisticas(self, request):
         """Retorna estadísticas de consumo de combustible"""
@@ -39,38 +111,8 @@ class CargaCombustibleViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        cargas = CargaCombustible.objects.filter(vehiculo_id=vehiculo_id)
-
-        if not cargas.exists():
-            return Response({
-                'total_cargas': 0,
-                'total_galones': 0,
-                'total_costo': 0,
-                'promedio_galones': 0,
-                'promedio_costo': 0,
-                'rendimiento_promedio': None
-            })
-
-        # Calcular estadísticas
-        total_cargas = cargas.count()
-        total_galones = cargas.aggregate(Sum('galones'))['galones__sum'] or 0
-        total_costo = cargas.aggregate(Sum('costo_total'))['costo_total__sum'] or 0
-        promedio_galones = cargas.aggregate(Avg('galones'))['galones__avg'] or 0
-        promedio_costo = cargas.aggregate(Avg('costo_total'))['costo_total__avg'] or 0
-
-        # Calcular rendimiento promedio (solo de cargas con tanque lleno)
-        rendimientos = []
-        for carga in cargas.filter(tanque_lleno=True):
-            if carga.rendimiento:
-                rendimientos.append(carga.rendimiento)
-
-        rendimiento_promedio = sum(rendimientos) / len(rendimientos) if rendimientos else None
-
-        return Response({
-            'total_cargas': total_cargas,
-            'total_galones': float(total_galones),
-            'total_costo': float(total_costo),
-            'promedio_galones': float(promedio_galones),
-            'promedio_costo': float(promedio_costo),
-            'rendimiento_promedio': rendimiento_promedio
-        })
+        cargas = CargaCombustible.objects.filter(
+            vehiculo__usuario_id=request.user.pk,
+            vehiculo_id=vehiculo_id
+        )
+        return Response(estadisticas_en_cache('combustible', request, vehiculo_id, cargas.estadisticas))
@@ -60,8 +60,13 @@ class AlertaMantenimientoAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        """Anota el vencimiento en SQL para no consultar el vehículo por fila"""
+        return super().get_queryset(request).select_related('vehiculo').con_estado()
+
     def esta_vencida_display(self, obj):
         """Muestra si la alerta está vencida"""
-        return "Sí" if obj.esta_vencida else "No"
+        return obj.esta_vencida
     esta_vencida_display.short_description = 'Vencida'
     esta_vencida_display.boolean = True
+    esta_vencida_display.admin_order_field = 'esta_vencida'
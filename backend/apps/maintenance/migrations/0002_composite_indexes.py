@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alertamantenimiento',
+            index=models.Index(fields=['vehiculo', 'activa', 'fecha_objetivo'], name='alerta_vehiculo_activa_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mantenimiento',
+            index=models.Index(fields=['vehiculo', 'fecha'], name='mant_vehiculo_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mantenimiento',
+            index=models.Index(fields=['vehiculo', 'tipo', 'categoria'], name='mant_vehiculo_tipo_cat_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('maintenance', '0002_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alertamantenimiento',
+            index=models.Index(fields=['vehiculo', 'fecha_actualizacion'], name='alerta_vehiculo_act_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mantenimiento',
+            index=models.Index(fields=['vehiculo', 'fecha_actualizacion'], name='mant_vehiculo_act_idx'),
+        ),
+    ]
@@ -1,8 +1,94 @@
-from django.db import models
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models import Avg, BooleanField, Case, Count, F, Q, Sum, Value, When
+from django.db.models.functions import TruncMonth, TruncYear
 from django.utils import timezone
+from django.utils.functional import cached_property
 from apps.vehicles.models import Vehiculo
 
 
+class MantenimientoQuerySet(models.QuerySet):
+    """QuerySet con utilidades de estadísticas para Mantenimiento"""
+
+    # Periodo de agrupación -> (truncado, campos del resultado)
+    AGRUPACIONES = {
+        'anio': (TruncYear, ('anio',)),
+        'mes': (TruncMonth, ('anio', 'mes')),
+    }
+
+    def estadisticas(self):
+        """
+        Retorna totales, conteos y costos por tipo y por categoría usando
+        agregación condicional en una sola consulta.
+        """
+        agregados = {
+            'total_mantenimientos': Count('id'),
+            'total_costo': Sum('costo'),
+            'promedio_costo': Avg('costo'),
+        }
+        for campo, opciones in (('tipo', Mantenimiento.TIPO_MANTENIMIENTO),
+                                ('categoria', Mantenimiento.CATEGORIA_MANTENIMIENTO)):
+            for clave, _ in opciones:
+                condicion = Q(**{campo: clave})
+                agregados[f'{campo}_{clave}_total'] = Count('id', filter=condicion)
+                agregados[f'{campo}_{clave}_costo'] = Sum('costo', filter=condicion)
+
+        resultado = self.order_by().aggregate(**agregados)
+
+        def desglose(campo, opciones):
+            conteos, costos = {}, {}
+            for clave, _ in opciones:
+                total = resultado[f'{campo}_{clave}_total']
+                if total > 0:
+                    conteos[clave] = total
+                    costos[clave] = float(resultado[f'{campo}_{clave}_costo'] or 0)
+            return conteos, costos
+
+        por_tipo, costo_por_tipo = desglose('tipo', Mantenimiento.TIPO_MANTENIMIENTO)
+        por_categoria, costo_por_categoria = desglose('categoria', Mantenimiento.CATEGORIA_MANTENIMIENTO)
+
+        return {
+            'total_mantenimientos': resultado['total_mantenimientos'],
+            'total_costo': float(resultado['total_costo'] or 0),
+            'promedio_costo': float(resultado['promedio_costo'] or 0),
+            'por_tipo': por_tipo,
+            'por_categoria': por_categoria,
+            'costo_por_tipo': costo_por_tipo,
+            'costo_por_categoria': costo_por_categoria,
+        }
+
+    def por_periodo(self, agrupar):
+        """
+        Retorna cantidad y costo agrupados por año ('anio') o por mes ('mes')
+        en la zona horaria actual.
+
+        El truncado convierte en la base de datos con la zona explícita: en
+        MySQL (CONVERT_TZ) requiere las tablas de zonas horarias cargadas
+        (mysql_tzinfo_to_sql, o CALL mysql.az_load_timezone() en Azure MySQL);
+        sin ellas el periodo resulta NULL y se lanza ImproperlyConfigured en
+        lugar de retornar grupos vacíos.
+        """
+        truncado, campos = self.AGRUPACIONES[agrupar]
+        periodos = self.annotate(
+            periodo=truncado('fecha', tzinfo=timezone.get_current_timezone())
+        ).values('periodo').annotate(
+            total=Count('id'),
+            costo=Sum('costo'),
+        ).order_by('periodo')
+
+        periodos = list(periodos)
+        if any(periodo['periodo'] is None for periodo in periodos):
+            raise ImproperlyConfigured('La base de datos no tiene cargadas las tablas de zonas horarias')
+
+        return [
+            {'anio': periodo['periodo'].year,
+             **({'mes': periodo['periodo'].month} if 'mes' in campos else {}),
+             'total': periodo['total'],
+             'costo': float(periodo['costo'] or 0)}
+            for periodo in periodos
+        ]
+
+
 class Mantenimiento(models.Model):
     """Modelo para registrar mantenimientos de vehículos"""
 
@@ -48,14 +134,55 @@ class Mantenimiento(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
+    objects = MantenimientoQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Mantenimiento'
         verbose_name_plural = 'Mantenimientos'
         ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['vehiculo', 'fecha'], name='mant_vehiculo_fecha_idx'),
+            models.Index(fields=['vehiculo', 'tipo', 'categoria'], name='mant_vehiculo_tipo_cat_idx'),
+            models.Index(fields=['vehiculo', 'fecha_actualizacion'], name='mant_vehiculo_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vehiculo} - {self.get_tipo_display()} - {self.fecha.strftime('%Y-%m-%d')}"
 
+    def save(self, *args, **kwargs):
+        """Guarda dentro de una transacción que incluye la actualización del resumen del vehículo"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+
+class AlertaMantenimientoQuerySet(models.QuerySet):
+    """QuerySet para resolver el vencimiento de alertas en SQL"""
+
+    @staticmethod
+    def condicion_vencida():
+        """
+        Alerta activa cuya fecha objetivo ya pasó o cuyo kilometraje objetivo
+        fue alcanzado por el vehículo (JOIN con vehiculo vía F-expression).
+        """
+        return Q(activa=True) & (
+            Q(fecha_objetivo__lt=timezone.localdate()) |
+            Q(kilometraje_objetivo__lte=F('vehiculo__kilometraje_actual'))
+        )
+
+    def con_estado(self):
+        """Anota esta_vencida para evitar leer el vehículo por cada alerta"""
+        return self.annotate(
+            esta_vencida=Case(
+                When(self.condicion_vencida(), then=Value(True)),
+                default=Value(False),
+                output_field=BooleanField(),
+            )
+        )
+
+    def vencidas(self):
+        """Filtra las alertas vencidas con un único predicado SQL"""
+        return self.filter(self.condicion_vencida())
+
 
 class AlertaMantenimiento(models.Model):
     """Modelo para alertas y recordatorios de mantenimiento"""
@@ -85,24 +212,40 @@ class AlertaMantenimiento(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
 
+    objects = AlertaMantenimientoQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Alerta de Mantenimiento'
         verbose_name_plural = 'Alertas de Mantenimiento'
         ordering = ['-prioridad', 'fecha_objetivo']
+        indexes = [
+            models.Index(fields=['vehiculo', 'activa', 'fecha_objetivo'], name='alerta_vehiculo_activa_idx'),
+            models.Index(fields=['vehiculo', 'fecha_actualizacion'], name='alerta_vehiculo_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.vehiculo} - {self.titulo}"
 
-    @property
+    def save(self, *args, **kwargs):
+        """Guarda dentro de una transacción que incluye la actualización del resumen del vehículo"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    @cached_property
     def esta_vencida(self):
-        """Verifica si la alerta está vencida"""
+        """
+        Verifica si la alerta está vencida.
+
+        Los querysets con con_estado() asignan este valor desde SQL; el cálculo
+        en Python solo se usa para instancias sin anotar.
+        """
         if not self.activa:
             return False
 
-        if self.fecha_objetivo and self.fecha_objetivo < timezone.now().date():
+        if self.fecha_objetivo and self.fecha_objetivo < timezone.localdate():
             return True
 
-        if self.kilometraje_objetivo and self.vehiculo.kilometraje_actual >= self.kilometraje_objetivo:
+        if self.kilometraje_objetivo is not None and self.vehiculo.kilometraje_actual >= self.kilometraje_objetivo:
             return True
 
         return False
@@ -1,12 +1,41 @@
+from django.db import transaction
 from rest_framework import serializers
+from apps.vehicles.resumen import contribucion_mantenimiento, registrar_lote
+from apps.vehicles.serializers import VehiculoDelUsuarioField
+from apps.vehicles.models import Vehiculo
 from .models import Mantenimiento, AlertaMantenimiento
 
 
+class MantenimientoListSerializer(serializers.ListSerializer):
+    """Crea mantenimientos en lote con bulk_create"""
+
+    def create(self, validated_data):
+        mantenimientos = [Mantenimiento(**datos) for datos in validated_data]
+
+        with transaction.atomic():
+            Mantenimiento.objects.bulk_create(mantenimientos, batch_size=500)
+            # bulk_create no envía señales: actualizar resumen y versión aquí
+            registrar_lote(mantenimientos, contribucion_mantenimiento)
+
+        return mantenimientos
+
+
 class MantenimientoSerializer(serializers.ModelSerializer):
     """Serializer para el modelo Mantenimiento"""
 
+    vehiculo = VehiculoDelUsuarioField(queryset=Vehiculo.objects.all())
     vehiculo_info = serializers.SerializerMethodField(read_only=True)
 
+    # Columnas de importación/exportación en CSV o NDJSON
+    columnas_transferencia = (
+        'vehiculo', 'placa', 'fecha', 'tipo', 'categoria', 'descripcion',
+        'kilometraje', 'costo', 'taller', 'repuestos_utilizados',
+        'proximo_mantenimiento_km', 'proximo_mantenimiento_fecha', 'completado'
+    )
+
+    # Relaciones que el viewset carga con select_related/only()
+    relaciones = {'vehiculo': ('id', 'marca', 'modelo', 'placa')}
+
     class Meta:
         model = Mantenimiento
         fields = [
@@ -16,6 +45,7 @@ class MantenimientoSerializer(serializers.ModelSerializer):
             'fecha_creacion', 'fecha_actualizacion'
         ]
         read_only_fields = ['fecha_creacion', 'fecha_actualizacion']
+        list_serializer_class = MantenimientoListSerializer
 
     def get_vehiculo_info(self, obj):
         """Retorna información básica del vehículo"""
@@ -43,7 +73,10 @@ class AlertaMantenimientoSerializer(serializers.ModelSerializer):
     """Serializer para el modelo AlertaMantenimiento"""
 
     vehiculo_info = serializers.SerializerMethodField(read_only=True)
-    esta_vencida = serializers.ReadOnlyField()
+    esta_vencida = serializers.BooleanField(read_only=True)
+
+    # Relaciones que el viewset carga con select_related/only()
+    relaciones = {'vehiculo': ('id', 'marca', 'modelo', 'placa')}
 
     class Meta:
         model = AlertaMantenimiento
@@ -64,6 +97,12 @@ class AlertaMantenimientoSerializer(serializers.ModelSerializer):
             'placa': obj.vehiculo.placa
         }
 
+    def update(self, instance, validated_data):
+        """Actualiza la alerta descartando el estado de vencimiento anotado"""
+        instance = super().update(instance, validated_data)
+        instance.__dict__.pop('esta_vencida', None)
+        return instance
+
     def validate(self, data):
         """Validaciones a nivel de objeto"""
         # Al menos uno de los objetivos debe estar presente
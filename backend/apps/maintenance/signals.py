@@ -0,0 +1,60 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from apps.vehicles.eliminacion import en_eliminacion
+from apps.vehicles.models import Vehiculo
+from apps.vehicles.resumen import (
+    contribucion_alerta, contribucion_mantenimiento, recordar_vehiculo, registrar_escritura
+)
+from .models import AlertaMantenimiento, Mantenimiento
+
+
+@receiver(post_init, sender=Mantenimiento)
+def recordar_vehiculo_original(sender, instance, **kwargs):
+    """Guarda el vehículo cargado para invalidar también el anterior si cambia"""
+    instance._vehiculo_id_original = instance.__dict__.get('vehiculo_id')
+    recordar_vehiculo(instance)
+
+
+@receiver(post_save, sender=Mantenimiento)
+@receiver(post_delete, sender=Mantenimiento)
+@receiver(post_save, sender=AlertaMantenimiento)
+@receiver(post_delete, sender=AlertaMantenimiento)
+def invalidar_estadisticas_vehiculo(sender, instance, **kwargs):
+    """Incrementa la versión del vehículo al confirmar la escritura o borrar un mantenimiento o alerta"""
+    if en_eliminacion(instance.vehiculo_id):
+        return
+    vehiculo_ids = {instance.vehiculo_id, getattr(instance, '_vehiculo_id_original', None)} - {None}
+    instance._vehiculo_id_original = instance.vehiculo_id
+
+    # Al confirmar: una lectura concurrente antes del commit cachearía datos viejos con la versión nueva
+    transaction.on_commit(Vehiculo.objects.filter(pk__in=vehiculo_ids).incrementar_version)
+
+
+@receiver(post_save, sender=Mantenimiento)
+@receiver(post_delete, sender=Mantenimiento)
+def actualizar_resumen_mantenimiento(sender, instance, **kwargs):
+    """Actualiza el resumen del vehículo dentro de la transacción de la escritura"""
+    if en_eliminacion(instance.vehiculo_id):
+        return
+    registrar_escritura(
+        instance, contribucion_mantenimiento, creado=kwargs.get('created', False), eliminado=kwargs['signal'] is post_delete
+    )
+
+
+@receiver(post_init, sender=AlertaMantenimiento)
+def recordar_alerta_original(sender, instance, **kwargs):
+    instance._vehiculo_id_original = instance.__dict__.get('vehiculo_id')
+    recordar_vehiculo(instance)
+
+
+@receiver(post_save, sender=AlertaMantenimiento)
+@receiver(post_delete, sender=AlertaMantenimiento)
+def actualizar_resumen_alerta(sender, instance, **kwargs):
+    """Actualiza las alertas abiertas del resumen del vehículo"""
+    if en_eliminacion(instance.vehiculo_id):
+        return
+    registrar_escritura(
+        instance, contribucion_alerta, creado=kwargs.get('created', False), eliminado=kwargs['signal'] is post_delete
+    )
@@ -1,3 +1,174 @@
-from django.test import TestCase
+from datetime import datetime, timedelta
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.core.cache import cache_estadisticas
+from apps.vehicles.models import Vehiculo
+from .models import AlertaMantenimiento, Mantenimiento
+
+
+def crear_vehiculo(usuario, placa='GYE-1234', kilometraje_actual=0):
+    return Vehiculo.objects.create(
+        usuario=usuario, marca='Toyota', modelo='Hilux', año=2019,
+        placa=placa, capacidad_tanque=Decimal('20.00'),
+        kilometraje_actual=kilometraje_actual
+    )
+
+
+def crear_mantenimiento(vehiculo, fecha, tipo='PREVENTIVO', categoria='MOTOR', costo='100.00', **extra):
+    return Mantenimiento.objects.create(
+        vehiculo=vehiculo,
+        fecha=timezone.make_aware(datetime.fromisoformat(fecha)),
+        tipo=tipo,
+        categoria=categoria,
+        descripcion='Mantenimiento de prueba',
+        kilometraje=extra.pop('kilometraje', 1000),
+        costo=Decimal(costo),
+        **extra
+    )
+
+
+class EstadisticasMantenimientoTests(APITestCase):
+    """Pruebas del endpoint de estadísticas de mantenimiento"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('mecanico', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario)
+        crear_mantenimiento(cls.vehiculo, '2024-11-10 10:00', costo='50.00')
+        crear_mantenimiento(cls.vehiculo, '2025-01-15 10:00', tipo='CORRECTIVO', categoria='FRENOS', costo='120.00')
+        crear_mantenimiento(cls.vehiculo, '2025-01-20 10:00', costo='80.00')
+        crear_mantenimiento(cls.vehiculo, '2025-03-05 10:00', tipo='EMERGENCIA', categoria='FRENOS', costo='200.00')
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+        cache_estadisticas().clear()
+
+    def estadisticas(self, **params):
+        return self.client.get(
+            '/api/maintenance/mantenimientos/estadisticas/',
+            {'vehiculo': self.vehiculo.id, **params}
+        )
+
+    def test_desglose_por_tipo_y_categoria(self):
+        response = self.estadisticas()
+        self.assertEqual(response.data['total_mantenimientos'], 4)
+        self.assertEqual(response.data['total_costo'], 450.0)
+        self.assertEqual(response.data['por_tipo'], {'PREVENTIVO': 2, 'CORRECTIVO': 1, 'EMERGENCIA': 1})
+        self.assertEqual(response.data['por_categoria'], {'MOTOR': 2, 'FRENOS': 2})
+        self.assertEqual(response.data['costo_por_categoria'], {'MOTOR': 130.0, 'FRENOS': 320.0})
+        self.assertNotIn('por_periodo', response.data)
+
+    def test_agregacion_en_una_consulta(self):
+        mantenimientos = Mantenimiento.objects.filter(vehiculo=self.vehiculo)
+        with self.assertNumQueries(1):
+            mantenimientos.estadisticas()
+        with self.assertNumQueries(1):
+            mantenimientos.por_periodo('mes')
+
+    def test_rango_de_fechas_y_agrupacion_mensual(self):
+        response = self.estadisticas(desde='2025-01-01', hasta='2025-12-31', agrupar='mes')
+        self.assertEqual(response.data['total_mantenimientos'], 3)
+        self.assertEqual(response.data['por_periodo'], [
+            {'anio': 2025, 'mes': 1, 'total': 2, 'costo': 200.0},
+            {'anio': 2025, 'mes': 3, 'total': 1, 'costo': 200.0},
+        ])
+
+    def test_agrupacion_anual(self):
+        response = self.estadisticas(agrupar='anio')
+        self.assertEqual(response.data['por_periodo'], [
+            {'anio': 2024, 'total': 1, 'costo': 50.0},
+            {'anio': 2025, 'total': 3, 'costo': 400.0},
+        ])
+
+    def test_limites_en_dias_locales(self):
+        # 23:30 en Guayaquil ya es el día siguiente en UTC
+        crear_mantenimiento(self.vehiculo, '2025-03-31 23:30', costo='10.00')
+        crear_mantenimiento(self.vehiculo, '2025-04-01 00:00', costo='20.00')
+        response = self.estadisticas(desde='2025-03-05', hasta='2025-03-31', agrupar='mes')
+        self.assertEqual(response.data['total_mantenimientos'], 2)
+        self.assertEqual(response.data['por_periodo'], [
+            {'anio': 2025, 'mes': 3, 'total': 2, 'costo': 210.0},
+        ])
+
+    def test_parametros_invalidos(self):
+        self.assertEqual(self.estadisticas(desde='15/01/2025').status_code, 400)
+        self.assertEqual(self.estadisticas(agrupar='semana').status_code, 400)
+
+    def test_vehiculo_sin_mantenimientos(self):
+        vacio = crear_vehiculo(self.usuario, placa='UIO-5678')
+        response = self.client.get(
+            '/api/maintenance/mantenimientos/estadisticas/', {'vehiculo': vacio.id}
+        )
+        self.assertEqual(response.data['total_mantenimientos'], 0)
+        self.assertEqual(response.data['por_tipo'], {})
+
+
+class AlertasVencidasTests(APITestCase):
+    """Pruebas de la detección de alertas vencidas en SQL"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('mecanico', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario, kilometraje_actual=10000)
+        hoy = timezone.localdate()
+        cls.por_fecha = cls.crear_alerta('Revisión técnica', fecha_objetivo=hoy - timedelta(days=1))
+        cls.por_km = cls.crear_alerta('Cambio de aceite', kilometraje_objetivo=10000)
+        cls.crear_alerta('Frenos', kilometraje_objetivo=15000, fecha_objetivo=hoy + timedelta(days=30))
+        cls.crear_alerta('Inactiva', kilometraje_objetivo=5000, activa=False)
+
+    @classmethod
+    def crear_alerta(cls, titulo, **extra):
+        return AlertaMantenimiento.objects.create(
+            vehiculo=cls.vehiculo, titulo=titulo, descripcion=titulo, **extra
+        )
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def test_vencidas_en_una_consulta(self):
+        with self.assertNumQueries(1):
+            ids = {alerta.id for alerta in AlertaMantenimiento.objects.vencidas()}
+        self.assertEqual(ids, {self.por_fecha.id, self.por_km.id})
+
+    def test_anotacion_coincide_con_calculo_en_python(self):
+        esperados = {
+            alerta.id: alerta.esta_vencida
+            for alerta in AlertaMantenimiento.objects.all()
+        }
+        with self.assertNumQueries(1):
+            anotados = {
+                alerta.id: alerta.esta_vencida
+                for alerta in AlertaMantenimiento.objects.con_estado()
+            }
+        self.assertEqual(anotados, esperados)
+
+    def test_endpoint_vencidas(self):
+        response = self.client.get('/api/maintenance/alertas/vencidas/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {alerta['id'] for alerta in response.data},
+            {self.por_fecha.id, self.por_km.id}
+        )
+        self.assertTrue(all(alerta['esta_vencida'] for alerta in response.data))
+
+    def test_listado_expone_esta_vencida(self):
+        response = self.client.get('/api/maintenance/alertas/')
+        estados = {alerta['titulo']: alerta['esta_vencida'] for alerta in response.data['results']}
+        self.assertEqual(estados, {
+            'Revisión técnica': True,
+            'Cambio de aceite': True,
+            'Frenos': False,
+            'Inactiva': False,
+        })
+
+    def test_actualizar_recalcula_esta_vencida(self):
+        response = self.client.patch(
+            f'/api/maintenance/alertas/{self.por_km.id}/',
+            {'kilometraje_objetivo': 20000}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['esta_vencida'])
@@ -1,27 +1,37 @@
+from datetime import datetime, time, timedelta
+
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Avg, Count
-from .models import Mantenimiento, AlertaMantenimiento
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from apps.authentication.authentication import JWTSinConsultaAuthentication
+from apps.core.cache import estadisticas_en_cache
+from apps.core.mixins import GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin, TransferenciaMixin
+from apps.core.paginacion import PaginacionConCursorOpcional
+from .models import Mantenimiento, AlertaMantenimiento, MantenimientoQuerySet
 from .serializers import MantenimientoSerializer, AlertaMantenimientoSerializer
 
 
-class MantenimientoViewSet(viewsets.ModelViewSet):
+class MantenimientoViewSet(GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin, TransferenciaMixin, viewsets.ModelViewSet):
     """ViewSet para el modelo Mantenimiento"""
 
     queryset = Mantenimiento.objects.all()
     serializer_class = MantenimientoSerializer
+    authentication_classes = [JWTSinConsultaAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['tipo', 'categoria', 'descripcion', 'taller']
     ordering_fields = ['fecha', 'kilometraje', 'costo']
     ordering = ['-fecha']
+    # ?cursor= activa la paginación keyset sobre (fecha, id)
+    pagination_class = PaginacionConCursorOpcional
 
     def get_queryset(self):
         """Filtra los mantenimientos por vehículos del usuario actual"""
         # Solo mantenimientos de vehículos del usuario autenticado
-        queryset = Mantenimiento.objects.filter(vehiculo__usuario=self.request.user)
+        queryset = Mantenimiento.objects.filter(vehiculo__usuario_id=self.request.user.pk)
 
         vehiculo_id = self.request.query_params.get('vehiculo')
         if vehiculo_id:
@@ -50,61 +60,69 @@ class MantenimientoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        mantenimientos = Mantenimiento.objects.filter(vehiculo_id=vehiculo_id)
-
-        if not mantenimientos.exists():
-            return Response({
-                'total_mantenimientos': 0,
-                'total_costo': 0,
-                'promedio_costo': 0,
-                'por_tipo': {},
-                'por_categoria': {}
-            })
-
-        total_mantenimientos = mantenimientos.count()
-        total_costo = mantenimientos.aggregate(Sum('costo'))['costo__sum'] or 0
-        promedio_costo = mantenimientos.aggregate(Avg('costo'))['costo__avg'] or 0
-
-        # Estadísticas por tipo
-        por_tipo = {}
-        for tipo_choice in Mantenimiento.TIPO_MANTENIMIENTO:
-            tipo_key = tipo_choice[0]
-            count = mantenimientos.filter(tipo=tipo_key).count()
-            if count > 0:
-                por_tipo[tipo_key] = count
-
-        # Estadísticas por categoría
-        por_categoria = {}
-        for cat_choice in Mantenimiento.CATEGORIA_MANTENIMIENTO:
-            cat_key = cat_choice[0]
-            count = mantenimientos.filter(categoria=cat_key).count()
-            if count > 0:
-                por_categoria[cat_key] = count
-
-        return Response({
-            'total_mantenimientos': total_mantenimientos,
-            'total_costo': float(total_costo),
-            'promedio_costo': float(promedio_costo),
-            'por_tipo': por_tipo,
-            'por_categoria': por_categoria
-        })
-
-
-class AlertaMantenimientoViewSet(viewsets.ModelViewSet):
+        mantenimientos = Mantenimiento.objects.filter(
+            vehiculo__usuario_id=request.user.pk,
+            vehiculo_id=vehiculo_id
+        )
+
+        # Filtrar por rango de fechas (YYYY-MM-DD, días locales). Se compara la
+        # columna contra instantes para usar el índice (vehiculo, fecha): con
+        # fecha__date MySQL aplicaría DATE(CONVERT_TZ(...)) a cada fila
+        for parametro, lookup, dias in (('desde', 'fecha__gte', 0), ('hasta', 'fecha__lt', 1)):
+            valor = request.query_params.get(parametro)
+            if not valor:
+                continue
+            try:
+                fecha = parse_date(valor)
+            except ValueError:
+                fecha = None
+            if fecha is None:
+                return Response(
+                    {'error': f'El parámetro {parametro} debe tener formato YYYY-MM-DD'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            limite = timezone.make_aware(datetime.combine(fecha + timedelta(days=dias), time.min))
+            mantenimientos = mantenimientos.filter(**{lookup: limite})
+
+        agrupar = request.query_params.get('agrupar')
+        if agrupar and agrupar not in MantenimientoQuerySet.AGRUPACIONES:
+            return Response(
+                {'error': 'El parámetro agrupar debe ser "anio" o "mes"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        def calcular():
+            estadisticas = mantenimientos.estadisticas()
+            if agrupar:
+                estadisticas['por_periodo'] = mantenimientos.por_periodo(agrupar)
+            return estadisticas
+
+        return Response(estadisticas_en_cache('mantenimiento', request, vehiculo_id, calcular))
+
+
+class AlertaMantenimientoViewSet(GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin, viewsets.ModelViewSet):
     """ViewSet para el modelo AlertaMantenimiento"""
 
     queryset = AlertaMantenimiento.objects.all()
     serializer_class = AlertaMantenimientoSerializer
+    authentication_classes = [JWTSinConsultaAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['titulo', 'descripcion']
     ordering_fields = ['fecha_objetivo', 'kilometraje_objetivo', 'prioridad']
     ordering = ['-prioridad', 'fecha_objetivo']
+    # ?cursor= activa la paginación keyset sobre (fecha_creacion, id)
+    pagination_class = PaginacionConCursorOpcional
+    campo_cursor = 'fecha_creacion'
+    # esta_vencida depende de la fecha actual
+    validador_diario = True
 
     def get_queryset(self):
         """Filtra las alertas por vehículos del usuario actual"""
         # Solo alertas de vehículos del usuario autenticado
-        queryset = AlertaMantenimiento.objects.filter(vehiculo__usuario=self.request.user)
+        queryset = AlertaMantenimiento.objects.filter(
+            vehiculo__usuario_id=self.request.user.pk
+        ).con_estado()
 
         vehiculo_id = self.request.query_params.get('vehiculo')
         if vehiculo_id:
@@ -126,14 +144,8 @@ class AlertaMantenimientoViewSet(viewsets.ModelViewSet):
         if vehiculo_id:
             queryset = queryset.filter(vehiculo_id=vehiculo_id)
 
-        # Filtrar solo alertas activas
-        queryset = queryset.filter(activa=True)
-
-        # Obtener alertas vencidas
-        alertas_vencidas = []
-        for alerta in queryset:
-            if alerta.esta_vencida:
-                alertas_vencidas.append(alerta)
+        # Filtrar alertas vencidas en SQL
+        queryset = self.optimizar_relaciones(queryset.vencidas())
 
-        serializer = self.get_serializer(alertas_vencidas, many=True)
+        serializer = self.get_serializer(queryset, many=True)
         return Response(serializer.data)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Vehiculo
+from .models import ResumenVehiculo, Vehiculo
 
 
 @admin.register(Vehiculo)
@@ -29,3 +29,21 @@ class VehiculoAdmin(admin.ModelAdmin):
             'classes': ('collapse',)
         }),
     )
+
+    def save_model(self, request, obj, form, change):
+        obj.save(update_fields=Vehiculo.campos_sin_version() if change else None)
+
+
+@admin.register(ResumenVehiculo)
+class ResumenVehiculoAdmin(admin.ModelAdmin):
+    """Configuración del admin para ResumenVehiculo (solo lectura)"""
+
+    list_display = ['vehiculo', 'total_cargas', 'total_galones', 'ultimo_kilometraje', 'rendimiento_reciente', 'total_costo_mantenimiento', 'alertas_abiertas']
+    search_fields = ['vehiculo__placa', 'vehiculo__marca', 'vehiculo__modelo']
+    list_select_related = ['vehiculo']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
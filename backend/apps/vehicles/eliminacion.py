@@ -0,0 +1,53 @@
+"""
+Vehículos que se están borrando en el hilo actual.
+
+Al borrar un vehículo Django borra en cascada sus cargas, mantenimientos y
+alertas enviando post_delete por cada fila. Mientras el vehículo está
+registrado aquí, las señales de esas filas omiten el resumen y la versión
+(desaparecen con el vehículo) y acumulan sus tombstones, que se escriben con
+un solo INSERT al borrar el vehículo.
+
+Cada registro vale solo mientras sigue abierto el bloque atómico del borrado
+(Collector.delete). post_delete del vehículo lo quita; si el borrado falla y
+se revierte, el registro se descarta solo al cerrarse el bloque, sin importar
+si vino de Vehiculo.delete(), de un queryset o de la acción del admin.
+"""
+import threading
+
+from django.db import transaction
+
+
+_local = threading.local()
+
+
+def _registro():
+    if not hasattr(_local, 'vehiculos'):
+        _local.vehiculos = {}
+        _local.bloques = {}
+    return _local.vehiculos, _local.bloques
+
+
+def registrar_en_eliminacion(vehiculo):
+    """Registra el vehículo hasta que se cierre el bloque atómico actual"""
+    bloques_abiertos = transaction.get_connection().atomic_blocks
+    if not bloques_abiertos:
+        return
+    vehiculos, bloques = _registro()
+    vehiculos[vehiculo.pk] = (vehiculo.usuario_id, [])
+    bloques[vehiculo.pk] = bloques_abiertos[-1]
+
+
+def vehiculos_en_eliminacion():
+    """{vehiculo_id: (usuario_id, [Eliminacion pendientes])} del hilo actual"""
+    vehiculos, bloques = _registro()
+    if bloques:
+        abiertos = transaction.get_connection().atomic_blocks
+        for vehiculo_id, bloque in list(bloques.items()):
+            if vehiculo_id not in vehiculos or not any(abierto is bloque for abierto in abiertos):
+                vehiculos.pop(vehiculo_id, None)
+                del bloques[vehiculo_id]
+    return vehiculos
+
+
+def en_eliminacion(vehiculo_id):
+    return vehiculo_id in vehiculos_en_eliminacion()
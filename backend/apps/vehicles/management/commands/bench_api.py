@@ -0,0 +1,81 @@
+import json
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.core.benchmark import (
+    PRESUPUESTO_POR_DEFECTO, comparar_con_presupuesto, ejecutar_benchmark, generar_presupuesto, leer_presupuesto,
+)
+
+
+# Dataset generado cuando no se indica --usuario
+PREFIJO_DATASET = 'bench'
+DATASET = {'usuarios': 1, 'vehiculos_por_usuario': 5, 'anios': 3, 'seed': 42, 'hasta': '2025-12-31'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta el benchmark de todos los endpoints de la API (latencia p50/p95, '
+        'consultas y pico de memoria) y falla si se excede el presupuesto versionado. '
+        'Los escenarios de escritura se revierten al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', help='Username con datos (por defecto se genera una flota "bench")')
+        parser.add_argument('--password', default='demo123', help='Contraseña del usuario (para auth_login)')
+        parser.add_argument('--repeticiones', type=int, default=30, help='Peticiones medidas por escenario')
+        parser.add_argument('--escenario', action='append', help='Ejecuta solo este escenario (repetible)')
+        parser.add_argument('--presupuesto', default=PRESUPUESTO_POR_DEFECTO, help='Archivo JSON de presupuesto')
+        parser.add_argument('--actualizar-presupuesto', action='store_true', help='Reescribe el presupuesto con esta medición')
+        parser.add_argument('--sin-latencia', action='store_true', help='No compara latencias (máquinas ruidosas o CI)')
+        parser.add_argument('--sin-memoria', action='store_true', help='No mide memoria (tracemalloc agrega overhead)')
+
+    def handle(self, *args, **options):
+        if options['repeticiones'] < 1:
+            raise CommandError('--repeticiones debe ser mayor a 0')
+        usuario = self._obtener_usuario(options['usuario'])
+
+        try:
+            resultados = ejecutar_benchmark(
+                usuario, options['password'], options['repeticiones'],
+                medir_memoria=not options['sin_memoria'], escenarios=options['escenario'],
+            )
+        except (AssertionError, ValueError) as error:
+            raise CommandError(str(error))
+
+        self.stdout.write(f'{"escenario":<36} {"p50 ms":>8} {"p95 ms":>8} {"consultas":>9} {"memoria KB":>10}')
+        for nombre, metricas in resultados.items():
+            self.stdout.write(
+                f'{nombre:<36} {metricas["p50_ms"]:>8.2f} {metricas["p95_ms"]:>8.2f} '
+                f'{metricas["consultas"]:>9} {metricas.get("memoria_kb", "-"):>10}'
+            )
+
+        if options['actualizar_presupuesto']:
+            with open(options['presupuesto'], 'w', encoding='utf-8') as archivo:
+                json.dump(generar_presupuesto(resultados), archivo, indent=2, ensure_ascii=False)
+                archivo.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'\nPresupuesto actualizado: {options["presupuesto"]}'))
+            return
+
+        metricas = ['consultas'] + ([] if options['sin_latencia'] else ['p95_ms']) + ['memoria_kb']
+        excesos = comparar_con_presupuesto(resultados, leer_presupuesto(options['presupuesto']), metricas)
+        if excesos:
+            for exceso in excesos:
+                self.stderr.write(f'  {exceso}')
+            raise CommandError(f'{len(excesos)} métrica(s) exceden el presupuesto ({connection.vendor})')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {len(resultados)} escenario(s) dentro del presupuesto'))
+
+    def _obtener_usuario(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No existe el usuario {username}')
+
+        username = f'{PREFIJO_DATASET}_{0:07d}'
+        if not User.objects.filter(username=username).exists():
+            self.stdout.write('Generando dataset de benchmark...')
+            call_command('generate_fleet', prefijo=PREFIJO_DATASET, stdout=self.stdout, **DATASET)
+        return User.objects.get(username=username)
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide peticiones/segundo con conexiones por petición (CONN_MAX_AGE=0) '
+        'y con conexiones persistentes. Con SQLite usar --latencia-conexion para '
+        'simular el handshake TCP + TLS de Azure MySQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/api/vehicles/', help='Endpoint a consultar')
+        parser.add_argument('--peticiones', type=int, default=200, help='Peticiones por modo')
+        parser.add_argument('--usuario', help='Username autenticado (por defecto el primero)')
+        parser.add_argument('--max-age', type=int, default=60, help='CONN_MAX_AGE del modo persistente')
+        parser.add_argument('--latencia-conexion', type=float, default=0, help='Milisegundos añadidos a cada nueva conexión')
+
+    def handle(self, *args, **options):
+        usuario = self._obtener_usuario(options['usuario'])
+        token = AccessToken.for_user(usuario)
+        cliente = Client(HTTP_HOST=settings.ALLOWED_HOSTS[0], HTTP_AUTHORIZATION=f'Bearer {token}')
+
+        nuevas_conexiones = []
+
+        def al_conectar(sender, connection, **kwargs):
+            nuevas_conexiones.append(connection.alias)
+            if options['latencia_conexion']:
+                time.sleep(options['latencia_conexion'] / 1000)
+
+        connection_created.connect(al_conectar)
+        configuracion_original = connection.settings_dict['CONN_MAX_AGE']
+        resultados = []
+        try:
+            for nombre, max_age in (('por petición', 0), ('persistente', options['max_age'])):
+                connection.settings_dict['CONN_MAX_AGE'] = max_age
+                connection.close()
+                nuevas_conexiones.clear()
+
+                inicio = time.perf_counter()
+                for _ in range(options['peticiones']):
+                    response = cliente.get(options['url'], secure=not settings.DEBUG)
+                    if response.status_code != 200:
+                        raise CommandError(f'{options["url"]} respondió {response.status_code}')
+                    # El cliente de pruebas omite el cierre que hace el handler WSGI
+                    close_old_connections()
+                duracion = time.perf_counter() - inicio
+
+                resultados.append((nombre, options['peticiones'] / duracion, len(nuevas_conexiones)))
+        finally:
+            connection_created.disconnect(al_conectar)
+            connection.settings_dict['CONN_MAX_AGE'] = configuracion_original
+            connection.close()
+
+        self.stdout.write(f'{options["peticiones"]} peticiones a {options["url"]} ({connection.vendor})\n')
+        for nombre, por_segundo, conexiones in resultados:
+            self.stdout.write(f'  {nombre:<13} {por_segundo:8.1f} req/s  {conexiones} conexión(es) nuevas')
+
+        base = resultados[0][1]
+        self.stdout.write(self.style.SUCCESS(f'\nMejora: {resultados[1][1] / base:.2f}x'))
+
+    def _obtener_usuario(self, username):
+        usuarios = User.objects.order_by('id')
+        if username:
+            usuarios = usuarios.filter(username=username)
+        usuario = usuarios.first()
+        if usuario is None:
+            raise CommandError('No hay usuarios para autenticar las peticiones')
+        return usuario
@@ -0,0 +1,114 @@
+import re
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.fuel_logs.models import CargaCombustible
+from apps.fuel_logs.views import CargaCombustibleViewSet
+from apps.maintenance.views import MantenimientoViewSet, AlertaMantenimientoViewSet
+from apps.vehicles.views import VehiculoViewSet
+
+
+# Patrones que identifican un recorrido completo de tabla en cada motor
+PATRONES_SCAN = {
+    'mysql': re.compile(r'Table scan on (\w+)'),
+    'sqlite': re.compile(r'\bSCAN (\w+)\b(?! USING)'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+# Formato de EXPLAIN por motor (TREE requiere MySQL 8.0.16+)
+FORMATOS_EXPLAIN = {
+    'mysql': 'TREE',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta EXPLAIN sobre las consultas canónicas de cada viewset y reporta '
+        'recorridos completos de tabla. En tablas pequeñas el planificador puede '
+        'preferir un scan aunque exista el índice.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuario', help='Username cuyas consultas se analizan (por defecto el primero con vehículos)')
+        parser.add_argument('--fail-on-scan', action='store_true', help='Termina con error si se detecta algún full scan')
+
+    def handle(self, *args, **options):
+        patron = PATRONES_SCAN.get(connection.vendor)
+        if patron is None:
+            raise CommandError(f'Motor no soportado: {connection.vendor}')
+
+        usuario = self._obtener_usuario(options['usuario'])
+        vehiculo = usuario.vehiculos.order_by('id').first()
+        if vehiculo is None:
+            raise CommandError(f'El usuario {usuario.username} no tiene vehículos')
+
+        self.stdout.write(f'Analizando consultas de {usuario.username} ({connection.vendor})...\n')
+
+        con_scan = 0
+        for nombre, queryset in self._consultas_canonicas(usuario, vehiculo):
+            plan = queryset.explain(format=FORMATOS_EXPLAIN.get(connection.vendor))
+            tablas = sorted(set(patron.findall(plan)))
+
+            if options['verbosity'] > 1:
+                self.stdout.write(plan)
+
+            if tablas:
+                con_scan += 1
+                self.stdout.write(self.style.WARNING(f'  {nombre}: full scan en {", ".join(tablas)}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'  {nombre}: OK'))
+
+        if con_scan and options['fail_on_scan']:
+            raise CommandError(f'{con_scan} consulta(s) con full scan')
+
+        self.stdout.write(f'\n{con_scan} consulta(s) con full scan')
+
+    def _obtener_usuario(self, username):
+        if username:
+            try:
+                return User.objects.get(username=username)
+            except User.DoesNotExist:
+                raise CommandError(f'No existe el usuario {username}')
+
+        usuario = User.objects.filter(vehiculos__isnull=False).order_by('id').first()
+        if usuario is None:
+            raise CommandError('No hay usuarios con vehículos para analizar')
+        return usuario
+
+    def _consultas_canonicas(self, usuario, vehiculo):
+        """Genera (nombre, queryset) usando los mismos querysets que los viewsets"""
+        listados = [
+            ('vehículos', VehiculoViewSet, {}),
+            ('vehículos activos', VehiculoViewSet, {'activos': 'true'}),
+            ('cargas', CargaCombustibleViewSet, {}),
+            ('cargas por vehículo', CargaCombustibleViewSet, {'vehiculo': vehiculo.id}),
+            ('mantenimientos', MantenimientoViewSet, {}),
+            ('mantenimientos por vehículo', MantenimientoViewSet, {'vehiculo': vehiculo.id}),
+            ('alertas activas', AlertaMantenimientoViewSet, {'activas': 'true'}),
+        ]
+
+        factory = APIRequestFactory()
+
+        def crear_vista(viewset_class, action, params=None):
+            request = Request(factory.get('/', params or {}))
+            request.user = usuario
+            return viewset_class(request=request, action=action, format_kwarg=None, kwargs={})
+
+        for nombre, viewset_class, params in listados:
+            view = crear_vista(viewset_class, 'list', params)
+            yield nombre, view.filter_queryset(view.get_queryset())
+
+        alertas = crear_vista(AlertaMantenimientoViewSet, 'vencidas')
+        yield 'alertas vencidas', alertas.get_queryset().vencidas()
+
+        yield 'rendimiento (pasada ordenada)', CargaCombustible.objects.filter(
+            vehiculo_id=vehiculo.id
+        ).order_by('vehiculo_id', 'fecha', 'id').values_list('kilometraje', 'galones', 'tanque_lleno')
+
+        yield 'carga anterior', CargaCombustible.objects.filter(
+            vehiculo_id=vehiculo.id, fecha__lt=vehiculo.fecha_actualizacion
+        ).order_by('-fecha', '-id')[:1]
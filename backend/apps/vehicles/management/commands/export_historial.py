@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.transferencia import exportar_filas, serializers_transferibles
+
+
+class Command(BaseCommand):
+    help = 'Exporta en streaming el historial de cargas o mantenimientos a CSV/NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modelo', required=True, choices=sorted(serializers_transferibles()))
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], default='csv')
+        parser.add_argument('--usuario', help='Solo vehículos de este username')
+        parser.add_argument('--vehiculo', type=int, action='append', help='Id de vehículo (se puede repetir)')
+        parser.add_argument('--salida', help='Archivo de salida (por defecto la salida estándar)')
+
+    def handle(self, *args, **options):
+        serializer_class = serializers_transferibles()[options['modelo']]
+        queryset = serializer_class.Meta.model.objects.all()
+
+        if options['usuario']:
+            if not User.objects.filter(username=options['usuario']).exists():
+                raise CommandError(f'No existe el usuario {options["usuario"]}')
+            queryset = queryset.filter(vehiculo__usuario__username=options['usuario'])
+        if options['vehiculo']:
+            queryset = queryset.filter(vehiculo_id__in=options['vehiculo'])
+
+        bloques = exportar_filas(queryset, serializer_class.columnas_transferencia, options['formato'])
+
+        if not options['salida']:
+            for bloque in bloques:
+                self.stdout.write(bloque, ending='')
+            return
+
+        with open(options['salida'], 'w', encoding='utf-8', newline='') as salida:
+            for bloque in bloques:
+                salida.write(bloque)
+
+        self.stderr.write(self.style.SUCCESS(f'✅ Historial exportado a {options["salida"]}'))
@@ -0,0 +1,255 @@
+import random
+import time as reloj
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from apps.vehicles.models import Vehiculo
+from apps.vehicles.resumen import reconstruir_resumen
+from apps.fuel_logs.models import CargaCombustible
+from apps.maintenance.models import AlertaMantenimiento, Mantenimiento
+
+
+# (marca, modelo, tipo, capacidad del tanque en galones, rendimiento km/gal, combustible)
+CATALOGO = [
+    ('Chevrolet', 'Sail', 'AUTO', Decimal('11.10'), 42, 'EXTRA'),
+    ('Nissan', 'Versa', 'AUTO', Decimal('10.80'), 40, 'EXTRA'),
+    ('KIA', 'Rio', 'AUTO', Decimal('11.90'), 38, 'ECOPAIS'),
+    ('Hyundai', 'Accent', 'AUTO', Decimal('11.90'), 39, 'EXTRA'),
+    ('KIA', 'Sportage', 'SUV', Decimal('16.40'), 32, 'SUPER'),
+    ('Toyota', 'Fortuner', 'SUV', Decimal('21.10'), 27, 'DIESEL'),
+    ('Toyota', 'Hilux', 'CAMION', Decimal('21.10'), 28, 'DIESEL'),
+    ('Chevrolet', 'D-Max', 'CAMION', Decimal('19.80'), 30, 'DIESEL'),
+    ('Hyundai', 'H1', 'VAN', Decimal('19.80'), 26, 'DIESEL'),
+    ('Suzuki', 'GN 125', 'MOTO', Decimal('2.60'), 95, 'EXTRA'),
+    ('Honda', 'CB 190R', 'MOTO', Decimal('3.20'), 80, 'EXTRA'),
+]
+
+# Precio por galón al inicio del historial (USD)
+PRECIOS_BASE = {
+    'EXTRA': 2.40,
+    'ECOPAIS': 2.40,
+    'SUPER': 3.50,
+    'DIESEL': 1.80,
+}
+
+NOMBRES = ['Juan', 'María', 'Carlos', 'Ana', 'Luis', 'Gabriela', 'Diego', 'Paola', 'Andrés', 'Sofía']
+APELLIDOS = ['Pérez', 'Zambrano', 'Mendoza', 'Andrade', 'Cevallos', 'Vera', 'Castro', 'Salazar']
+COLORES = ['Blanco', 'Negro', 'Gris', 'Plata', 'Rojo', 'Azul']
+GASOLINERAS = ['Primax', 'Petroecuador', 'Mobil', 'Terpel', 'Puma', 'Masgas']
+TALLERES = ['AutoExpress Guayaquil', 'Toyocosta', 'Chevrocentro Quito', 'Mecánica Ramírez', 'Tecnicentro Cuenca']
+
+# categoría, descripción, costo mínimo y máximo de los mantenimientos correctivos
+CORRECTIVOS = [
+    ('FRENOS', 'Cambio de pastillas de freno', 40, 160),
+    ('SUSPENSION', 'Cambio de amortiguadores', 180, 650),
+    ('ELECTRICO', 'Cambio de batería', 90, 220),
+    ('NEUMATICOS', 'Cambio de neumáticos', 200, 900),
+    ('TRANSMISION', 'Cambio de kit de embrague', 250, 800),
+    ('CLIMATIZACION', 'Recarga de aire acondicionado', 35, 120),
+    ('CARROCERIA', 'Reparación de carrocería', 80, 1200),
+]
+
+# Usuarios cuyos vehículos e historiales se generan en una misma transacción
+USUARIOS_POR_LOTE = 50
+
+CENTAVO = Decimal('0.01')
+
+
+def serie_precios(rng, meses):
+    """Precio por galón de cada combustible y mes: caminata aleatoria con deriva alcista"""
+    series = {}
+    for combustible, base in PRECIOS_BASE.items():
+        precio, serie = base, []
+        for _ in range(meses):
+            serie.append(precio)
+            precio = min(max(precio * (1 + rng.gauss(0.003, 0.02)), base * 0.7), base * 1.8)
+        series[combustible] = serie
+    return series
+
+
+def simular_vehiculo(rng, inicio, fin, precios):
+    """
+    Genera un vehículo y su historial entre inicio y fin (datetimes).
+
+    El odómetro solo avanza, los galones de cada carga nunca superan la
+    capacidad del tanque y el precio sigue la serie mensual del combustible.
+    Las cargas, mantenimientos y alertas se retornan sin vehículo asignado.
+    """
+    marca, modelo, tipo, capacidad, rendimiento_base, combustible = rng.choice(CATALOGO)
+    año = rng.randint(inicio.year - 8, fin.year)
+    km_diarios = rng.uniform(25, 110)
+    rendimiento = rendimiento_base * rng.uniform(0.85, 1.1)
+    intervalo_servicio = rng.choice([5000, 7500, 10000])
+
+    fecha = max(inicio, timezone.make_aware(datetime(año, 1, 1, 7)))
+    kilometraje = int(km_diarios * 365 * max(0, inicio.year - año) * rng.uniform(0.7, 1.1))
+    proximo_servicio = (kilometraje // intervalo_servicio + 1) * intervalo_servicio
+
+    cargas, mantenimientos, alertas = [], [], []
+    while True:
+        # Galones consumidos desde la carga anterior, acotados por el tanque
+        galones = (capacidad * Decimal(str(round(rng.uniform(0.3, 0.95), 2)))).quantize(CENTAVO)
+        distancia = int(float(galones) * rendimiento * rng.uniform(0.9, 1.1))
+        fecha += timedelta(minutes=int(distancia / (km_diarios * rng.uniform(0.7, 1.3)) * 1440) + 60)
+        if fecha > fin:
+            break
+        kilometraje += distancia
+
+        mes = (fecha.year - inicio.year) * 12 + fecha.month - inicio.month
+        precio = Decimal(str(round(precios[combustible][mes] * rng.uniform(0.98, 1.02), 2)))
+        cargas.append(CargaCombustible(
+            fecha=fecha, kilometraje=kilometraje, galones=galones, precio_galon=precio,
+            costo_total=(galones * precio).quantize(CENTAVO), tipo_combustible=combustible,
+            estacion_servicio=rng.choice(GASOLINERAS), tanque_lleno=rng.random() < 0.8,
+        ))
+
+        if kilometraje >= proximo_servicio:
+            alertas.append(AlertaMantenimiento(
+                titulo='Cambio de aceite', descripcion='Cambio de aceite y filtros',
+                kilometraje_objetivo=proximo_servicio, prioridad='MEDIA', activa=False,
+            ))
+            proximo_servicio = kilometraje + intervalo_servicio
+            mantenimientos.append(Mantenimiento(
+                fecha=fecha, tipo='PREVENTIVO', categoria='MOTOR', descripcion='Cambio de aceite y filtros',
+                kilometraje=kilometraje, costo=Decimal(rng.randint(45, 130)), taller=rng.choice(TALLERES),
+                repuestos_utilizados='Filtro de aceite, aceite 10W30', proximo_mantenimiento_km=proximo_servicio,
+                proximo_mantenimiento_fecha=(fecha + timedelta(days=180)).date(),
+            ))
+        elif rng.random() < 0.02:
+            categoria, descripcion, minimo, maximo = rng.choice(CORRECTIVOS)
+            mantenimientos.append(Mantenimiento(
+                fecha=fecha, tipo='EMERGENCIA' if rng.random() < 0.1 else 'CORRECTIVO', categoria=categoria,
+                descripcion=descripcion, kilometraje=kilometraje, costo=Decimal(rng.randint(minimo, maximo)),
+                taller=rng.choice(TALLERES),
+            ))
+
+    alertas.append(AlertaMantenimiento(
+        titulo='Cambio de aceite próximo', descripcion='Recordatorio para cambio de aceite y filtros',
+        kilometraje_objetivo=proximo_servicio,
+        prioridad='ALTA' if proximo_servicio - kilometraje < 1000 else 'MEDIA',
+    ))
+    if rng.random() < 0.5:
+        alertas.append(AlertaMantenimiento(
+            titulo='Revisión técnica vehicular', descripcion='Revisión técnica anual obligatoria',
+            fecha_objetivo=(fin + timedelta(days=rng.randint(-30, 90))).date(), prioridad='ALTA',
+        ))
+
+    vehiculo = Vehiculo(
+        marca=marca, modelo=modelo, año=año, tipo=tipo, kilometraje_actual=kilometraje,
+        capacidad_tanque=capacidad, color=rng.choice(COLORES),
+    )
+    return vehiculo, cargas, mantenimientos, alertas
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera una flota sintética para pruebas de carga: N usuarios con M vehículos '
+        'cada uno e historiales de varios años de cargas, mantenimientos y alertas. '
+        'Es determinista para la misma semilla y fecha final, e inserta con bulk_create por lotes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=10)
+        parser.add_argument('--vehiculos-por-usuario', type=int, default=3)
+        parser.add_argument('--anios', type=int, default=3, help='Años de historial por vehículo')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Filas por INSERT')
+        parser.add_argument(
+            '--prefijo', default='flota',
+            help='Prefijo de usernames y placas; permite generar varias flotas en la misma base'
+        )
+        parser.add_argument('--hasta', help='Fecha final del historial (YYYY-MM-DD, por defecto hoy)')
+        parser.add_argument('--password', default='demo123', help='Contraseña de todos los usuarios generados')
+
+    def handle(self, *args, **options):
+        for opcion in ('usuarios', 'vehiculos_por_usuario', 'anios', 'batch_size'):
+            if options[opcion] < 1:
+                raise CommandError(f'--{opcion.replace("_", "-")} debe ser mayor a 0')
+        prefijo = options['prefijo']
+        if not prefijo.isalnum() or len(prefijo) > 10:
+            raise CommandError('--prefijo debe ser alfanumérico y de hasta 10 caracteres')
+        if User.objects.filter(username__startswith=f'{prefijo}_').exists():
+            raise CommandError(f'Ya existen usuarios con el prefijo "{prefijo}"; usa otro --prefijo')
+
+        hasta = parse_date(options['hasta']) if options['hasta'] else timezone.localdate()
+        if hasta is None:
+            raise CommandError('--hasta debe tener formato YYYY-MM-DD')
+        fin = timezone.make_aware(datetime.combine(hasta, time(20)))
+        inicio = timezone.make_aware(datetime.combine(date(hasta.year - options['anios'], hasta.month, 1), time(7)))
+
+        precios = serie_precios(random.Random(options['seed']), options['anios'] * 12 + 12)
+        # Un solo hash: hashear por usuario dominaría el tiempo de generación
+        password = make_password(options['password'])
+
+        self.stdout.write(
+            f'Generando {options["usuarios"]} usuario(s) x {options["vehiculos_por_usuario"]} vehículo(s), '
+            f'{options["anios"]} año(s) de historial (seed {options["seed"]})...'
+        )
+        totales = {'usuarios': 0, 'vehículos': 0, 'cargas': 0, 'mantenimientos': 0, 'alertas': 0}
+        comienzo = reloj.monotonic()
+
+        for primero in range(0, options['usuarios'], USUARIOS_POR_LOTE):
+            indices = range(primero, min(primero + USUARIOS_POR_LOTE, options['usuarios']))
+            with transaction.atomic():
+                self._generar_lote(indices, options, prefijo, password, inicio, fin, precios, totales)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {indices[-1] + 1} usuario(s) generados, {totales["cargas"]} cargas')
+
+        segundos = reloj.monotonic() - comienzo
+        filas = sum(totales.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {filas} filas en {segundos:.1f}s ({filas / max(segundos, 0.001):.0f} filas/s)'
+        ))
+        for nombre, cantidad in totales.items():
+            self.stdout.write(f'   - {nombre.capitalize()}: {cantidad}')
+
+    def _generar_lote(self, indices, options, prefijo, password, inicio, fin, precios, totales):
+        batch_size = options['batch_size']
+
+        # Cada usuario tiene su propio generador: el resultado no depende del tamaño de lote
+        generadores = {indice: random.Random(f'{options["seed"]}:{indice}') for indice in indices}
+        usuarios = []
+        for indice, rng in generadores.items():
+            usuarios.append(User(
+                username=f'{prefijo}_{indice:07d}', email=f'{prefijo}_{indice:07d}@kmtracker.ec',
+                first_name=rng.choice(NOMBRES), last_name=rng.choice(APELLIDOS), password=password,
+            ))
+        User.objects.bulk_create(usuarios, batch_size=batch_size)
+        # bulk_create no asigna pks en todas las bases (ej. MySQL): se consultan por clave única
+        usuario_ids = dict(User.objects.filter(
+            username__in=[usuario.username for usuario in usuarios]
+        ).values_list('username', 'id'))
+
+        vehiculos, historiales = [], {}
+        for indice, rng in generadores.items():
+            for numero in range(options['vehiculos_por_usuario']):
+                vehiculo, *historial = simular_vehiculo(rng, inicio, fin, precios)
+                vehiculo.usuario_id = usuario_ids[f'{prefijo}_{indice:07d}']
+                vehiculo.placa = f'{prefijo.upper()}-{indice * options["vehiculos_por_usuario"] + numero:07d}'
+                vehiculos.append(vehiculo)
+                historiales[vehiculo.placa] = historial
+        Vehiculo.objects.bulk_create(vehiculos, batch_size=batch_size)
+        vehiculo_ids = dict(Vehiculo.objects.filter(placa__in=list(historiales)).values_list('placa', 'id'))
+
+        for posicion, (modelo, nombre) in enumerate((
+            (CargaCombustible, 'cargas'), (Mantenimiento, 'mantenimientos'), (AlertaMantenimiento, 'alertas'),
+        )):
+            filas = []
+            for placa, historial in historiales.items():
+                for fila in historial[posicion]:
+                    fila.vehiculo_id = vehiculo_ids[placa]
+                    filas.append(fila)
+            modelo.objects.bulk_create(filas, batch_size=batch_size)
+            totales[nombre] += len(filas)
+
+        # bulk_create no envía señales: el resumen materializado se calcula al final
+        reconstruir_resumen(vehiculo_ids.values())
+        totales['usuarios'] += len(usuarios)
+        totales['vehículos'] += len(vehiculos)
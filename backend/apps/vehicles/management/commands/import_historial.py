@@ -0,0 +1,86 @@
+import json
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.core.transferencia import detectar_formato, importar_en_lotes, leer_filas, serializers_transferibles
+
+
+class Command(BaseCommand):
+    help = (
+        'Importa un historial de cargas o mantenimientos desde CSV/NDJSON por lotes '
+        'transaccionales. Con --checkpoint la importación se puede reanudar donde quedó.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo CSV o NDJSON')
+        parser.add_argument('--modelo', required=True, choices=sorted(serializers_transferibles()))
+        parser.add_argument('--formato', choices=['csv', 'ndjson'], help='Por defecto según la extensión')
+        parser.add_argument('--usuario', help='Limita las filas a los vehículos de este username')
+        parser.add_argument('--batch-size', type=int, default=500, help='Filas por transacción')
+        parser.add_argument('--checkpoint', help='Archivo donde se guarda el avance (se reanuda si existe)')
+
+    def handle(self, *args, **options):
+        try:
+            formato = detectar_formato(options['archivo'], options['formato'])
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        usuario = None
+        if options['usuario']:
+            try:
+                usuario = User.objects.get(username=options['usuario'])
+            except User.DoesNotExist:
+                raise CommandError(f'No existe el usuario {options["usuario"]}')
+
+        origen = {'archivo': os.path.abspath(options['archivo']), 'modelo': options['modelo']}
+        omitir = self._leer_checkpoint(options['checkpoint'], origen)
+        if omitir:
+            self.stdout.write(f'Reanudando después de la fila {omitir}')
+
+        def al_confirmar(procesadas):
+            if options['checkpoint']:
+                self._guardar_checkpoint(options['checkpoint'], {**origen, 'filas': procesadas})
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {procesadas} filas procesadas')
+
+        try:
+            with open(options['archivo'], encoding='utf-8-sig', newline='') as archivo:
+                resultado = importar_en_lotes(
+                    leer_filas(archivo, formato),
+                    serializers_transferibles()[options['modelo']],
+                    usuario=usuario,
+                    batch_size=options['batch_size'],
+                    omitir=omitir,
+                    al_confirmar=al_confirmar
+                )
+        except OSError as error:
+            raise CommandError(f'No se pudo leer {options["archivo"]}: {error}')
+
+        if options['checkpoint'] and os.path.exists(options['checkpoint']):
+            os.remove(options['checkpoint'])
+
+        for error in resultado['errores']:
+            self.stdout.write(self.style.WARNING(f'  Fila {error["fila"]}: {json.dumps(error["errores"], ensure_ascii=False)}'))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ {resultado["creadas"]} registro(s) importado(s), '
+            f'{resultado["total_errores"]} fila(s) con errores'
+        ))
+
+    def _leer_checkpoint(self, ruta, origen):
+        if not ruta or not os.path.exists(ruta):
+            return 0
+        with open(ruta, encoding='utf-8') as archivo:
+            checkpoint = json.load(archivo)
+        if any(checkpoint.get(clave) != valor for clave, valor in origen.items()):
+            raise CommandError(f'El checkpoint {ruta} corresponde a otra importación')
+        return checkpoint['filas']
+
+    def _guardar_checkpoint(self, ruta, checkpoint):
+        # Escritura atómica: un corte no deja el checkpoint a medias
+        temporal = f'{ruta}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(checkpoint, archivo)
+        os.replace(temporal, ruta)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from apps.vehicles.models import Vehiculo
+from apps.vehicles.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el resumen materializado de los vehículos (backfill y reparación)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--faltantes', action='store_true', help='Solo vehículos sin resumen')
+        parser.add_argument('--vehiculo', type=int, action='append', help='Id de vehículo (se puede repetir)')
+        parser.add_argument('--batch-size', type=int, default=500, help='Vehículos por transacción')
+
+    def handle(self, *args, **options):
+        vehiculos = Vehiculo.objects.order_by('id')
+        if options['vehiculo']:
+            vehiculos = vehiculos.filter(id__in=options['vehiculo'])
+        if options['faltantes']:
+            vehiculos = vehiculos.filter(resumen__isnull=True)
+
+        self.stdout.write('Reconstruyendo resúmenes...\n')
+        escritos = reconstruir_resumen(
+            vehiculos.values_list('id', flat=True).iterator(),
+            batch_size=options['batch_size']
+        )
+
+        self.stdout.write(self.style.SUCCESS(f'\n✅ {escritos} resumen(es) reconstruido(s)'))
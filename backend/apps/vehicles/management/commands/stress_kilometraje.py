@@ -0,0 +1,90 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from apps.vehicles.models import Vehiculo
+
+
+class Command(BaseCommand):
+    help = (
+        'Lanza hilos que actualizan en paralelo el kilometraje del mismo vehículo '
+        'con avanzar_kilometraje() y verifica que nunca retrocede. Reporta '
+        'actualizaciones por segundo.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vehiculo', type=int, help='Id del vehículo (por defecto el primero)')
+        parser.add_argument('--hilos', type=int, default=8)
+        parser.add_argument('--actualizaciones', type=int, default=200, help='Actualizaciones por hilo')
+
+    def handle(self, *args, **options):
+        vehiculo = Vehiculo.objects.order_by('id')
+        if options['vehiculo']:
+            vehiculo = vehiculo.filter(pk=options['vehiculo'])
+        vehiculo = vehiculo.first()
+        if vehiculo is None:
+            raise CommandError('No hay vehículos para la prueba')
+
+        inicial = vehiculo.kilometraje_actual
+        resultado = ejecutar_en_paralelo(vehiculo.pk, inicial, options['hilos'], options['actualizaciones'])
+
+        self.stdout.write(
+            f'{resultado["total"]} actualizaciones en {options["hilos"]} hilos ({connection.vendor}): '
+            f'{resultado["por_segundo"]:.1f}/s, {resultado["aplicadas"]} aplicadas'
+        )
+        if resultado['errores']:
+            raise CommandError(f'{len(resultado["errores"])} error(es): {resultado["errores"][0]}')
+        if resultado['retrocesos'] or resultado['final'] != resultado['maximo']:
+            raise CommandError(
+                f'Kilometraje no monótono: final {resultado["final"]}, esperado {resultado["maximo"]}, '
+                f'{resultado["retrocesos"]} lectura(s) menores a la anterior'
+            )
+        self.stdout.write(self.style.SUCCESS(f'✅ Kilometraje final {resultado["final"]} (monótono)'))
+
+
+def ejecutar_en_paralelo(vehiculo_id, inicial, hilos, actualizaciones):
+    """
+    Cada hilo envía kilometrajes intercalados con los de los demás hilos y
+    lee el valor resultante tras cada UPDATE; las lecturas de un hilo nunca
+    deben disminuir y el valor final debe ser el máximo enviado.
+    """
+    barrera = threading.Barrier(hilos)
+    aplicadas, retrocesos, errores = [], [], []
+
+    def trabajar(indice):
+        anterior = 0
+        try:
+            barrera.wait()
+            for paso in range(actualizaciones):
+                kilometraje = inicial + paso * hilos + indice + 1
+                vehiculos = Vehiculo.objects.filter(pk=vehiculo_id)
+                aplicadas.append(vehiculos.avanzar_kilometraje(kilometraje))
+                actual = vehiculos.values_list('kilometraje_actual', flat=True).get()
+                if actual < anterior:
+                    retrocesos.append((anterior, actual))
+                anterior = actual
+        except Exception as error:  # reportado al final
+            errores.append(error)
+        finally:
+            connection.close()
+
+    trabajadores = [threading.Thread(target=trabajar, args=(indice,)) for indice in range(hilos)]
+    inicio = time.perf_counter()
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    duracion = time.perf_counter() - inicio
+
+    total = hilos * actualizaciones
+    return {
+        'total': total,
+        'por_segundo': total / duracion,
+        'aplicadas': sum(aplicadas),
+        'retrocesos': len(retrocesos),
+        'errores': errores,
+        'maximo': inicial + total,
+        'final': Vehiculo.objects.values_list('kilometraje_actual', flat=True).get(pk=vehiculo_id),
+    }
@@ -1,37 +1,94 @@
-from django.core.management.base import BaseCommand
-from django.db.models import Max
+from datetime import datetime, time
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Case, F, Max, PositiveIntegerField, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from apps.vehicles.models import Vehiculo
 from apps.fuel_logs.models import CargaCombustible
+from apps.maintenance.models import Mantenimiento
+
+
+def maximas_lecturas(vehiculo_ids):
+    """
+    {vehiculo_id: kilometraje} con la lectura más alta de cargas y
+    mantenimientos; un MAX agrupado por tabla para todo el lote. Los vehículos
+    sin lecturas no aparecen.
+    """
+    lecturas = {}
+    for modelo in (CargaCombustible, Mantenimiento):
+        maximos = modelo.objects.filter(vehiculo_id__in=vehiculo_ids).order_by().values('vehiculo_id').annotate(
+            maximo=Max('kilometraje')
+        ).values_list('vehiculo_id', 'maximo')
+        for vehiculo_id, maximo in maximos:
+            lecturas[vehiculo_id] = max(lecturas.get(vehiculo_id, 0), maximo)
+    return lecturas
 
 
 class Command(BaseCommand):
-    help = 'Sincroniza el kilometraje de los vehículos con su última carga'
+    help = (
+        'Sincroniza el kilometraje de los vehículos con la lectura más alta de '
+        'sus cargas y mantenimientos usando un UPDATE por lote'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Muestra los cambios sin aplicarlos')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Vehículos por UPDATE')
+        parser.add_argument(
+            '--since',
+            help='Solo vehículos con cargas o mantenimientos modificados desde esta fecha (YYYY-MM-DD o ISO 8601)'
+        )
 
     def handle(self, *args, **options):
-        vehiculos = Vehiculo.objects.all()
-        actualizados = 0
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size debe ser mayor a 0')
+
+        vehiculos = Vehiculo.objects.order_by('id')
+        if options['since']:
+            desde = self._parsear_fecha(options['since'])
+            vehiculos = vehiculos.filter(
+                Q(pk__in=CargaCombustible.objects.filter(fecha_actualizacion__gte=desde).values('vehiculo_id'))
+                | Q(pk__in=Mantenimiento.objects.filter(fecha_actualizacion__gte=desde).values('vehiculo_id'))
+            )
 
         self.stdout.write('Sincronizando kilometrajes...\n')
 
-        for vehiculo in vehiculos:
-            # Obtener el kilometraje máximo de las cargas
-            max_km = CargaCombustible.objects.filter(
-                vehiculo=vehiculo
-            ).aggregate(Max('kilometraje'))['kilometraje__max']
+        # Solo ids: la lista se materializa para no iterar la tabla mientras se actualiza
+        ids = list(vehiculos.values_list('id', flat=True))
+        actualizados = 0
 
-            if max_km and max_km > vehiculo.kilometraje_actual:
-                self.stdout.write(
-                    f"  Vehículo {vehiculo.placa}: "
-                    f"{vehiculo.kilometraje_actual} km → {max_km} km"
-                )
-                vehiculo.kilometraje_actual = max_km
-                vehiculo.save(update_fields=['kilometraje_actual'])
-                actualizados += 1
+        for inicio in range(0, len(ids), options['batch_size']):
+            lecturas = maximas_lecturas(ids[inicio:inicio + options['batch_size']])
+            if not lecturas:
+                continue
+            # La comparación se hace en la base: nunca reduce el kilometraje
+            desactualizados = Vehiculo.objects.filter(reduce(or_, (
+                Q(pk=vehiculo_id, kilometraje_actual__lt=lectura) for vehiculo_id, lectura in lecturas.items()
+            )))
+
+            if options['dry_run']:
+                for pk, placa, actual in desactualizados.order_by('id').values_list('pk', 'placa', 'kilometraje_actual'):
+                    self.stdout.write(f"  Vehículo {placa}: {actual} km → {lecturas[pk]} km")
+                    actualizados += 1
+                continue
+
+            # Un solo UPDATE condicional por lote con la lectura de cada vehículo
+            actualizados += desactualizados.update(
+                kilometraje_actual=Case(
+                    *(When(pk=vehiculo_id, then=Value(lectura)) for vehiculo_id, lectura in lecturas.items()),
+                    output_field=PositiveIntegerField(),
+                ),
+                version=F('version') + 1,
+                fecha_actualizacion=timezone.now(),
+            )
 
         if actualizados > 0:
+            accion = 'por actualizar (dry-run)' if options['dry_run'] else 'actualizado(s)'
             self.stdout.write(
                 self.style.SUCCESS(
-                    f'\n✅ {actualizados} vehículo(s) actualizado(s)'
+                    f'\n✅ {actualizados} vehículo(s) {accion}'
                 )
             )
         else:
@@ -40,3 +97,17 @@ class Command(BaseCommand):
                     '\n✅ Todos los vehículos ya están sincronizados'
                 )
             )
+
+    def _parsear_fecha(self, valor):
+        try:
+            fecha = parse_datetime(valor)
+            if fecha is None:
+                dia = parse_date(valor)
+                fecha = datetime.combine(dia, time.min) if dia else None
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise CommandError('--since debe tener formato YYYY-MM-DD o ISO 8601')
+        if timezone.is_naive(fecha):
+            fecha = timezone.make_aware(fecha)
+        return fecha
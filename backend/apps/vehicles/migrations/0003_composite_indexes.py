@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0002_update_capacidad_tanque_help_text'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['usuario', 'activo', 'fecha_creacion'], name='vehiculo_usuario_activo_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0003_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehiculo',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Se incrementa con cada escritura de cargas o mantenimientos'),
+        ),
+    ]
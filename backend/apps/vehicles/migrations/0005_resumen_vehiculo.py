@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0004_vehiculo_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenVehiculo',
+            fields=[
+                ('vehiculo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen', serialize=False, to='vehicles.vehiculo')),
+                ('total_cargas', models.PositiveIntegerField(default=0)),
+                ('total_galones', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_costo_combustible', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('ultimo_kilometraje', models.PositiveIntegerField(default=0, help_text='Kilometraje máximo registrado en cargas')),
+                ('rendimiento_reciente', models.FloatField(blank=True, help_text='Rendimiento (km/gal) de las últimas cargas', null=True)),
+                ('total_mantenimientos', models.PositiveIntegerField(default=0)),
+                ('total_costo_mantenimiento', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('alertas_abiertas', models.PositiveIntegerField(default=0)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de Vehículo',
+                'verbose_name_plural': 'Resúmenes de Vehículos',
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-17 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vehicles', '0005_resumen_vehiculo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehiculo',
+            index=models.Index(fields=['usuario', 'fecha_actualizacion'], name='vehiculo_usuario_act_idx'),
+        ),
+    ]
@@ -1,5 +1,34 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+
+class VehiculoQuerySet(models.QuerySet):
+    """QuerySet con utilidades para Vehiculo"""
+
+    def incrementar_version(self):
+        """
+        Incrementa la versión de los vehículos para invalidar datos derivados
+        en caché; fecha_actualizacion refleja también el último cambio de sus
+        cargas, mantenimientos y alertas (Last-Modified).
+        """
+        return self.update(version=F('version') + 1, fecha_actualizacion=timezone.now())
+
+    def avanzar_kilometraje(self, kilometraje):
+        """
+        Sube kilometraje_actual a `kilometraje` solo en los vehículos que están
+        por debajo, con un único UPDATE condicional (sin leer antes), de modo
+        que escrituras concurrentes nunca lo hagan retroceder. Incrementa la
+        versión porque el estado de las alertas depende del kilometraje.
+        Retorna la cantidad de vehículos actualizados.
+        """
+        return self.filter(kilometraje_actual__lt=kilometraje).update(
+            kilometraje_actual=kilometraje,
+            version=F('version') + 1,
+            fecha_actualizacion=timezone.now(),
+        )
 
 
 class Vehiculo(models.Model):
@@ -36,11 +65,74 @@ class Vehiculo(models.Model):
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     activo = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0, editable=False, help_text='Se incrementa con cada escritura de cargas o mantenimientos')
+
+    objects = VehiculoQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Vehículo'
         verbose_name_plural = 'Vehículos'
         ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['usuario', 'activo', 'fecha_creacion'], name='vehiculo_usuario_activo_idx'),
+            models.Index(fields=['usuario', 'fecha_actualizacion'], name='vehiculo_usuario_act_idx'),
+        ]
 
     def __str__(self):
         return f"{self.marca} {self.modelo} ({self.placa})"
+
+    @classmethod
+    def campos_sin_version(cls):
+        """
+        update_fields para guardar un vehículo existente sin sobrescribir
+        version, que solo cambia con incrementar_version()
+        """
+        return [campo.name for campo in cls._meta.concrete_fields if not campo.primary_key and campo.name != 'version']
+
+
+class ResumenVehiculoQuerySet(models.QuerySet):
+    """QuerySet para mantener el resumen de vehículos con actualizaciones atómicas"""
+
+    def aplicar_cambios(self, vehiculo_id, cambios):
+        """
+        Suma los deltas de `cambios` ({campo: delta}) al resumen del vehículo.
+
+        Retorna False si el vehículo no tiene resumen (ej. borrado en cascada
+        o datos previos a la tabla); rebuild_resumen lo reconstruye.
+        """
+        cambios = {campo: F(campo) + delta for campo, delta in cambios.items() if delta}
+        if not cambios:
+            return True
+        return self.filter(vehiculo_id=vehiculo_id).update(
+            fecha_actualizacion=timezone.now(), **cambios
+        ) > 0
+
+
+class ResumenVehiculo(models.Model):
+    """Resumen materializado por vehículo, actualizado en cada escritura"""
+
+    vehiculo = models.OneToOneField(Vehiculo, on_delete=models.CASCADE, primary_key=True, related_name='resumen')
+
+    # Combustible
+    total_cargas = models.PositiveIntegerField(default=0)
+    total_galones = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_costo_combustible = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    ultimo_kilometraje = models.PositiveIntegerField(default=0, help_text='Kilometraje máximo registrado en cargas')
+    rendimiento_reciente = models.FloatField(blank=True, null=True, help_text='Rendimiento (km/gal) de las últimas cargas')
+
+    # Mantenimiento
+    total_mantenimientos = models.PositiveIntegerField(default=0)
+    total_costo_mantenimiento = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    alertas_abiertas = models.PositiveIntegerField(default=0)
+
+    # Metadata
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    objects = ResumenVehiculoQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Resumen de Vehículo'
+        verbose_name_plural = 'Resúmenes de Vehículos'
+
+    def __str__(self):
+        return f"Resumen {self.vehiculo_id}"
@@ -0,0 +1,170 @@
+"""
+Mantenimiento del resumen materializado por vehículo (ResumenVehiculo).
+
+Las señales de cargas, mantenimientos y alertas llaman a registrar_escritura()
+dentro de la misma transacción del guardado (excepto en el borrado en cascada
+de un vehículo, ver eliminacion.py); reconstruir_resumen() recalcula todo
+desde cero para backfill y reparación.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+from django.utils import timezone
+
+from apps.fuel_logs.models import CargaCombustible
+from apps.maintenance.models import AlertaMantenimiento, Mantenimiento
+from .models import ResumenVehiculo, Vehiculo
+
+
+# Cantidad de cargas recientes usadas para el rendimiento del resumen
+CARGAS_RENDIMIENTO_RECIENTE = 20
+
+
+def contribucion_carga(carga):
+    return {
+        'total_cargas': 1,
+        'total_galones': carga.galones,
+        'total_costo_combustible': carga.costo_total,
+    }
+
+
+def contribucion_mantenimiento(mantenimiento):
+    return {
+        'total_mantenimientos': 1,
+        'total_costo_mantenimiento': mantenimiento.costo,
+    }
+
+
+def contribucion_alerta(alerta):
+    return {'alertas_abiertas': 1 if alerta.activa else 0}
+
+
+# Parte del resumen que aporta cada modelo, para recalcularla desde la base
+AGREGADOS_RESUMEN = {
+    CargaCombustible: {
+        'total_cargas': Count('id'), 'total_galones': Sum('galones'), 'total_costo_combustible': Sum('costo_total'),
+    },
+    Mantenimiento: {'total_mantenimientos': Count('id'), 'total_costo_mantenimiento': Sum('costo')},
+    AlertaMantenimiento: {'alertas_abiertas': Count('id', filter=Q(activa=True))},
+}
+
+
+def recordar_vehiculo(instance):
+    """Guarda el vehículo cargado de la instancia (usado en post_init)"""
+    instance._resumen_vehiculo_id = instance.__dict__.get('vehiculo_id')
+
+
+def registrar_escritura(instance, contribucion, creado=False, eliminado=False):
+    """
+    Actualiza el resumen por la escritura de la instancia. Retorna los ids de
+    vehículos afectados.
+
+    Una creación suma su contribución con un UPDATE atómico. Una edición o
+    borrado recalcula la parte del resumen de sus vehículos: la contribución
+    anterior en memoria no es confiable (only()/defer(), refresh_from_db o una
+    edición concurrente de la misma fila).
+    """
+    vehiculo_ids = {instance.vehiculo_id, getattr(instance, '_resumen_vehiculo_id', None)} - {None}
+    instance._resumen_vehiculo_id = None if eliminado else instance.vehiculo_id
+
+    if creado:
+        if not ResumenVehiculo.objects.aplicar_cambios(instance.vehiculo_id, contribucion(instance)):
+            reconstruir_resumen([instance.vehiculo_id])
+    else:
+        recalcular_resumen(type(instance), vehiculo_ids)
+    return vehiculo_ids
+
+
+def recalcular_resumen(modelo, vehiculo_ids):
+    """Recalcula desde la base la parte del resumen que aporta `modelo`"""
+    for vehiculo_id in vehiculo_ids:
+        valores = modelo.objects.filter(vehiculo_id=vehiculo_id).aggregate(**AGREGADOS_RESUMEN[modelo])
+        actualizados = ResumenVehiculo.objects.filter(vehiculo_id=vehiculo_id).update(
+            fecha_actualizacion=timezone.now(), **{campo: valor or 0 for campo, valor in valores.items()}
+        )
+        if not actualizados:
+            reconstruir_resumen([vehiculo_id])
+
+
+def registrar_lote(instancias, contribucion):
+    """
+    Suma al resumen la contribución de instancias creadas con bulk_create
+    (que no envía señales) e incrementa la versión de sus vehículos.
+    Retorna los ids de vehículos afectados.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for instancia in instancias:
+        for campo, valor in contribucion(instancia).items():
+            deltas[instancia.vehiculo_id][campo] += valor
+
+    for vehiculo_id, cambios in deltas.items():
+        if not ResumenVehiculo.objects.aplicar_cambios(vehiculo_id, cambios):
+            reconstruir_resumen([vehiculo_id])
+
+    transaction.on_commit(Vehiculo.objects.filter(pk__in=list(deltas)).incrementar_version)
+    return set(deltas)
+
+
+def recalcular_combustible(vehiculo_ids):
+    """Recalcula el último kilometraje y el rendimiento reciente con consultas acotadas"""
+    for vehiculo_id in vehiculo_ids:
+        ultimo = CargaCombustible.objects.filter(vehiculo_id=vehiculo_id).aggregate(
+            maximo=Max('kilometraje')
+        )['maximo']
+        ResumenVehiculo.objects.filter(vehiculo_id=vehiculo_id).update(
+            ultimo_kilometraje=ultimo or 0,
+            rendimiento_reciente=CargaCombustible.objects.rendimiento_reciente(
+                vehiculo_id, CARGAS_RENDIMIENTO_RECIENTE
+            ),
+            fecha_actualizacion=timezone.now(),
+        )
+
+
+def reconstruir_resumen(vehiculo_ids, batch_size=500):
+    """
+    Recalcula desde cero el resumen de los vehículos indicados usando
+    agregaciones agrupadas por lote. Retorna la cantidad de resúmenes escritos.
+    """
+    vehiculo_ids = list(vehiculo_ids)
+    escritos = 0
+    for inicio in range(0, len(vehiculo_ids), batch_size):
+        lote = vehiculo_ids[inicio:inicio + batch_size]
+        with transaction.atomic():
+            escritos += _reconstruir_lote(lote)
+    return escritos
+
+
+def _reconstruir_lote(vehiculo_ids):
+    resumenes = {vehiculo_id: ResumenVehiculo(vehiculo_id=vehiculo_id) for vehiculo_id in vehiculo_ids}
+
+    cargas = CargaCombustible.objects.filter(vehiculo_id__in=vehiculo_ids).values('vehiculo_id').annotate(
+        cantidad=Count('id'), galones=Sum('galones'), costo=Sum('costo_total'), kilometraje=Max('kilometraje')
+    ).order_by()
+    for fila in cargas:
+        resumen = resumenes[fila['vehiculo_id']]
+        resumen.total_cargas = fila['cantidad']
+        resumen.total_galones = fila['galones'] or 0
+        resumen.total_costo_combustible = fila['costo'] or 0
+        resumen.ultimo_kilometraje = fila['kilometraje'] or 0
+        resumen.rendimiento_reciente = CargaCombustible.objects.rendimiento_reciente(
+            fila['vehiculo_id'], CARGAS_RENDIMIENTO_RECIENTE
+        )
+
+    mantenimientos = Mantenimiento.objects.filter(vehiculo_id__in=vehiculo_ids).values('vehiculo_id').annotate(
+        cantidad=Count('id'), costo=Sum('costo')
+    ).order_by()
+    for fila in mantenimientos:
+        resumen = resumenes[fila['vehiculo_id']]
+        resumen.total_mantenimientos = fila['cantidad']
+        resumen.total_costo_mantenimiento = fila['costo'] or 0
+
+    alertas = AlertaMantenimiento.objects.filter(vehiculo_id__in=vehiculo_ids).values('vehiculo_id').annotate(
+        abiertas=Count('id', filter=Q(activa=True))
+    ).order_by()
+    for fila in alertas:
+        resumenes[fila['vehiculo_id']].alertas_abiertas = fila['abiertas']
+
+    ResumenVehiculo.objects.filter(vehiculo_id__in=vehiculo_ids).delete()
+    ResumenVehiculo.objects.bulk_create(resumenes.values())
+    return len(resumenes)
@@ -1,5 +1,32 @@
 from rest_framework import serializers
-from .models import Vehiculo
+from .models import ResumenVehiculo, Vehiculo
+
+
+class VehiculoDelUsuarioField(serializers.PrimaryKeyRelatedField):
+    """
+    Relación con Vehiculo limitada a los vehículos del usuario autenticado.
+
+    Si el contexto incluye 'vehiculos' ({id: Vehiculo}, ej. en cargas en lote)
+    resuelve el vehículo desde ese diccionario sin consultar la base de datos.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is not None and request.user.is_authenticated:
+            queryset = queryset.filter(usuario_id=request.user.pk)
+        return queryset
+
+    def to_internal_value(self, data):
+        vehiculos = self.context.get('vehiculos')
+        if vehiculos is None:
+            return super().to_internal_value(data)
+        try:
+            return vehiculos[int(data)]
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
 
 
 class VehiculoSerializer(serializers.ModelSerializer):
@@ -7,6 +34,9 @@ class VehiculoSerializer(serializers.ModelSerializer):
 
     usuario_nombre = serializers.CharField(source='usuario.username', read_only=True)
 
+    # Relaciones que el viewset carga con select_related/only()
+    relaciones = {'usuario': ('id', 'username')}
+
     class Meta:
         model = Vehiculo
         fields = [
@@ -38,3 +68,38 @@ class VehiculoSerializer(serializers.ModelSerializer):
         if value <= 0:
             raise serializers.ValidationError("La capacidad del tanque debe ser mayor a 0")
         return value
+
+    def update(self, instance, validated_data):
+        """Guarda solo los campos enviados: version la cambia incrementar_version()"""
+        for campo, valor in validated_data.items():
+            setattr(instance, campo, valor)
+        instance.save(update_fields=[*validated_data, 'fecha_actualizacion'])
+        return instance
+
+
+class ResumenVehiculoSerializer(serializers.ModelSerializer):
+    """Serializer para el resumen materializado de un vehículo"""
+
+    vehiculo_info = serializers.SerializerMethodField(read_only=True)
+
+    # Relaciones que el viewset carga con select_related/only()
+    relaciones = {'vehiculo': ('id', 'marca', 'modelo', 'placa')}
+
+    class Meta:
+        model = ResumenVehiculo
+        fields = [
+            'vehiculo', 'vehiculo_info', 'total_cargas', 'total_galones',
+            'total_costo_combustible', 'ultimo_kilometraje', 'rendimiento_reciente',
+            'total_mantenimientos', 'total_costo_mantenimiento', 'alertas_abiertas',
+            'fecha_actualizacion'
+        ]
+        read_only_fields = fields
+
+    def get_vehiculo_info(self, obj):
+        """Retorna información básica del vehículo"""
+        return {
+            'id': obj.vehiculo.id,
+            'marca': obj.vehiculo.marca,
+            'modelo': obj.vehiculo.modelo,
+            'placa': obj.vehiculo.placa
+        }
@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from apps.core.cache import invalidar_vehiculos_publicos
+from .eliminacion import registrar_en_eliminacion
+from .models import ResumenVehiculo, Vehiculo
+
+
+@receiver(post_save, sender=Vehiculo)
+def crear_resumen_vehiculo(sender, instance, created, raw=False, **kwargs):
+    """Crea el resumen vacío de cada vehículo nuevo"""
+    if created and not raw:
+        ResumenVehiculo.objects.create(vehiculo=instance)
+
+
+@receiver(pre_delete, sender=Vehiculo)
+def registrar_vehiculo_en_eliminacion(sender, instance, **kwargs):
+    """Las señales de sus filas en cascada omiten el trabajo por fila (ver eliminacion.py)"""
+    registrar_en_eliminacion(instance)
+
+
+@receiver(post_save, sender=Vehiculo, dispatch_uid='invalidar_vehiculos_publicos_save')
+@receiver(post_delete, sender=Vehiculo, dispatch_uid='invalidar_vehiculos_publicos_delete')
+def invalidar_vehiculos_publicos_al_escribir(sender, **kwargs):
+    """Borra la caché del endpoint público al confirmar la escritura"""
+    invalidar_vehiculos_publicos()
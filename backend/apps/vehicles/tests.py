@@ -1,3 +1,429 @@
-from django.test import TestCase
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import SkipTest, mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete
+from django.forms.models import model_to_dict
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from apps.core.models import Eliminacion
+from apps.fuel_logs.models import CargaCombustible
+from apps.maintenance.models import AlertaMantenimiento, Mantenimiento
+from .eliminacion import vehiculos_en_eliminacion
+from .models import ResumenVehiculo, Vehiculo
+from .management.commands.stress_kilometraje import ejecutar_en_paralelo
+from .resumen import reconstruir_resumen
+from .views import VehiculosPublicosThrottle
+
+
+def crear_vehiculo(usuario, placa='GYE-1234', **extra):
+    return Vehiculo.objects.create(
+        usuario=usuario, marca='Nissan', modelo='Versa', año=2018,
+        placa=placa, capacidad_tanque=Decimal('11.00'), **extra
+    )
+
+
+class ExplainQueriesCommandTests(TestCase):
+    """Pruebas del comando explain_queries"""
+
+    def test_analiza_todas_las_consultas_canonicas(self):
+        usuario = User.objects.create_user('flota')
+        crear_vehiculo(usuario)
+        salida = StringIO()
+        call_command('explain_queries', stdout=salida)
+        for nombre in ('vehículos', 'cargas por vehículo', 'alertas vencidas', 'rendimiento'):
+            self.assertIn(nombre, salida.getvalue())
+        self.assertIn('consulta(s) con full scan', salida.getvalue())
+
+
+class ResumenVehiculoTests(APITestCase):
+    """Pruebas del resumen materializado por vehículo"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario)
+        cls.otro = crear_vehiculo(cls.usuario, placa='UIO-5678')
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def crear_carga(self, dias, kilometraje, galones='10.00', vehiculo=None, tanque_lleno=True):
+        galones = Decimal(galones)
+        return CargaCombustible.objects.create(
+            vehiculo=vehiculo or self.vehiculo, fecha=timezone.now() - timedelta(days=dias),
+            kilometraje=kilometraje, galones=galones, precio_galon=Decimal('2.50'),
+            costo_total=galones * Decimal('2.50'), tipo_combustible='EXTRA', tanque_lleno=tanque_lleno
+        )
+
+    def resumen(self, vehiculo=None):
+        return ResumenVehiculo.objects.get(vehiculo=vehiculo or self.vehiculo)
+
+    def assertResumenIgualAReconstruido(self):
+        actuales = {r.pk: model_to_dict(r, exclude=['fecha_actualizacion']) for r in ResumenVehiculo.objects.all()}
+        reconstruir_resumen(Vehiculo.objects.values_list('id', flat=True))
+        reconstruidos = {r.pk: model_to_dict(r, exclude=['fecha_actualizacion']) for r in ResumenVehiculo.objects.all()}
+        self.assertEqual(actuales, reconstruidos)
+
+    def test_vehiculo_nuevo_tiene_resumen(self):
+        self.assertEqual(self.resumen().total_cargas, 0)
+
+    def test_cargas_actualizan_resumen(self):
+        self.crear_carga(20, 1000)
+        carga = self.crear_carga(10, 1400, galones='8.00')
+        self.crear_carga(5, 1600, tanque_lleno=False)
+
+        resumen = self.resumen()
+        self.assertEqual(resumen.total_cargas, 3)
+        self.assertEqual(resumen.total_galones, Decimal('28.00'))
+        self.assertEqual(resumen.ultimo_kilometraje, 1600)
+        self.assertEqual(resumen.rendimiento_reciente, 50.0)
+
+        carga.galones = Decimal('10.00')
+        carga.costo_total = Decimal('25.00')
+        carga.save()
+        self.assertEqual(self.resumen().total_galones, Decimal('30.00'))
+
+        carga.delete()
+        resumen = self.resumen()
+        self.assertEqual(resumen.total_cargas, 2)
+        self.assertIsNone(resumen.rendimiento_reciente)
+        self.assertResumenIgualAReconstruido()
+
+    def test_mantenimientos_y_alertas_actualizan_resumen(self):
+        mantenimiento = Mantenimiento.objects.create(
+            vehiculo=self.vehiculo, fecha=timezone.now(), tipo='PREVENTIVO', categoria='MOTOR',
+            descripcion='Aceite', kilometraje=1000, costo=Decimal('40.00')
+        )
+        alerta = AlertaMantenimiento.objects.create(
+            vehiculo=self.vehiculo, titulo='Frenos', descripcion='Revisar', kilometraje_objetivo=2000
+        )
+        self.assertEqual(self.resumen().alertas_abiertas, 1)
+
+        # Mover el mantenimiento a otro vehículo descuenta del original
+        mantenimiento.vehiculo = self.otro
+        mantenimiento.save()
+        self.assertEqual(self.resumen().total_costo_mantenimiento, Decimal('0'))
+        self.assertEqual(self.resumen(self.otro).total_costo_mantenimiento, Decimal('40.00'))
+
+        alerta.activa = False
+        alerta.save()
+        self.assertEqual(self.resumen().alertas_abiertas, 0)
+        self.assertResumenIgualAReconstruido()
+
+    def test_instancias_diferidas_o_desactualizadas(self):
+        self.crear_carga(5, 1000)
+        AlertaMantenimiento.objects.create(
+            vehiculo=self.vehiculo, titulo='Frenos', descripcion='Revisar', kilometraje_objetivo=2000
+        )
+        carga = CargaCombustible.objects.only('id', 'galones').get()
+        carga.notas = 'Editada'
+        carga.save()
+        AlertaMantenimiento.objects.defer('descripcion').get().save()
+
+        # Dos copias de la misma carga editadas una tras otra
+        primera, segunda = CargaCombustible.objects.get(), CargaCombustible.objects.get()
+        primera.galones, primera.costo_total = Decimal('12.00'), Decimal('30.00')
+        primera.save()
+        segunda.galones, segunda.costo_total = Decimal('15.00'), Decimal('37.50')
+        segunda.save()
+        segunda.refresh_from_db()
+        segunda.delete()
+
+        resumen = self.resumen()
+        self.assertEqual((resumen.total_cargas, resumen.total_galones, resumen.alertas_abiertas), (0, 0, 1))
+        self.assertResumenIgualAReconstruido()
+
+    def test_borrar_vehiculo_con_consultas_acotadas(self):
+        for i in range(30):
+            self.crear_carga(30 - i, 1000 + i * 100)
+            Mantenimiento.objects.create(
+                vehiculo=self.vehiculo, fecha=timezone.now(), tipo='PREVENTIVO', categoria='MOTOR',
+                descripcion='Aceite', kilometraje=1000, costo=Decimal('40.00')
+            )
+        vehiculo = Vehiculo.objects.get(pk=self.vehiculo.pk)
+        # Selección y DELETE por modelo, tombstones en un INSERT; sin trabajo por fila
+        with self.assertNumQueries(9):
+            vehiculo.delete()
+
+        self.assertEqual(
+            dict(Eliminacion.objects.values_list('modelo').annotate(total=Count('id')).order_by()),
+            {'vehiculos': 1, 'cargas': 30, 'mantenimientos': 30}
+        )
+        self.assertEqual(vehiculos_en_eliminacion(), {})
+        # Las escrituras de otros vehículos siguen actualizando su resumen
+        self.crear_carga(1, 500, vehiculo=self.otro)
+        self.assertEqual(self.resumen(self.otro).total_cargas, 1)
+
+    def test_borrado_por_queryset_o_fallido_no_deja_registro(self):
+        self.crear_carga(10, 1000)
+        Vehiculo.objects.filter(pk=self.vehiculo.pk).delete()
+        self.assertEqual(vehiculos_en_eliminacion(), {})
+
+        # El borrado falla en la cascada, antes de post_delete del vehículo, y se revierte
+        def fallar(**kwargs):
+            raise DatabaseError()
+
+        self.crear_carga(10, 1000, vehiculo=self.otro)
+        post_delete.connect(fallar, sender=CargaCombustible)
+        try:
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                Vehiculo.objects.filter(pk=self.otro.pk).delete()
+        finally:
+            post_delete.disconnect(fallar, sender=CargaCombustible)
+        self.assertEqual(vehiculos_en_eliminacion(), {})
+
+        # Las escrituras posteriores del vehículo siguen actualizando su resumen
+        self.crear_carga(5, 1300, vehiculo=self.otro)
+        self.assertEqual(self.resumen(self.otro).total_cargas, 2)
+        self.assertResumenIgualAReconstruido()
+
+    def test_endpoint_resumen_con_backfill(self):
+        self.crear_carga(5, 1000)
+        ResumenVehiculo.objects.all().delete()
+
+        response = self.client.get('/api/vehicles/resumen/')
+        self.assertEqual(response.status_code, 200)
+        por_vehiculo = {r['vehiculo']: r for r in response.data}
+        self.assertEqual(set(por_vehiculo), {self.vehiculo.id, self.otro.id})
+        self.assertEqual(por_vehiculo[self.vehiculo.id]['total_cargas'], 1)
+        self.assertEqual(por_vehiculo[self.vehiculo.id]['vehiculo_info']['placa'], 'GYE-1234')
+
+        # Validador de GET condicional + faltantes + resúmenes
+        with self.assertNumQueries(3):
+            self.client.get('/api/vehicles/resumen/')
+
+    def test_comando_rebuild_resumen(self):
+        self.crear_carga(5, 1000)
+        ResumenVehiculo.objects.filter(vehiculo=self.vehiculo).update(total_cargas=99)
+        call_command('rebuild_resumen', stdout=StringIO())
+        self.assertEqual(self.resumen().total_cargas, 1)
+
+
+class ActualizarKilometrajeTests(APITestCase):
+    """Pruebas del UPDATE condicional de kilometraje"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        cls.vehiculo = crear_vehiculo(cls.usuario, kilometraje_actual=1000)
+
+    def setUp(self):
+        self.client.force_authenticate(self.usuario)
+
+    def actualizar(self, kilometraje, vehiculo=None):
+        return self.client.post(
+            f'/api/vehicles/{(vehiculo or self.vehiculo).id}/actualizar_kilometraje/',
+            {'kilometraje': kilometraje}
+        )
+
+    def test_avanza_sin_leer_antes(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(Vehiculo.objects.filter(pk=self.vehiculo.pk).avanzar_kilometraje(1500), 1)
+        self.assertEqual(Vehiculo.objects.filter(pk=self.vehiculo.pk).avanzar_kilometraje(1200), 0)
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.kilometraje_actual, 1500)
+        self.assertEqual(self.vehiculo.version, 1)
+
+    def test_endpoint(self):
+        response = self.actualizar(1800)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['kilometraje_actual'], 1800)
+        self.assertEqual(self.actualizar(1800).status_code, 200)
+        self.assertEqual(self.actualizar(900).status_code, 400)
+        ajeno = crear_vehiculo(User.objects.create_user('otro'), placa='UIO-5678')
+        self.assertEqual(self.actualizar(5000, vehiculo=ajeno).status_code, 404)
+        ajeno.refresh_from_db()
+        self.assertEqual(ajeno.kilometraje_actual, 0)
+
+    def test_crear_carga_avanza_kilometraje(self):
+        response = self.client.post('/api/fuel-logs/', {
+            'vehiculo': self.vehiculo.id, 'fecha': timezone.now().isoformat(), 'kilometraje': 1300,
+            'galones': '5.00', 'precio_galon': '2.50', 'tipo_combustible': 'EXTRA',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.vehiculo.refresh_from_db()
+        self.assertEqual(self.vehiculo.kilometraje_actual, 1300)
+
+
+class KilometrajeConcurrenteTests(TransactionTestCase):
+    """Hilos actualizando el mismo vehículo: el kilometraje nunca retrocede"""
+
+    @classmethod
+    def setUpClass(cls):
+        # Se evalúa con la base de pruebas ya creada (no la NAME de settings)
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            raise SkipTest('Requiere una base de datos de pruebas accesible desde varios hilos')
+        super().setUpClass()
+
+    def test_monotono_bajo_concurrencia(self):
+        vehiculo = crear_vehiculo(User.objects.create_user('flota'), kilometraje_actual=1000)
+        resultado = ejecutar_en_paralelo(vehiculo.pk, 1000, hilos=6, actualizaciones=50)
+        self.assertEqual(resultado['errores'], [])
+        self.assertEqual(resultado['retrocesos'], 0)
+        self.assertEqual(resultado['final'], resultado['maximo'])
+
+
+class SyncKilometrajeCommandTests(TestCase):
+    """Pruebas del comando sync_kilometraje"""
+
+    @classmethod
+    def setUpTestData(cls):
+        usuario = User.objects.create_user('flota')
+        cls.por_carga = crear_vehiculo(usuario, placa='GYE-1234', kilometraje_actual=100)
+        cls.por_mantenimiento = crear_vehiculo(usuario, placa='UIO-5678', kilometraje_actual=100)
+        cls.al_dia = crear_vehiculo(usuario, placa='CUE-9012', kilometraje_actual=9000)
+        cls.sin_lecturas = crear_vehiculo(usuario, placa='LOJ-3456', kilometraje_actual=700)
+
+        for vehiculo, kilometraje in ((cls.por_carga, 1500), (cls.por_carga, 1200), (cls.al_dia, 8000)):
+            CargaCombustible.objects.create(
+                vehiculo=vehiculo, fecha=timezone.now(), kilometraje=kilometraje, galones=Decimal('5.00'),
+                precio_galon=Decimal('2.50'), costo_total=Decimal('12.50'), tipo_combustible='EXTRA'
+            )
+        Mantenimiento.objects.create(
+            vehiculo=cls.por_mantenimiento, fecha=timezone.now(), tipo='PREVENTIVO', categoria='MOTOR',
+            descripcion='Servicio', kilometraje=2500, costo=Decimal('10.00')
+        )
+        # Lecturas cargadas sin actualizar el vehículo (ej. datos históricos)
+        Vehiculo.objects.filter(pk__in=[cls.por_carga.pk, cls.por_mantenimiento.pk]).update(kilometraje_actual=100)
+
+    def kilometrajes(self):
+        return dict(Vehiculo.objects.values_list('placa', 'kilometraje_actual'))
+
+    def test_actualiza_con_la_lectura_mas_alta(self):
+        salida = StringIO()
+        # ids, un MAX agrupado por tabla de lecturas y el UPDATE del lote
+        with self.assertNumQueries(4):
+            call_command('sync_kilometraje', stdout=salida)
+        self.assertEqual(self.kilometrajes(), {
+            'GYE-1234': 1500, 'UIO-5678': 2500, 'CUE-9012': 9000, 'LOJ-3456': 700,
+        })
+        self.assertIn('2 vehículo(s) actualizado(s)', salida.getvalue())
+
+    def test_dry_run_no_modifica(self):
+        salida = StringIO()
+        call_command('sync_kilometraje', dry_run=True, batch_size=1, stdout=salida)
+        self.assertIn('UIO-5678: 100 km → 2500 km', salida.getvalue())
+        self.assertEqual(self.kilometrajes()['GYE-1234'], 100)
+
+    def test_since_limita_a_lecturas_recientes(self):
+        Mantenimiento.objects.update(fecha_actualizacion=timezone.now() - timedelta(days=10))
+        desde = (timezone.now() - timedelta(days=1)).date().isoformat()
+        call_command('sync_kilometraje', since=desde, stdout=StringIO())
+        self.assertEqual(self.kilometrajes()['GYE-1234'], 1500)
+        self.assertEqual(self.kilometrajes()['UIO-5678'], 100)
+
+
+class GenerateFleetCommandTests(TestCase):
+    """Pruebas del generador de flotas sintéticas"""
+
+    def generar(self, prefijo, seed=7):
+        call_command(
+            'generate_fleet', usuarios=2, vehiculos_por_usuario=2, anios=1, seed=seed,
+            prefijo=prefijo, hasta='2025-06-30', batch_size=50, stdout=StringIO()
+        )
+        return Vehiculo.objects.filter(placa__startswith=f'{prefijo.upper()}-').order_by('placa')
+
+    def historial(self, vehiculos):
+        return [
+            list(CargaCombustible.objects.filter(vehiculo=vehiculo).order_by('fecha').values_list(
+                'fecha', 'kilometraje', 'galones', 'precio_galon', 'tipo_combustible'
+            ))
+            for vehiculo in vehiculos
+        ]
+
+    def test_historial_consistente(self):
+        vehiculos = self.generar('uno')
+        self.assertEqual(User.objects.filter(username__startswith='uno_').count(), 2)
+        self.assertEqual(len(vehiculos), 4)
+
+        for vehiculo, cargas in zip(vehiculos, self.historial(vehiculos)):
+            self.assertTrue(cargas)
+            kilometrajes = [carga[1] for carga in cargas]
+            self.assertEqual(kilometrajes, sorted(set(kilometrajes)))
+            self.assertTrue(all(0 < carga[2] <= vehiculo.capacidad_tanque for carga in cargas))
+            self.assertEqual(vehiculo.kilometraje_actual, kilometrajes[-1])
+            self.assertEqual(vehiculo.resumen.total_cargas, len(cargas))
+            self.assertTrue(AlertaMantenimiento.objects.filter(vehiculo=vehiculo, activa=True).exists())
+        self.assertFalse(Mantenimiento.objects.filter(kilometraje__gt=vehiculos[0].kilometraje_actual,
+                                                      vehiculo=vehiculos[0]).exists())
+
+    def test_determinista_por_semilla(self):
+        historial = self.historial(self.generar('uno'))
+        self.assertEqual(self.historial(self.generar('dos')), historial)
+        self.assertNotEqual(self.historial(self.generar('tres', seed=8)), historial)
+
+    def test_prefijo_existente(self):
+        self.generar('uno')
+        with self.assertRaises(CommandError):
+            self.generar('uno')
+
+
+class VehiculosPublicosTests(APITestCase):
+    """Pruebas del endpoint público de vehículos"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('flota', password='clave-segura-123')
+        crear_vehiculo(cls.usuario, tipo='SUV')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_respuesta_en_cache_y_publica(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/vehicles/publicos/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get('/api/vehicles/publicos/').data, response.data)
+
+        self.assertEqual(response.data, [{
+            'id': Vehiculo.objects.get().pk, 'marca': 'Nissan', 'modelo': 'Versa', 'año': 2018,
+            'tipo': 'SUV', 'placa': 'GYE-1234',
+        }])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=60', response['Cache-Control'])
+
+    def test_escritura_de_vehiculo_invalida_al_confirmar(self):
+        self.client.get('/api/vehicles/publicos/')
+        with self.captureOnCommitCallbacks(execute=True):
+            vehiculo = crear_vehiculo(self.usuario, placa='UIO-5678', tipo='MOTO')
+            # Antes del commit la caché conserva la respuesta anterior
+            self.assertEqual(len(self.client.get('/api/vehicles/publicos/').data), 1)
+        self.assertEqual(self.client.get('/api/vehicles/publicos/').data[0]['tipo'], 'Motocicleta')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            vehiculo.delete()
+        self.assertEqual(len(self.client.get('/api/vehicles/publicos/').data), 1)
+
+    def test_ignora_la_autenticacion(self):
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer invalido')
+        self.assertEqual(self.client.get('/api/vehicles/publicos/').status_code, 200)
+
+    @mock.patch.object(VehiculosPublicosThrottle, 'rate', '2/min', create=True)
+    def test_limite_por_ip(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get('/api/vehicles/publicos/', REMOTE_ADDR='10.0.0.1').status_code, 200)
+        response = self.client.get('/api/vehicles/publicos/', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(response.status_code, 429)
+        self.assertNotIn('public', response.get('Cache-Control', ''))
+        self.assertEqual(self.client.get('/api/vehicles/publicos/', REMOTE_ADDR='10.0.0.2').status_code, 200)
+
+    @mock.patch.object(VehiculosPublicosThrottle, 'rate', '2/min', create=True)
+    @override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1})
+    def test_limite_ignora_el_puerto_del_proxy(self):
+        for puerto in (50001, 50002):
+            response = self.client.get('/api/vehicles/publicos/', HTTP_X_FORWARDED_FOR=f'203.0.113.5:{puerto}')
+            self.assertEqual(response.status_code, 200)
+        response = self.client.get('/api/vehicles/publicos/', HTTP_X_FORWARDED_FOR='203.0.113.5:50003')
+        self.assertEqual(response.status_code, 429)
+        response = self.client.get('/api/vehicles/publicos/', HTTP_X_FORWARDED_FOR='[2001:db8::1]:50001')
+        self.assertEqual(response.status_code, 200)
@@ -1,16 +1,26 @@
+from django.conf import settings
+from django.http import Http404
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from rest_framework import viewsets, filters, status
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from .models import Vehiculo
-from .serializers import VehiculoSerializer
+from rest_framework.throttling import AnonRateThrottle
+from apps.authentication.authentication import JWTSinConsultaAuthentication
+from apps.core.cache import datos_vehiculos_publicos
+from apps.core.mixins import GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin
+from .models import ResumenVehiculo, Vehiculo
+from .resumen import reconstruir_resumen
+from .serializers import ResumenVehiculoSerializer, VehiculoSerializer
 
 
-class VehiculoViewSet(viewsets.ModelViewSet):
+class VehiculoViewSet(GetCondicionalMixin, MedirSerializacionMixin, OptimizarRelacionesMixin, viewsets.ModelViewSet):
     """ViewSet para el modelo Vehiculo"""
 
     queryset = Vehiculo.objects.all()
     serializer_class = VehiculoSerializer
+    # request.user es un TokenUser: sin consultar el usuario en cada petición
+    authentication_classes = [JWTSinConsultaAuthentication]
     permission_classes = [IsAuthenticated]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['marca', 'modelo', 'placa', 'tipo']
@@ -20,7 +30,7 @@ class VehiculoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtra los vehículos del usuario actual"""
         # IMPORTANTE: Solo mostrar vehículos del usuario autenticado
-        queryset = Vehiculo.objects.filter(usuario=self.request.user)
+        queryset = Vehiculo.objects.filter(usuario_id=self.request.user.pk)
 
         # Filtrar solo activos si se especifica
         solo_activos = self.request.query_params.get('activos')
@@ -29,14 +39,25 @@ class VehiculoViewSet(viewsets.ModelViewSet):
 
         return queryset
 
+    def vehiculo_validador(self):
+        """En el detalle el validador se limita al vehículo consultado"""
+        try:
+            return int(self.kwargs['pk'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_serializer_class(self):
+        if self.action == 'resumen':
+            return ResumenVehiculoSerializer
+        return super().get_serializer_class()
+
     def perform_create(self, serializer):
         """Asigna automáticamente el usuario autenticado al crear un vehículo"""
-        serializer.save(usuario=self.request.user)
+        serializer.save(usuario_id=self.request.user.pk)
 
     @action(detail=True, methods=['post'])
     def actualizar_kilometraje(self, request, pk=None):
         """Actualiza el kilometraje del vehículo"""
-        vehiculo = self.get_object()
         nuevo_kilometraje = request.data.get('kilometraje')
 
         if not nuevo_kilometraje:
@@ -53,33 +74,70 @@ class VehiculoViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        if nuevo_kilometraje < vehiculo.kilometraje_actual:
+        # UPDATE condicional sin lectura previa: nunca retrocede ante
+        # actualizaciones concurrentes del mismo vehículo
+        try:
+            actualizados = self.get_queryset().filter(pk=pk).avanzar_kilometraje(nuevo_kilometraje)
+        except (TypeError, ValueError):
+            raise Http404
+        vehiculo = self.get_object()
+
+        if not actualizados and nuevo_kilometraje < vehiculo.kilometraje_actual:
             return Response(
                 {'error': 'El nuevo kilometraje no puede ser menor al actual'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        vehiculo.kilometraje_actual = nuevo_kilometraje
-        vehiculo.save()
-
         serializer = self.get_serializer(vehiculo)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def resumen(self, request):
+        """Retorna el resumen materializado de los vehículos del usuario"""
+        vehiculos = self.get_queryset()
+
+        # Backfill de vehículos creados antes de la tabla de resúmenes
+        faltantes = list(vehiculos.filter(resumen__isnull=True).values_list('id', flat=True))
+        if faltantes:
+            reconstruir_resumen(faltantes)
+
+        resumenes = ResumenVehiculo.objects.filter(
+            vehiculo__in=vehiculos
+        ).order_by('-vehiculo__fecha_creacion')
+        serializer = self.get_serializer(self.optimizar_relaciones(resumenes), many=True)
+        return Response(serializer.data)
+
+
+class VehiculosPublicosThrottle(AnonRateThrottle):
+    """Límite por IP del endpoint público (DEFAULT_THROTTLE_RATES['vehiculos_publicos'])"""
+
+    scope = 'vehiculos_publicos'
+
+    def get_ident(self, request):
+        """IP del cliente sin el puerto (el proxy de Azure envía X-Forwarded-For como ip:puerto)"""
+        ident = super().get_ident(request)
+        if ident.startswith('['):
+            # IPv6 con puerto: [ip]:puerto
+            return ident[1:].split(']', 1)[0]
+        if ident.count(':') == 1:
+            return ident.split(':', 1)[0]
+        return ident
+
 
 @api_view(['GET'])
+@authentication_classes([])
 @permission_classes([AllowAny])
+@throttle_classes([VehiculosPublicosThrottle])
 def vehiculos_publicos(request):
     """
     Endpoint público para mostrar vehículos sin autenticación.
     Requerido para pantalla de sustentación.
+
+    La respuesta sale de la caché y es pública por VEHICULOS_PUBLICOS_CACHE_SEGUNDOS
+    para que un CDN o proxy la sirva sin llegar a la API.
     """
-    vehiculos = Vehiculo.objects.all()[:10]
-    data = [{
-        'id': v.id,
-        'marca': v.marca,
-        'modelo': v.modelo,
-        'año': v.año,
-        'tipo': v.get_tipo_display(),  # Obtiene el label legible del choice
-        'placa': v.placa,
-    } for v in vehiculos]
-    return Response(data)
+    response = Response(datos_vehiculos_publicos())
+    patch_cache_control(response, public=True, max_age=settings.VEHICULOS_PUBLICOS_CACHE_SEGUNDOS)
+    # JSON o API navegable según Accept
+    patch_vary_headers(response, ['Accept'])
+    return response
@@ -0,0 +1,11 @@
+"""
+Configuración de gunicorn (se carga automáticamente desde el directorio del proyecto).
+
+Al morir un worker se marcan sus métricas de tipo gauge como inactivas para
+que /metrics no las siga sumando (ver apps/core/metricas.py).
+"""
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'kmtracker_api.settings')
+# Las vistas que hashean contraseñas no bloquean el hilo de las vistas síncronas
+os.environ.setdefault('HASHING_FUERA_DEL_HILO', 'True')
 
 application = get_asgi_application()
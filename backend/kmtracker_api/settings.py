@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Choices, config
 import pymysql
 
 # Configurar PyMySQL como reemplazo de MySQLdb
@@ -46,6 +46,7 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'corsheaders',
     'drf_spectacular',
+    'apps.core',
     'apps.authentication',
     'apps.vehicles',
     'apps.fuel_logs',
@@ -53,8 +54,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.metricas.MetricasMiddleware',  # Solo si METRICAS_ACTIVAS
+    'apps.core.instrumentacion.InstrumentacionMiddleware',  # Solo si INSTRUMENTACION_ACTIVA
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Whitenoise for static files
+    'apps.core.estaticos.WhiteNoiseAsincronoMiddleware',  # Whitenoise for static files (async-capable)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -96,6 +99,11 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='3306'),
+        # Conexiones persistentes: cada hilo de gunicorn reutiliza su conexión
+        # (TCP + TLS) hasta DB_CONN_MAX_AGE segundos; 0 cierra por petición
+        'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=0 if DEBUG else 60, cast=int),
+        # Verifica la conexión reutilizada antes de la primera consulta de cada petición
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
         'OPTIONS': {
             'ssl': {
                 'ssl_mode': 'REQUIRED'  # Forzar SSL para Azure MySQL
@@ -107,6 +115,66 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# locmem por defecto; para compartir entre workers usar por ejemplo
+# django.core.cache.backends.filebased.FileBasedCache o
+# django.core.cache.backends.redis.RedisCache con CACHE_LOCATION
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='kmtracker'),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+    }
+}
+
+# Alias de caché usado para las estadísticas por vehículo
+ESTADISTICAS_CACHE = config('ESTADISTICAS_CACHE', default='default')
+
+# Días que se conservan los registros de eliminación para /api/sync/
+SYNC_RETENCION_DIAS = config('SYNC_RETENCION_DIAS', default=30, cast=int)
+
+
+# Instrumentación por petición (Server-Timing, log estructurado y log de peticiones lentas)
+INSTRUMENTACION_ACTIVA = config('INSTRUMENTACION_ACTIVA', default=False, cast=bool)
+# Umbral en milisegundos para registrar una petición como lenta junto con su SQL
+INSTRUMENTACION_LENTA_MS = config('INSTRUMENTACION_LENTA_MS', default=500, cast=int)
+# Fracción (0 a 1) de las peticiones lentas que se registran
+INSTRUMENTACION_MUESTREO_LENTAS = config('INSTRUMENTACION_MUESTREO_LENTAS', default=1.0, cast=float)
+
+# Segundos que se confía en el is_active en caché de la autenticación JWT sin
+# consulta (JWTSinConsultaAuthentication); acota cuánto tarda en aplicarse una desactivación
+JWT_CACHE_ACTIVO_SEGUNDOS = config('JWT_CACHE_ACTIVO_SEGUNDOS', default=60, cast=int)
+
+# Intervalo máximo en segundos para que un worker vea los tokens revocados en otro
+REVOCACION_SINCRONIZACION_SEGUNDOS = config('REVOCACION_SINCRONIZACION_SEGUNDOS', default=5, cast=int)
+
+# Precisión de last_login: el login solo escribe en auth_user si el último
+# registrado es más antiguo que este intervalo (0 = en cada login)
+ULTIMO_LOGIN_INTERVALO_SEGUNDOS = config('ULTIMO_LOGIN_INTERVALO_SEGUNDOS', default=900, cast=int)
+
+# Segundos que /api/vehicles/publicos/ se sirve desde la caché y desde CDN o proxies (Cache-Control)
+VEHICULOS_PUBLICOS_CACHE_SEGUNDOS = config('VEHICULOS_PUBLICOS_CACHE_SEGUNDOS', default=60, cast=int)
+
+# Métricas Prometheus en /metrics (con gunicorn definir PROMETHEUS_MULTIPROC_DIR)
+METRICAS_ACTIVAS = config('METRICAS_ACTIVAS', default=False, cast=bool)
+# /metrics exige el encabezado 'Authorization: Bearer <token>'; sin token
+# solo se sirve con DEBUG (en producción responde 404)
+METRICAS_TOKEN = config('METRICAS_TOKEN', default='')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'apps.core.instrumentacion': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -125,6 +193,32 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hash de contraseñas (apps.authentication.hashers). PASSWORD_HASHER elige el
+# perfil de las contraseñas nuevas; los otros perfiles verifican las
+# existentes y al iniciar sesión se re-hashean con el perfil y costo actuales.
+# bench_login mide los logins por segundo por núcleo de cada perfil
+PERFILES_HASHER = {
+    'pbkdf2': 'apps.authentication.hashers.PBKDF2Hasher',
+    'scrypt': 'apps.authentication.hashers.ScryptHasher',
+    'argon2': 'apps.authentication.hashers.Argon2Hasher',
+}
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='pbkdf2', cast=Choices(list(PERFILES_HASHER)))
+PASSWORD_HASHERS = [PERFILES_HASHER[PASSWORD_HASHER]] + [
+    hasher for perfil, hasher in PERFILES_HASHER.items() if perfil != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERACIONES = config('PASSWORD_PBKDF2_ITERACIONES', default=600000, cast=int)
+PASSWORD_SCRYPT_N = config('PASSWORD_SCRYPT_N', default=2 ** 14, cast=int)
+PASSWORD_SCRYPT_R = config('PASSWORD_SCRYPT_R', default=8, cast=int)
+PASSWORD_SCRYPT_P = config('PASSWORD_SCRYPT_P', default=1, cast=int)
+PASSWORD_ARGON2_TIME_COST = config('PASSWORD_ARGON2_TIME_COST', default=2, cast=int)
+PASSWORD_ARGON2_MEMORY_COST = config('PASSWORD_ARGON2_MEMORY_COST', default=102400, cast=int)
+PASSWORD_ARGON2_PARALLELISM = config('PASSWORD_ARGON2_PARALLELISM', default=8, cast=int)
+
+# asgi.py lo activa: login, registro y cambio de contraseña hashean en el
+# pool de hilos en vez del hilo que comparten las vistas síncronas. Requiere
+# que todos los MIDDLEWARE sean asíncronos (hashing_fuera_del_hilo lo valida)
+HASHING_FUERA_DEL_HILO = config('HASHING_FUERA_DEL_HILO', default=False, cast=bool)
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -155,7 +249,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.authentication.authentication.JWTAuthenticationConMetricas',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
@@ -163,6 +257,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # Límites por IP de los endpoints anónimos (contadores en la caché default)
+    'DEFAULT_THROTTLE_RATES': {
+        'vehiculos_publicos': config('VEHICULOS_PUBLICOS_LIMITE', default='60/min'),
+    },
+    # Proxies delante de la API (Azure agrega X-Forwarded-For); la IP del cliente
+    # para los límites se toma de X-Forwarded-For según esta cantidad
+    'NUM_PROXIES': config('NUM_PROXIES', default=0 if DEBUG else 1, cast=int),
 }
 
 # Simple JWT configuration
@@ -171,9 +272,14 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=5),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
-    'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': False,
-    'UPDATE_LAST_LOGIN': True,
+    # Cada refresh entrega un refresh token nuevo y revoca el anterior (apps.authentication.revocacion)
+    'ROTATE_REFRESH_TOKENS': True,
+    'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'apps.authentication.serializers.TokenRefreshConRevocacionSerializer',
+    # last_login se registra en TokenObtainConUltimoLoginSerializer como máximo
+    # una vez cada ULTIMO_LOGIN_INTERVALO_SEGUNDOS por usuario
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.authentication.serializers.TokenObtainConUltimoLoginSerializer',
+    'UPDATE_LAST_LOGIN': False,
 
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -16,6 +16,7 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from apps.core.metricas import vista_metricas
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
 urlpatterns = [
@@ -31,4 +32,8 @@ urlpatterns = [
     path('api/vehicles/', include('apps.vehicles.urls')),
     path('api/fuel-logs/', include('apps.fuel_logs.urls')),
     path('api/maintenance/', include('apps.maintenance.urls')),
+    path('api/sync/', include('apps.core.urls')),
+
+    # Métricas Prometheus
+    path('metrics', vista_metricas, name='metricas'),
 ]
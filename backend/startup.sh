@@ -10,10 +10,32 @@ python manage.py migrate --noinput
 echo "Syncing vehicle mileage..."
 python manage.py sync_kilometraje
 
+# Backfill de resúmenes de vehículos faltantes
+echo "Building missing vehicle summaries..."
+python manage.py rebuild_resumen --faltantes
+
+# Depurar registros de eliminación vencidos (sincronización)
+echo "Purging expired deletion log..."
+python manage.py purge_eliminaciones
+
+# Depurar revocaciones de tokens JWT expirados
+echo "Purging expired token revocations..."
+python manage.py purge_tokens_revocados
+
 # Recolectar archivos estáticos
 echo "Collecting static files..."
 python manage.py collectstatic --noinput --clear
 
+# Directorio compartido por los workers para las métricas de /metrics
+case "${METRICAS_ACTIVAS:-False}" in
+    [Tt]rue|1|[Yy]es|[Oo]n)
+        export PROMETHEUS_MULTIPROC_DIR=${PROMETHEUS_MULTIPROC_DIR:-/tmp/kmtracker_metricas}
+        rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+        mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+        ;;
+esac
+
 # Iniciar Gunicorn
 echo "Starting Gunicorn..."
-gunicorn --bind=0.0.0.0:8000 --timeout 600 --workers 2 kmtracker_api.wsgi:application
+# Cada hilo mantiene una conexión persistente (DB_CONN_MAX_AGE)
+gunicorn --config gunicorn.conf.py --bind=0.0.0.0:8000 --timeout 600 --workers 2 --threads ${GUNICORN_THREADS:-1} kmtracker_api.wsgi:application
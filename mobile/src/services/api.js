@@ -62,8 +62,12 @@ api.interceptors.response.use(
             { refresh: refreshToken }
           );
 
-          const { access } = response.data;
+          const { access, refresh } = response.data;
           await AsyncStorage.setItem('access_token', access);
+          // Con rotación el refresh anterior queda revocado
+          if (refresh) {
+            await AsyncStorage.setItem('refresh_token', refresh);
+          }
 
           // Reintentar la petición original con el nuevo token
           originalRequest.headers.Authorization = `Bearer ${access}`;
@@ -153,4 +157,9 @@ export const alertasAPI = {
     api.get('/maintenance/alertas/vencidas/', { params: { vehiculo: vehiculoId } }),
 };
 
+// Sincronización incremental (since = token de la respuesta anterior)
+export const syncAPI = {
+  getCambios: (since) => api.get('/sync/', { params: since ? { since } : {} }),
+};
+
 export default api;